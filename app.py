@@ -1,24 +1,330 @@
-from flask import Flask, request, Response
+from flask import Flask, g, jsonify, request, Response
 import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
 
 import os
+import selectors
+import socket
+import ssl
+import time
+from urllib.parse import urlsplit
+
+from compression import compress, compress_stream, compressible, encoded_headers, negotiate, static_file
+from edge_cache import HIT, MISS, REVALIDATED, bypasses_cache, cache_control, etag_matches, get_edge_cache, header
+from tracing import get_tracer
 TARGET_URL = os.environ.get("TARGET_URL", "https://demo-chat-rneeemwchl3r8bw74appjuw.streamlit.app")
 
-app = Flask(__name__)
+# Keep-alive connections to TARGET_URL, shared by every request handled by this worker
+POOL_SIZE = int(os.environ.get("PROXY_POOL_SIZE", "32"))
+CHUNK_SIZE = int(os.environ.get("PROXY_CHUNK_SIZE", str(64 * 1024)))
+
+# WebSocket relay: stop reading from one side while this many bytes wait to be sent to the other
+WS_BUFFER = int(os.environ.get("PROXY_WS_BUFFER", str(256 * 1024)))
+WS_CONNECT_TIMEOUT = float(os.environ.get("PROXY_WS_CONNECT_TIMEOUT", "10"))
+
+# Hop-by-hop / re-encoded headers that must not be copied from the upstream response
+EXCLUDED_HEADERS = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
+
+# Cache hit ratio and bytes saved by the edge cache, as JSON
+METRICS_PATH = os.environ.get("PROXY_METRICS_PATH", "/_proxy/metrics")
+
+# Span histograms and counters of every proxied request, in the Prometheus text format
+PROMETHEUS_PATH = os.environ.get("PROXY_PROMETHEUS_PATH", "/_proxy/prometheus")
+# Requests slower than this (to response headers) are also logged as JSON traces; all feed the metrics
+TRACE_SLOW_MS = float(os.environ.get("PROXY_TRACE_SLOW_MS", "500"))
+
+# Dropped from cacheable requests so the upstream sends a full body to store; the cache answers them itself
+CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+# Files in static/ (fonts plus their .woff2 / .br / .gz builds) are served here without going upstream
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_PREFIX = os.environ.get("PROXY_STATIC_PREFIX", "/app/static")
+
+# static/ holds fonts for STATIC_PREFIX; Flask's own /static route would shadow Streamlit's /static bundles
+app = Flask(__name__, static_folder=None)
+
+
+def make_session(pool_size=POOL_SIZE):
+    session = requests.Session()
+    # Up to pool_size idle connections are kept; bursts beyond that still get (unpooled) connections
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # The session is shared across users: never store upstream cookies in it
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+upstream = make_session()
+edge = get_edge_cache()
+tracer = get_tracer()
+
+
+def request_outcome(status, headers, websocket=False):
+    """How a request was served, as a low-cardinality metric label"""
+    if websocket:
+        return "websocket"
+    if status >= 500:
+        return "error"
+    cache = header(headers, "X-Cache")
+    return cache.lower() if cache else "pass"
+
+
+def finish_trace(trace, status, headers, websocket=False):
+    """Close a proxy_request trace at response start; streamed bodies finish after it"""
+    outcome = trace.attrs.get("outcome") or request_outcome(status, headers, websocket)
+    trace.finish(log=trace.elapsed() * 1000 >= TRACE_SLOW_MS, outcome=outcome, status=status)
+
+
+def is_websocket(environ):
+    return (environ.get("HTTP_UPGRADE", "").lower() == "websocket"
+            and "upgrade" in environ.get("HTTP_CONNECTION", "").lower())
+
+
+def open_upstream_websocket(path, headers):
+    """Replay the client's upgrade request to TARGET_URL; returns (socket, raw response head)"""
+    target = urlsplit(TARGET_URL)
+    secure = target.scheme in ("https", "wss")
+    sock = socket.create_connection((target.hostname, target.port or (443 if secure else 80)), timeout=WS_CONNECT_TIMEOUT)
+    if secure:
+        sock = ssl.create_default_context().wrap_socket(sock, server_hostname=target.hostname)
+    lines = [f"GET {path} HTTP/1.1", f"Host: {target.netloc}"]
+    lines += [f"{key}: {value}" for key, value in headers if key.lower() != "host"]
+    sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    head = b""
+    while b"\r\n\r\n" not in head:
+        data = sock.recv(4096)
+        if not data or len(head) > 64 * 1024:
+            sock.close()
+            raise ConnectionError("upstream closed during the WebSocket handshake")
+        head += data
+    # Anything after the header block is already frame data and is forwarded as-is
+    return sock, head
+
+
+def _recv(sock):
+    data = sock.recv(CHUNK_SIZE)
+    # TLS may hold decrypted bytes the selector cannot see
+    while data and isinstance(sock, ssl.SSLSocket) and sock.pending():
+        data += sock.recv(sock.pending())
+    return data
+
+
+def relay(a, b, high_water=WS_BUFFER):
+    """Copy bytes both ways until either side closes, with bounded buffering
+
+    One thread per connection. A side is only read while the bytes queued
+    for its peer stay under high_water, so a slow reader pushes back on the
+    sender through TCP flow control instead of growing memory here.
+    """
+    peer = {a: b, b: a}
+    outbox = {a: bytearray(), b: bytearray()}
+    reading = {a: True, b: True}
+    registered = {}
+    for sock in (a, b):
+        sock.setblocking(False)
+    selector = selectors.DefaultSelector()
+    try:
+        while True:
+            for sock in (a, b):
+                events = 0
+                if reading[sock] and len(outbox[peer[sock]]) < high_water:
+                    events |= selectors.EVENT_READ
+                if outbox[sock]:
+                    events |= selectors.EVENT_WRITE
+                if events != registered.get(sock, 0):
+                    if not events:
+                        selector.unregister(sock)
+                    elif sock in registered and registered[sock]:
+                        selector.modify(sock, events)
+                    else:
+                        selector.register(sock, events)
+                    registered[sock] = events
+            # Done once one side has closed and everything it sent has been delivered
+            if not all(reading.values()) and not outbox[a] and not outbox[b]:
+                return
+            for key, mask in selector.select():
+                sock = key.fileobj
+                if mask & selectors.EVENT_WRITE:
+                    try:
+                        sent = sock.send(outbox[sock])
+                        del outbox[sock][:sent]
+                    except (BlockingIOError, ssl.SSLWantWriteError, ssl.SSLWantReadError):
+                        pass
+                    except OSError:
+                        return
+                if mask & selectors.EVENT_READ:
+                    try:
+                        data = _recv(sock)
+                    except (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                        continue
+                    except OSError:
+                        data = b""
+                    if data:
+                        outbox[peer[sock]] += data
+                    else:
+                        reading[sock] = False
+    finally:
+        selector.close()
+
+
+class ClosedConnection(Response):
+    """Ends a request whose socket was taken over, without the server writing a response"""
+
+    def __call__(self, environ, start_response):
+        if "gunicorn.socket" in environ:
+            raise StopIteration()  # gunicorn closes the connection quietly
+        raise ConnectionError()  # werkzeug treats it as a dropped client
+
+
+def proxy_websocket(path):
+    """Tunnel a WebSocket upgrade to TARGET_URL; frames pass through untouched
+
+    Needs the raw client socket, which gunicorn (gthread) and the werkzeug
+    dev server expose in the environ. Each open socket holds one worker
+    thread, so size `--threads` for the expected number of sessions.
+    """
+    environ = request.environ
+    client = environ.get("gunicorn.socket") or environ.get("werkzeug.socket")
+    if client is None:
+        return Response("WebSocket upgrade is not supported by this server", 501)
+    target_path = f"/{path}" + (f"?{request.query_string.decode('latin-1')}" if request.query_string else "")
+    try:
+        sock, head = open_upstream_websocket(target_path, request.headers.items())
+    except OSError:
+        return Response("Upstream WebSocket unavailable", 502)
+    try:
+        client.sendall(head)
+        if head.split(None, 2)[1:2] == [b"101"]:
+            relay(client, sock)
+    finally:
+        sock.close()
+        try:
+            client.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    return ClosedConnection()
+
+
+def cached_response(entry, state):
+    """Replay an edge cache entry, or a 304 if the client already holds it"""
+    edge.record(state, entry.size)
+    if etag_matches(request.headers.get("If-None-Match"), entry.etag):
+        return Response(status=304, headers=edge.not_modified_headers(entry))
+    return Response(entry.body, 200, edge.response_headers(entry, state))
+
+
+@app.before_request
+def start_trace():
+    g.trace = tracer.trace("proxy_request", method=request.method, path=request.path)
+
+
+@app.after_request
+def end_trace(response):
+    trace = g.pop("trace", None)
+    if trace is not None:
+        finish_trace(trace, response.status_code, response.headers.items(), is_websocket(request.environ))
+    return response
+
+
+@app.teardown_request
+def abort_trace(error):
+    # Only still open when the view raised, e.g. upstream unreachable
+    trace = g.pop("trace", None)
+    if trace is not None:
+        trace.finish(outcome="error", error=type(error).__name__ if error else None)
+
+
+@app.route(METRICS_PATH)
+def proxy_metrics():
+    return jsonify({"edge_cache": edge.stats() if edge is not None else None})
+
+
+@app.route(PROMETHEUS_PATH)
+def proxy_prometheus():
+    return Response(tracer.metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+@app.route(f"{STATIC_PREFIX}/<path:name>")
+def static_asset(name):
+    found = static_file(STATIC_DIR, name, request.headers.get("Accept-Encoding"))
+    if found is None:
+        return proxy(f"{STATIC_PREFIX.strip('/')}/{name}")
+    path, headers = found
+    g.trace.set(outcome="static")
+    if etag_matches(request.headers.get("If-None-Match"), header(headers, "ETag")):
+        return Response(status=304, headers=[(k, v) for k, v in headers if k != "Content-Length"])
+    with open(path, "rb") as f:
+        return Response(f.read(), 200, headers)
+
 
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
+# Werkzeug routes upgrade requests only to rules flagged as websocket
+@app.route("/", defaults={"path": ""}, websocket=True)
+@app.route("/<path:path>", websocket=True)
 def proxy(path):
+    if is_websocket(request.environ):
+        return proxy_websocket(path)
+
     url = f"{TARGET_URL}/{path}"
     headers = {key: value for key, value in request.headers if key != 'Host'}
-    resp = requests.request(
-        method=request.method,
-        url=url,
-        headers=headers,
-        data=request.get_data(),
-        cookies=request.cookies,
-        allow_redirects=False
-    )
-    excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
-    response_headers = [(name, value) for (name, value) in resp.raw.headers.items() if name.lower() not in excluded_headers]
-    return Response(resp.content, resp.status_code, response_headers)
+    # Bodies arrive decoded from upstream and are re-encoded here for the client
+    encoding = negotiate(request.headers.get("Accept-Encoding")) if request.method == "GET" else None
+
+    cache_key = entry = None
+    if edge is not None and not bypasses_cache(request.method, request.headers.items()):
+        cache_key = edge.key(f"/{path}", request.query_string.decode("latin-1"), encoding)
+        entry = edge.get(cache_key)
+        revalidate = "no-cache" in cache_control(request.headers.get("Cache-Control"))
+        if entry is not None and entry.is_fresh(time.time()) and not revalidate:
+            return cached_response(entry, HIT)
+        for name in CONDITIONAL_HEADERS:
+            headers.pop(name, None)
+        if entry is not None:
+            headers.update(entry.validators())
+
+    # Upstream hop: request sent until response headers are in
+    with g.trace.span("upstream"):
+        resp = upstream.request(
+            method=request.method,
+            url=url,
+            headers=headers,
+            data=request.get_data(),
+            cookies=request.cookies,
+            allow_redirects=False,
+            stream=True
+        )
+    if entry is not None and resp.status_code == 304:
+        resp.close()
+        validators = resp.raw.headers.items()
+        if header(entry.headers, "Content-Encoding"):
+            validators = encoded_headers(validators, encoding)
+        return cached_response(edge.refresh(entry, validators), REVALIDATED)
+
+    response_headers = [(name, value) for (name, value) in resp.raw.headers.items() if name.lower() not in EXCLUDED_HEADERS]
+    length = resp.headers.get("Content-Length", "")
+    if encoding is not None and compressible(response_headers, int(length) if length.isdigit() else None):
+        response_headers = encoded_headers(response_headers, encoding)
+    else:
+        encoding = None
+    if cache_key is not None:
+        edge.record(MISS)
+        if request.method == "GET" and length.isdigit() and edge.storable(resp.status_code, response_headers, int(length)):
+            content = compress(resp.content, encoding) if encoding else resp.content
+            edge.put(cache_key, resp.status_code, response_headers, content)
+            return Response(content, resp.status_code, response_headers + [("X-Cache", MISS)])
+        response_headers.append(("X-Cache", MISS))
+    if length.isdigit() and int(length) <= CHUNK_SIZE:
+        # Small bodies go out in one write with a Content-Length; a chunked reply
+        # would cost an extra round of tiny writes (and Nagle / delayed-ACK stalls)
+        return Response(compress(resp.content, encoding) if encoding else resp.content, resp.status_code, response_headers)
+
+    # Relay larger (decoded) bodies as they arrive instead of buffering them;
+    # closing the upstream response hands its connection back to the pool
+    body = resp.iter_content(chunk_size=CHUNK_SIZE)
+    response = Response(compress_stream(body, encoding) if encoding else body, resp.status_code, response_headers)
+    response.call_on_close(resp.close)
+    return response
@@ -0,0 +1,332 @@
+import asyncio
+import json
+import time
+
+import httpx
+import websockets
+
+from app import (
+    CHUNK_SIZE, CONDITIONAL_HEADERS, EXCLUDED_HEADERS, METRICS_PATH, POOL_SIZE, PROMETHEUS_PATH, STATIC_DIR,
+    STATIC_PREFIX, TARGET_URL, WS_CONNECT_TIMEOUT, finish_trace, tracer
+)
+from compression import Compressor, compress, compressible, encoded_headers, negotiate, static_file
+from edge_cache import HIT, MISS, REVALIDATED, bypasses_cache, cache_control, etag_matches, get_edge_cache, header
+
+# -------------------------------
+# ASYNC PROXY ENGINE
+# -------------------------------
+# uvicorn asgi_app:app --host 0.0.0.0 --port 8000
+#
+# Same route semantics as the Flask proxy in app.py (TARGET_URL + path, Host
+# dropped on the way up, EXCLUDED_HEADERS on the way down, WebSocket
+# pass-through), but each in-flight request is a coroutine rather than a
+# worker thread, so slow upstream responses no longer exhaust the workers.
+ALLOWED_METHODS = ("GET", "HEAD", "OPTIONS")  # the Flask route's default methods
+
+# Generated by the websockets client for the upstream handshake
+WS_HANDSHAKE_HEADERS = {
+    b"host", b"upgrade", b"connection", b"sec-websocket-key", b"sec-websocket-version",
+    b"sec-websocket-extensions", b"sec-websocket-protocol"
+}
+
+# Close codes that are reported locally but may not be sent in a close frame
+RESERVED_CLOSE_CODES = {1005, 1006, 1015}
+
+_client = None
+edge = get_edge_cache()
+
+
+def get_client():
+    """Process-wide pooled client; created lazily inside the running event loop"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=POOL_SIZE),
+            # Like requests in app.py: no read timeout, upstream responses may be long-lived
+            timeout=httpx.Timeout(None, connect=WS_CONNECT_TIMEOUT),
+            follow_redirects=False
+        )
+    return _client
+
+
+# -------------------------------
+# HTTP
+# -------------------------------
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _until_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _send_simple(send, status, text):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+    await send({"type": "http.response.body", "body": text.encode()})
+
+
+def _encode(headers):
+    return [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+
+async def _send_cached(send, scope, request_headers, entry, state):
+    """Replay an edge cache entry, or a 304 if the client already holds it"""
+    edge.record(state, entry.size)
+    if etag_matches(header(request_headers, "If-None-Match"), entry.etag):
+        await send({"type": "http.response.start", "status": 304, "headers": _encode(edge.not_modified_headers(entry))})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    await send({"type": "http.response.start", "status": 200, "headers": _encode(edge.response_headers(entry, state))})
+    await send({"type": "http.response.body", "body": entry.body if scope["method"] != "HEAD" else b""})
+
+
+async def _send_static(send, scope, request_headers, name):
+    """Serve a file from STATIC_DIR; False if there is none and the request should go upstream"""
+    found = static_file(STATIC_DIR, name, header(request_headers, "Accept-Encoding"))
+    if found is None:
+        return False
+    path, headers = found
+    if etag_matches(header(request_headers, "If-None-Match"), header(headers, "ETag")):
+        headers = [(k, v) for k, v in headers if k != "Content-Length"]
+        await send({"type": "http.response.start", "status": 304, "headers": _encode(headers)})
+        await send({"type": "http.response.body", "body": b""})
+        return True
+    with open(path, "rb") as f:
+        content = f.read() if scope["method"] != "HEAD" else b""
+    await send({"type": "http.response.start", "status": 200, "headers": _encode(headers)})
+    await send({"type": "http.response.body", "body": content})
+    return True
+
+
+async def proxy_http(scope, receive, send):
+    if scope["method"] not in ALLOWED_METHODS:
+        await _send_simple(send, 405, "Method Not Allowed")
+        return
+    body = await _read_body(receive)
+    if body is None:
+        return
+
+    if scope["path"] == METRICS_PATH:
+        payload = json.dumps({"edge_cache": edge.stats() if edge is not None else None}).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": payload})
+        return
+
+    if scope["path"] == PROMETHEUS_PATH:
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/plain; version=0.0.4; charset=utf-8")]})
+        await send({"type": "http.response.body", "body": tracer.metrics.render().encode()})
+        return
+
+    request_headers = [(key.decode("latin-1"), value.decode("latin-1")) for key, value in scope["headers"]]
+    if scope["path"].startswith(f"{STATIC_PREFIX}/"):
+        scope["trace"].set(outcome="static")
+        if await _send_static(send, scope, request_headers, scope["path"][len(STATIC_PREFIX) + 1:]):
+            return
+        scope["trace"].set(outcome=None)
+
+    headers = [(key, value) for key, value in request_headers if key.lower() != "host"]
+    # Bodies arrive decoded from upstream and are re-encoded here for the client
+    encoding = negotiate(header(request_headers, "Accept-Encoding")) if scope["method"] == "GET" else None
+
+    cache_key = entry = None
+    if edge is not None and not bypasses_cache(scope["method"], request_headers):
+        cache_key = edge.key(scope["path"], scope.get("query_string", b"").decode("latin-1"), encoding)
+        entry = edge.get(cache_key)
+        revalidate = "no-cache" in cache_control(header(request_headers, "Cache-Control"))
+        if entry is not None and entry.is_fresh(time.time()) and not revalidate:
+            await _send_cached(send, scope, request_headers, entry, HIT)
+            return
+        conditional = {name.lower() for name in CONDITIONAL_HEADERS}
+        headers = [(key, value) for key, value in headers if key.lower() not in conditional]
+        if entry is not None:
+            headers += list(entry.validators().items())
+
+    client = get_client()
+    request = client.build_request(scope["method"], f"{TARGET_URL}{scope['path']}", headers=headers, content=body)
+    try:
+        # Upstream hop: request sent until response headers are in
+        with scope["trace"].span("upstream"):
+            response = await client.send(request, stream=True)
+    except httpx.HTTPError:
+        await _send_simple(send, 502, "Bad Gateway")
+        return
+
+    try:
+        if entry is not None and response.status_code == 304:
+            validators = response.headers.multi_items()
+            if header(entry.headers, "Content-Encoding"):
+                validators = encoded_headers(validators, encoding)
+            await _send_cached(send, scope, request_headers, edge.refresh(entry, validators), REVALIDATED)
+            return
+
+        response_headers = [
+            (name.decode("latin-1"), value.decode("latin-1")) for name, value in response.headers.raw
+            if name.decode("latin-1").lower() not in EXCLUDED_HEADERS
+        ]
+        length = response.headers.get("content-length", "")
+        if encoding is not None and compressible(response_headers, int(length) if length.isdigit() else None):
+            response_headers = encoded_headers(response_headers, encoding)
+        else:
+            encoding = None
+        if cache_key is not None:
+            edge.record(MISS)
+            if scope["method"] == "GET" and length.isdigit() and edge.storable(response.status_code, response_headers, int(length)):
+                content = await response.aread()
+                content = compress(content, encoding) if encoding else content
+                edge.put(cache_key, response.status_code, response_headers, content)
+                response_headers += [("Content-Length", str(len(content))), ("X-Cache", MISS)]
+                await send({"type": "http.response.start", "status": response.status_code, "headers": _encode(response_headers)})
+                await send({"type": "http.response.body", "body": content})
+                return
+            response_headers.append(("X-Cache", MISS))
+        if length.isdigit() and int(length) <= CHUNK_SIZE:
+            # Small bodies in one write with a Content-Length, as in app.py
+            content = await response.aread()
+            content = compress(content, encoding) if encoding else content
+            response_headers.append(("Content-Length", str(len(content))))
+            await send({"type": "http.response.start", "status": response.status_code, "headers": _encode(response_headers)})
+            await send({"type": "http.response.body", "body": content})
+            return
+
+        await send({"type": "http.response.start", "status": response.status_code, "headers": _encode(response_headers)})
+
+        async def relay_body():
+            compressor = Compressor(encoding) if encoding else None
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                chunk = compressor.compress(chunk) if compressor else chunk
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": compressor.finish() if compressor else b""})
+
+        # Stop pulling from upstream as soon as the client goes away
+        relay = asyncio.ensure_future(relay_body())
+        watch = asyncio.ensure_future(_until_disconnect(receive))
+        await asyncio.wait({relay, watch}, return_when=asyncio.FIRST_COMPLETED)
+        for task in (relay, watch):
+            task.cancel()
+        if relay.done() and not relay.cancelled() and relay.exception():
+            raise relay.exception()
+    finally:
+        await response.aclose()
+
+
+# -------------------------------
+# WEBSOCKET
+# -------------------------------
+def _close_code(code):
+    return 1000 if code is None or code in RESERVED_CLOSE_CODES else code
+
+
+async def proxy_websocket(scope, receive, send):
+    """Relay messages between the client and TARGET_URL
+
+    Backpressure comes from both ends awaiting their writes (websockets
+    drains its transport, the ASGI server bounds its receive queue), so a
+    slow side stalls the other instead of growing buffers here.
+    """
+    if (await receive())["type"] != "websocket.connect":
+        return
+    query = scope.get("query_string", b"")
+    uri = "ws" + TARGET_URL[len("http"):] + scope["path"] + (f"?{query.decode('latin-1')}" if query else "")
+    headers = [
+        (key.decode("latin-1"), value.decode("latin-1"))
+        for key, value in scope["headers"] if key not in WS_HANDSHAKE_HEADERS
+    ]
+    try:
+        upstream = await websockets.connect(
+            uri,
+            additional_headers=headers,
+            subprotocols=scope.get("subprotocols") or None,
+            user_agent_header=None,
+            open_timeout=WS_CONNECT_TIMEOUT,
+            ping_interval=None,  # the client's own pings pass through
+            max_size=None
+        )
+    except (OSError, asyncio.TimeoutError, websockets.InvalidHandshake):
+        await send({"type": "websocket.close", "code": 1011})
+        return
+
+    await send({"type": "websocket.accept", "subprotocol": upstream.subprotocol})
+
+    client_gone = False
+
+    async def client_to_upstream():
+        nonlocal client_gone
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    client_gone = True
+                    await upstream.close(_close_code(message.get("code")))
+                    return
+                await upstream.send(message["bytes"] if message.get("bytes") is not None else message.get("text", ""))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def upstream_to_client():
+        try:
+            async for data in upstream:
+                key = "bytes" if isinstance(data, bytes) else "text"
+                await send({"type": "websocket.send", key: data})
+        except websockets.ConnectionClosed:
+            pass
+        if not client_gone:
+            await send({"type": "websocket.close", "code": _close_code(upstream.close_code)})
+
+    tasks = {asyncio.ensure_future(client_to_upstream()), asyncio.ensure_future(upstream_to_client())}
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await upstream.close()
+
+
+# -------------------------------
+# ASGI ENTRY POINT
+# -------------------------------
+async def _traced(handler, scope, receive, send):
+    """Run a handler under a proxy_request trace, closed at response start like app.py's"""
+    trace = scope["trace"] = tracer.trace("proxy_request", method=scope.get("method", "GET"), path=scope["path"])
+    websocket = scope["type"] == "websocket"
+
+    async def traced_send(message):
+        if message["type"] == "http.response.start":
+            headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in message.get("headers", [])]
+            finish_trace(trace, message["status"], headers)
+        await send(message)
+
+    try:
+        await handler(scope, receive, send if websocket else traced_send)
+    except BaseException as e:
+        trace.finish(outcome="error", error=type(e).__name__)
+        raise
+    finally:
+        if websocket:
+            finish_trace(trace, 101, [], websocket=True)
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "http":
+        await _traced(proxy_http, scope, receive, send)
+    elif scope["type"] == "websocket":
+        await _traced(proxy_websocket, scope, receive, send)
+    elif scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if _client is not None:
+                    await _client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
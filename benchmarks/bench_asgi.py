@@ -0,0 +1,165 @@
+"""Flask/gunicorn sync proxy vs the asyncio proxy under many concurrent slow requests.
+
+    pip install gunicorn uvicorn httpx
+    python benchmarks/bench_asgi.py --concurrency 50 500 2000 --delay-ms 500
+
+The stand-in upstream answers every request after --delay-ms, standing in for
+a slow Streamlit response. `flask` is app.py under gunicorn sync workers
+(--workers processes, one request each); `asgi` is asgi_app.py under uvicorn
+in a single process. Both are driven over keep-alive connections from one
+asyncio client; requests that take longer than --timeout count as errors.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from bench_proxy import free_port, peak_rss_mb, wait_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BODY_SIZE = 4 * 1024
+
+
+# -------------------------------
+# STAND-IN UPSTREAM
+# -------------------------------
+async def serve_upstream(port, delay_ms, body_size):
+    body = os.urandom(body_size)
+    head = (f"HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1")
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                length = next((int(line.split(b":", 1)[1]) for line in request.split(b"\r\n")
+                               if line.lower().startswith(b"content-length:")), 0)
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(delay_ms / 1000)
+                writer.write(head + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", port, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+# -------------------------------
+# PROXY ENGINES
+# -------------------------------
+def start_proxy(engine, port, target, workers):
+    env = dict(os.environ, TARGET_URL=target)
+    if engine == "flask":
+        cmd = [sys.executable, "-m", "gunicorn", "-w", str(workers), "--backlog", "4096",
+               "--log-level", "warning", "-b", f"127.0.0.1:{port}", "app:app"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "asgi_app:app", "--host", "127.0.0.1", "--port", str(port),
+               "--backlog", "4096", "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env)
+
+
+def tree_rss_mb(proc):
+    """Peak RSS of the server process plus its direct children (gunicorn workers)"""
+    pids = [proc.pid]
+    try:
+        with open(f"/proc/{proc.pid}/task/{proc.pid}/children") as f:
+            pids += [int(pid) for pid in f.read().split()]
+    except OSError:
+        pass
+    return sum(peak_rss_mb(pid) for pid in pids)
+
+
+# -------------------------------
+# LOAD
+# -------------------------------
+async def load(port, concurrency, seconds, timeout):
+    import httpx
+
+    latencies = []
+    errors = 0
+    stop = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits,
+                                 timeout=httpx.Timeout(timeout, pool=None)) as client:
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    resp = await client.get("/small")
+                    resp.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    if not latencies:
+        return 0.0, float("nan"), float("nan"), errors
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99), errors
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))  # inherited by the proxies and the upstream
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", choices=["flask", "asgi"], default=["flask", "asgi"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--delay-ms", type=float, default=500)
+    parser.add_argument("--workers", type=int, default=(os.cpu_count() or 1) * 2 + 1, help="gunicorn sync workers")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds before a request counts as an error")
+    parser.add_argument("--role", choices=["upstream"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    raise_fd_limit()
+    if args.role == "upstream":
+        return asyncio.run(serve_upstream(args.port, args.delay_ms, BODY_SIZE))
+
+    upstream_port = free_port()
+    upstream = subprocess.Popen([sys.executable, __file__, "--role", "upstream", "--port", str(upstream_port),
+                                 "--delay-ms", str(args.delay_ms)])
+    try:
+        wait_for(upstream_port)
+        ideal = 1000 / args.delay_ms
+        print(f"upstream delay {args.delay_ms:.0f} ms → at most {ideal:.1f} req/s per concurrent request")
+        print(f"{'engine':>6} {'conc':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak RSS MB':>11}")
+        for engine in args.engines:
+            for concurrency in args.concurrency:
+                port = free_port()
+                proxy = start_proxy(engine, port, f"http://127.0.0.1:{upstream_port}", args.workers)
+                try:
+                    wait_for(port)
+                    rps, p50, p99, errors = asyncio.run(load(port, concurrency, args.seconds, args.timeout))
+                    print(f"{engine:>6} {concurrency:>6} {rps:8.1f} {p50:8.1f} {p99:8.1f} {errors:>7} "
+                          f"{tree_rss_mb(proxy):11.1f}")
+                finally:
+                    proxy.terminate()
+                    proxy.wait()
+    finally:
+        upstream.terminate()
+        upstream.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Peak memory allocated per generate_dynamic_chart() request, relative to the frame.
+
+Fails (exit 1) if any chart request allocates more than --max-fraction of the
+frame, i.e. if a branch starts copying the full frame again.
+
+    DATAGEN_CAMPAIGNS=2000 DATAGEN_ROWS_PER_WEEK=20 python benchmarks/bench_chart_memory.py
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charts import generate_dynamic_chart, prepare_chart_frame
+from datagen import load_config, load_dataset
+
+QUERIES = [
+    "Recommend optimal channel mixes for $100M, $200M, and $300M investment levels.",
+    "Determine which formats delivered the highest ROI.",
+    "Evaluate channels & publishers with the strongest click-to-conversion rates.",
+    "Highlight months with the highest churn and distinguish internal vs. external drivers.",
+    "Is Video or Static driving higher engagement?",
+    "Which audience segment is underperforming?",
+    "What's driving ROAS on Social vs Display?",
+    "Summarise performance"
+]
+
+
+def peak_bytes(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-fraction", type=float, default=0.05)
+    args = parser.parse_args()
+
+    df = prepare_chart_frame(load_dataset(load_config(), compact=True))
+    frame_bytes = df.memory_usage(deep=True).sum()
+    copy_bytes = peak_bytes(lambda: df.copy())
+    print(f"rows: {len(df):,}  frame: {frame_bytes / 1e6:.1f} MB  one df.copy(): {copy_bytes / 1e6:.1f} MB")
+    print(f"{'query':<50} {'peak MB':>9} {'of frame':>9}")
+
+    failed = False
+    for query in QUERIES:
+        peak = peak_bytes(lambda: generate_dynamic_chart(query, df))
+        fraction = peak / frame_bytes
+        failed |= fraction > args.max_fraction
+        print(f"{query[:50]:<50} {peak / 1e6:>9.2f} {fraction:>8.1%}{'  FAIL' if fraction > args.max_fraction else ''}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Concurrent identical prompts against the mock Groq API, with and without single-flight coalescing.
+
+    python benchmarks/bench_coalesce.py --sessions 40 --presets 1 3 --stream
+
+Every session asks one of --presets questions at the same moment, as when a
+team opens the app together and clicks the same preset. `off` sends every
+request upstream; `on` routes them through singleflight.SingleFlight keyed by
+question. The mock allows --limit requests per --window seconds and nothing
+retries, so 429s show up as failed turns.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from groq import Groq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import complete, relay, stream
+from mock_groq import MockGroq
+from singleflight import SingleFlight
+
+PRESETS = [
+    "Determine which formats delivered the highest ROI.",
+    "Which audience segment is underperforming?",
+    "Is Video or Static driving higher engagement?",
+    "What's driving ROAS on Social vs Display?"
+]
+
+
+def run(coalesce, presets, args):
+    mock = MockGroq(limit=args.limit, window=args.window, delay_ms=args.delay_ms).start()
+    client = Groq(api_key="test", base_url=mock.url, max_retries=0)
+    flights = SingleFlight() if coalesce else None
+    latencies, failed = [], 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.sessions)
+
+    def session(i):
+        nonlocal failed
+        question = PRESETS[i % presets]
+        messages = [{"role": "system", "content": "You are a media analyst."}, {"role": "user", "content": question}]
+        metrics = {}
+        barrier.wait()
+        start = time.perf_counter()
+        try:
+            if args.stream:
+                call = lambda: stream(client, messages, metrics=metrics)
+                if flights is None:
+                    "".join(call())
+                else:
+                    deltas, shared = flights.stream(question, call)
+                    "".join(relay(deltas, metrics) if shared else deltas)
+            else:
+                call = lambda: complete(client, messages, metrics=metrics)
+                if flights is None:
+                    call()
+                else:
+                    flights.do(question, call)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+        except Exception:
+            with lock:
+                failed += 1
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    mock.stop()
+    return {
+        "upstream": mock.requests, "throttled": mock.throttled, "answered": len(latencies), "failed": failed,
+        "peak": mock.max_in_flight,
+        "p50": float(np.percentile(latencies, 50)) if latencies else float("nan"),
+        "p99": float(np.percentile(latencies, 99)) if latencies else float("nan")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--presets", type=int, nargs="+", default=[1, 3], help="distinct questions in the burst")
+    parser.add_argument("--limit", type=int, default=10, help="mock requests per window (0 = unlimited)")
+    parser.add_argument("--window", type=float, default=5.0)
+    parser.add_argument("--delay-ms", type=float, default=800)
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions at once, mock limit {args.limit} / {args.window:g}s, "
+          f"{'streaming' if args.stream else 'blocking'}")
+    print(f"{'presets':>7} {'coalesce':>8} {'upstream':>9} {'429s':>5} {'peak':>5} {'answered':>9} {'failed':>7} "
+          f"{'p50 s':>6} {'p99 s':>6}")
+    for presets in args.presets:
+        for coalesce in (False, True):
+            r = run(coalesce, min(presets, len(PRESETS)), args)
+            print(f"{presets:>7} {'on' if coalesce else 'off':>8} {r['upstream']:>9} {r['throttled']:>5} {r['peak']:>5} "
+                  f"{r['answered']:>9} {r['failed']:>7} {r['p50']:6.2f} {r['p99']:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Aggregate cube rollups vs live groupbys for every chart spec in charts.CHART_DATA.
+
+    DATAGEN_CAMPAIGNS=2000 DATAGEN_ROWS_PER_WEEK=20 python benchmarks/bench_cube.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charts import CHANNEL_TYPES, CHART_DATA, PUBLISHER_CHANNELS, chart_data, prepare_chart_frame, week_to_month
+from cube import AggregateCube
+from datagen import load_config, load_dataset
+
+# How the chart branches derived their keys on a copy of the frame before the cube
+LIVE_KEYS = {
+    "Month": lambda df: week_to_month(df["Week"]),
+    "Channel": lambda df: df["Publisher"].astype(str).map(PUBLISHER_CHANNELS).fillna("Other"),
+    "Channel Type": lambda df: df["Channel"].map(CHANNEL_TYPES).fillna("Other")
+}
+
+
+def live(df, intent):
+    """What a chart did before the cube: derive its keys on a copy, filter, groupby the full frame"""
+    by, agg, where, sort_by, top = CHART_DATA[intent]
+    frame = df
+    needed = {by} | set(where or {})
+    if "Channel Type" in needed:
+        needed.add("Channel")  # Channel Type is looked up from Channel
+    missing = [key for key in LIVE_KEYS if key in needed]
+    if missing:
+        frame = df.copy()
+        for key in missing:
+            frame[key] = LIVE_KEYS[key](frame)
+    if where:
+        for col, values in where.items():
+            frame = frame[frame[col].isin(values)]
+    data = frame.groupby(by, observed=True).agg(agg).reset_index()
+    if sort_by:
+        data = data.sort_values(sort_by, ascending=False)
+    return data.head(top) if top else data
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config = load_config()
+    df = load_dataset(config, compact=True)
+    prepared = prepare_chart_frame(load_dataset(config, compact=True))
+
+    build_time, cube = best_of(lambda: AggregateCube(prepared), 1)
+    print(f"rows: {len(df):,}  cube cells: {len(cube):,}  build: {build_time * 1000:.1f} ms")
+    print(f"{'chart':<16} {'groupby ms':>11} {'cube ms':>9} {'speed-up':>9}  match")
+
+    total_live = total_cube = 0.0
+    for intent, (by, agg, _, _, _) in CHART_DATA.items():
+        live_time, expected = best_of(lambda: live(df, intent), args.repeat)
+        cube_time, actual = best_of(lambda: chart_data(intent, cube), args.repeat)
+        expected, actual = expected.set_index(by).sort_index(), actual.set_index(by).sort_index()
+        match = list(expected.index.astype(str)) == list(actual.index.astype(str)) and all(
+            np.allclose(expected[col].astype(float), actual[col].astype(float), rtol=1e-5) for col in agg)
+        total_live += live_time
+        total_cube += cube_time
+        print(f"{intent:<16} {live_time * 1000:>11.2f} {cube_time * 1000:>9.2f} {live_time / cube_time:>8.1f}x  {match}")
+    print(f"{'all charts':<16} {total_live * 1000:>11.2f} {total_cube * 1000:>9.2f} {total_live / total_cube:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
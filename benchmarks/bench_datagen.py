@@ -0,0 +1,60 @@
+"""Rows/second for the loop and vectorized generate_data() engines.
+
+    python benchmarks/bench_datagen.py --scale 1 10 100 --parity
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import CAMPAIGNS, DEFAULT_SEED, ENGINES, parity_report
+
+
+def scaled_campaigns(scale):
+    """Clone the campaign set `scale` times so the grid grows linearly"""
+    if scale == 1:
+        return CAMPAIGNS
+    return {f"{name} #{i + 1}": spec for i in range(scale) for name, spec in CAMPAIGNS.items()}
+
+
+def time_engine(engine, campaigns, repeat, seed):
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(ENGINES[engine](seed=seed, campaigns=campaigns))
+        best = min(best, time.perf_counter() - start)
+    return rows, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--parity", action="store_true", help="also run the parity check")
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} {'engine':>11} {'rows':>10} {'seconds':>9} {'rows/s':>12}")
+    for scale in args.scale:
+        campaigns = scaled_campaigns(scale)
+        results = {}
+        for engine in ENGINES:
+            rows, seconds = time_engine(engine, campaigns, args.repeat, args.seed)
+            results[engine] = seconds
+            print(f"{scale:>6} {engine:>11} {rows:>10,} {seconds:>9.4f} {rows / seconds:>12,.0f}")
+        print(f"{'':>6} {'speed-up':>11} {results['loop'] / results['vectorized']:>33.1f}x")
+
+    if args.parity:
+        report = parity_report(seed=args.seed)
+        print()
+        print(report.to_string(index=False))
+        print(f"schema match: {report.attrs['schema_match']}, all columns OK: {bool(report['OK'].all())}")
+        if not report["OK"].all():
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Tokens and build time of the per-question data digest at several budgets.
+
+    python benchmarks/bench_digest.py --budgets 200 400 800
+    python benchmarks/bench_digest.py --show "Which audience segment is underperforming?"
+
+Digest tokens are extra prompt tokens on every uncached turn, so this is the
+grounding-vs-latency trade-off: pick the smallest budget that still carries
+the slices a question needs.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_chart_memory import QUERIES
+from charts import chart_intent, prepare_chart_frame
+from datagen import load_config, load_dataset
+from digest import build_digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[200, 400, 800])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--show", help="print the digest for one question at the first budget")
+    args = parser.parse_args()
+
+    df = prepare_chart_frame(load_dataset(load_config(), compact=True))
+    if args.show:
+        text, tokens = build_digest(args.show, df, args.budgets[0])
+        print(f"{text}\n\n~{tokens} tokens")
+        return
+
+    print(f"{'query':<50} {'intent':>15}" + "".join(f" {f'{b} tok':>8} {'ms':>6}" for b in args.budgets))
+    for query in QUERIES:
+        cells = []
+        for budget in args.budgets:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                _, tokens = build_digest(query, df, budget)
+            ms = (time.perf_counter() - start) / args.repeat * 1000
+            cells.append(f" {tokens:>8} {ms:6.1f}")
+        print(f"{query[:50]:<50} {chart_intent(query):>15}" + "".join(cells))
+
+
+if __name__ == "__main__":
+    main()
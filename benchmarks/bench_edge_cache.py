@@ -0,0 +1,138 @@
+"""Page loads through app.py with and without the edge cache.
+
+    python benchmarks/bench_edge_cache.py --pages 20 --assets 40
+
+A "page" is index.html (no-cache + ETag, revalidated every load) followed by
+--assets hashed bundles (immutable, one year) fetched by 6 parallel
+connections like a browser. Each page load is a new visitor with an empty
+browser cache; the upstream adds --latency-ms per request to stand in for
+the round trip to TARGET_URL.
+"""
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from bench_proxy import free_port, peak_rss_mb, wait_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ASSET_SIZE = 96 * 1024
+
+
+# -------------------------------
+# STAND-IN UPSTREAM
+# -------------------------------
+def run_upstream(port, assets, latency_ms):
+    bodies = {"/": (b"<html>" + b"x" * 2048, "no-cache")}
+    for i in range(assets):
+        bodies[f"/static/js/bundle.{i:03d}.js"] = (os.urandom(ASSET_SIZE), "public, max-age=31536000, immutable")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency_ms / 1000)
+            body, cache_control = bodies.get(self.path, (None, None))
+            if body is None:
+                self.send_error(404)
+                return
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", cache_control)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+def run_proxy(port, target):
+    import logging
+
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    os.environ["TARGET_URL"] = target
+    from app import app
+    make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+# -------------------------------
+# PAGE LOADS
+# -------------------------------
+def page_load(port, assets):
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    with requests.Session() as session:
+        session.get(f"{base}/").raise_for_status()
+        paths = [f"/static/js/bundle.{i:03d}.js" for i in range(assets)]
+        with ThreadPoolExecutor(6) as pool:
+            for resp in pool.map(lambda path: requests.get(f"{base}{path}"), paths):
+                resp.raise_for_status()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--assets", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--role", choices=["upstream", "proxy"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--target", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.role == "upstream":
+        return run_upstream(args.port, args.assets, args.latency_ms)
+    if args.role == "proxy":
+        return run_proxy(args.port, args.target)
+
+    upstream_port = free_port()
+    upstream = subprocess.Popen([sys.executable, __file__, "--role", "upstream", "--port", str(upstream_port),
+                                 "--assets", str(args.assets), "--latency-ms", str(args.latency_ms)])
+    try:
+        wait_for(upstream_port)
+        print(f"{'cache':>6} {'first ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'hit ratio':>9} {'MB saved':>9} {'peak RSS MB':>11}")
+        for size in ("0", str(256 * 1024 * 1024)):
+            port = free_port()
+            env = dict(os.environ, PROXY_CACHE_SIZE=size, PROXY_CACHE_DIR="")
+            proxy = subprocess.Popen([sys.executable, __file__, "--role", "proxy", "--port", str(port),
+                                      "--target", f"http://127.0.0.1:{upstream_port}"], env=env)
+            try:
+                wait_for(port)
+                times = np.array([page_load(port, args.assets) for _ in range(args.pages)]) * 1000
+                stats = requests.get(f"http://127.0.0.1:{port}/_proxy/metrics").json()["edge_cache"] or {}
+                label = "off" if size == "0" else "on"
+                print(f"{label:>6} {times[0]:9.1f} {np.percentile(times[1:], 50):8.1f} {np.percentile(times[1:], 99):8.1f} "
+                      f"{stats.get('hit_ratio', 0):9.2f} {stats.get('bytes_saved', 0) / 1e6:9.1f} "
+                      f"{peak_rss_mb(proxy.pid):11.1f}")
+            finally:
+                proxy.terminate()
+                proxy.wait()
+    finally:
+        upstream.terminate()
+        upstream.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Chart intent routing: accuracy on a labelled query set and time per query, router vs keyword cascade.
+
+    python benchmarks/bench_intent.py --verbose
+
+`cascade` is the original generate_dynamic_chart() routing (first branch
+with any keyword in the query wins). Top-2 counts a query as routed
+correctly when its label is the first or second ranked intent.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent import DEFAULT_INTENT, rank_intents
+
+QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_queries.csv")
+
+# The branch order of generate_dynamic_chart() before the router
+CASCADE = [
+    ('channel_mix', ['channel mix', 'investment', '$100m', '$200m', '$300m', 'optimal', 'allocation']),
+    ('format_roi', ['roi', 'highest roi', 'cpa', 'format']),
+    ('conversion', ['click', 'conversion rate', 'click-to-conversion', 'strongest']),
+    ('churn', ['churn', 'month', 'highest churn', 'internal', 'external', 'driver']),
+    ('engagement', ['video', 'static', 'engagement', 'higher engagement']),
+    ('audience', ['audience', 'segment', 'underperforming', 'demographic', 'behavioral']),
+    ('social_display', ['social', 'display', 'roas', 'driving'])
+]
+
+
+def cascade(query):
+    query_lower = query.lower()
+    for intent, words in CASCADE:
+        if any(word in query_lower for word in words):
+            return [intent]
+    return [DEFAULT_INTENT]
+
+
+def router(query):
+    return [intent for intent, _ in rank_intents(query)]
+
+
+def load(path):
+    with open(path, newline="") as f:
+        return [(row["query"], row["intent"]) for row in csv.DictReader(f)]
+
+
+def evaluate(name, fn, labelled, repeat, verbose):
+    top1 = top2 = 0
+    for query, label in labelled:
+        ranked = fn(query)
+        top1 += ranked[0] == label
+        top2 += label in ranked[:2]
+        if verbose and ranked[0] != label:
+            print(f"  {name:>8} {label:>15} → {ranked[0]:<15} {query}")
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query, _ in labelled:
+            fn(query)
+    us = (time.perf_counter() - start) / (repeat * len(labelled)) * 1e6
+    return top1 / len(labelled), top2 / len(labelled), us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=QUERIES)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--verbose", action="store_true", help="list misrouted queries")
+    args = parser.parse_args()
+
+    labelled = load(args.queries)
+    results = {name: evaluate(name, fn, labelled, args.repeat, args.verbose)
+               for name, fn in (("cascade", cascade), ("router", router))}
+    print(f"{len(labelled)} labelled queries")
+    print(f"{'engine':>8} {'top-1':>7} {'top-2':>7} {'us/query':>9}")
+    for name, (top1, top2, us) in results.items():
+        print(f"{name:>8} {top1:7.1%} {top2:7.1%} {us:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
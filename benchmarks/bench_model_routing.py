@@ -0,0 +1,99 @@
+"""Labelled queries through the model router against the mock Groq API, with a slower large model.
+
+    python benchmarks/bench_model_routing.py --fast-ms 200 --large-ms 900 --verbose
+
+Every query in intent_queries.csv is answered three ways: all on the fast
+model, all on the large model, and `routed` (model_router.ModelRouter picks
+per query). The mock answers the large model after --large-ms and the fast
+one after --fast-ms, and counts the calls each model received. Per mode:
+calls per tier, p50 / p99 latency, tokens and their cost at --price-fast /
+--price-large dollars per million tokens.
+"""
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from groq import Groq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import complete
+from mock_groq import MockGroq
+from model_router import DEFAULT_FAST, ModelRouter
+from prompts import get_prompt
+
+LARGE = "llama-3.3-70b-versatile"
+QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_queries.csv")
+
+
+def load_queries(path=QUERIES):
+    with open(path, newline="") as f:
+        return [row["query"] for row in csv.DictReader(f)]
+
+
+def run(mode, queries, args):
+    mock = MockGroq(delay_ms={DEFAULT_FAST: args.fast_ms, LARGE: args.large_ms}).start()
+    client = Groq(api_key="test", base_url=mock.url, max_retries=0)
+    if mode == "routed":
+        router = ModelRouter(large=LARGE, threshold=args.threshold)
+    else:
+        # A threshold nothing reaches keeps every query on the fast model; 0 sends them all to the large one
+        router = ModelRouter(large=LARGE, threshold=float("inf") if mode == "fast" else 0)
+    system = get_prompt().text
+
+    def ask(query):
+        choice = router.choose(query)
+        metrics = {}
+        complete(client, [{"role": "system", "content": system}, {"role": "user", "content": query}],
+                 model=choice.model, metrics=metrics)
+        return choice, metrics
+
+    with ThreadPoolExecutor(args.workers) as pool:
+        results = list(pool.map(ask, queries))
+    mock.stop()
+
+    prices = {"fast": args.price_fast, "large": args.price_large}
+    latencies = [metrics["total"] for _, metrics in results]
+    tokens = {"fast": 0, "large": 0}
+    for choice, metrics in results:
+        tokens[choice.tier] += metrics.get("usage_prompt_tokens", 0) + metrics.get("usage_completion_tokens", 0)
+    return {
+        "fast": mock.models[DEFAULT_FAST],
+        "large": mock.models[LARGE],
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "tokens": sum(tokens.values()),
+        "cost": sum(tokens[tier] * prices[tier] / 1e6 for tier in tokens),
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fast-ms", type=float, default=200)
+    parser.add_argument("--large-ms", type=float, default=900)
+    parser.add_argument("--threshold", type=float, default=None, help="complexity score for the large model")
+    parser.add_argument("--price-fast", type=float, default=0.06, help="$ per million tokens")
+    parser.add_argument("--price-large", type=float, default=0.70, help="$ per million tokens")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--verbose", action="store_true", help="print the tier and signals of every routed query")
+    args = parser.parse_args()
+    if args.threshold is None:
+        args.threshold = ModelRouter().threshold
+
+    queries = load_queries()
+    print(f"{len(queries)} queries, fast {args.fast_ms:g} ms / large {args.large_ms:g} ms, threshold {args.threshold:g}")
+    print(f"{'mode':>7} {'fast':>5} {'large':>6} {'p50 s':>7} {'p99 s':>7} {'tokens':>7} {'cost $':>8}")
+    for mode in ("fast", "large", "routed"):
+        r = run(mode, queries, args)
+        print(f"{mode:>7} {r['fast']:>5} {r['large']:>6} {r['p50']:7.2f} {r['p99']:7.2f} {r['tokens']:>7} {r['cost']:8.4f}")
+        if mode == "routed" and args.verbose:
+            for query, (choice, _) in zip(queries, r["results"]):
+                print(f"  {choice.tier:>5} {choice.score:>3g} {','.join(sorted(choice.signals)) or '-':<28} {query}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""app.py proxy throughput, latency and memory against a local stand-in upstream.
+
+    python benchmarks/bench_proxy.py --seconds 10 --clients 16
+
+Each engine runs in its own process behind werkzeug's threaded server; the
+upstream adds --handshake-ms to every new connection to stand in for the
+TCP + TLS setup to a remote TARGET_URL. `baseline` is the original proxy
+(fresh connection and fully buffered body per request).
+"""
+import argparse
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# path → body size; small API-style hits, a hashed JS bundle and a large media file
+PATHS = {"small": 4 * 1024, "bundle.js": 512 * 1024, "large.bin": 16 * 1024 * 1024}
+
+
+# -------------------------------
+# STAND-IN UPSTREAM
+# -------------------------------
+def run_upstream(port, handshake_ms):
+    bodies = {f"/{path}": os.urandom(size) for path, size in PATHS.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            time.sleep(handshake_ms / 1000)
+            super().setup()
+            # Like Tornado (Streamlit's server): no Nagle stalls between header and body writes
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def do_GET(self):
+            body = bodies.get(self.path.split("?")[0])
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for i in range(0, len(body), 256 * 1024):
+                self.wfile.write(body[i:i + 256 * 1024])
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+# -------------------------------
+# PROXY ENGINES
+# -------------------------------
+def baseline_app(target):
+    """app.py as originally written"""
+    from flask import Flask, request, Response
+
+    app = Flask(__name__)
+
+    @app.route("/", defaults={"path": ""})
+    @app.route("/<path:path>")
+    def proxy(path):
+        url = f"{target}/{path}"
+        headers = {key: value for key, value in request.headers if key != 'Host'}
+        resp = requests.request(
+            method=request.method,
+            url=url,
+            headers=headers,
+            data=request.get_data(),
+            cookies=request.cookies,
+            allow_redirects=False
+        )
+        excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
+        response_headers = [(name, value) for (name, value) in resp.raw.headers.items() if name.lower() not in excluded_headers]
+        return Response(resp.content, resp.status_code, response_headers)
+
+    return app
+
+
+def run_proxy(engine, port, target):
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    if engine == "baseline":
+        app = baseline_app(target)
+    else:
+        os.environ["TARGET_URL"] = target
+        from app import app
+    make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+# -------------------------------
+# LOAD
+# -------------------------------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"nothing listening on {port}")
+
+
+def peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def load(port, path, clients, seconds):
+    latencies = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def client():
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            resp = session.get(f"http://127.0.0.1:{port}/{path}", stream=True)
+            for _ in resp.iter_content(256 * 1024):
+                pass
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", default=["baseline", "pooled"])
+    parser.add_argument("--paths", nargs="+", default=list(PATHS))
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--handshake-ms", type=float, default=20)
+    parser.add_argument("--role", choices=["upstream", "proxy"], help=argparse.SUPPRESS)
+    parser.add_argument("--engine", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--target", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.role == "upstream":
+        return run_upstream(args.port, args.handshake_ms)
+    if args.role == "proxy":
+        return run_proxy(args.engine, args.port, args.target)
+
+    upstream_port = free_port()
+    upstream = subprocess.Popen([sys.executable, __file__, "--role", "upstream", "--port", str(upstream_port),
+                                 "--handshake-ms", str(args.handshake_ms)])
+    try:
+        wait_for(upstream_port)
+        print(f"{'engine':>9} {'path':>10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'peak RSS MB':>11}")
+        for engine in args.engines:
+            for path in args.paths:
+                # Fresh proxy per path so peak RSS reflects that payload size
+                port = free_port()
+                proxy = subprocess.Popen([sys.executable, __file__, "--role", "proxy", "--engine", engine,
+                                          "--port", str(port), "--target", f"http://127.0.0.1:{upstream_port}"])
+                try:
+                    wait_for(port)
+                    rps, p50, p99 = load(port, path, args.clients, args.seconds)
+                    print(f"{engine:>9} {path:>10} {rps:8.1f} {p50:8.1f} {p99:8.1f} {peak_rss_mb(proxy.pid):11.1f}")
+                finally:
+                    proxy.terminate()
+                    proxy.wait()
+    finally:
+        upstream.terminate()
+        upstream.wait()
+
+
+if __name__ == "__main__":
+    main()
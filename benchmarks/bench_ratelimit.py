@@ -0,0 +1,97 @@
+"""Bursts of chat turns against a rate-limited mock Groq API, with and without the shared limiter.
+
+    python benchmarks/bench_ratelimit.py --sessions 30 --limit 10 --window 5
+
+Every session sends one question at the same moment, like a room clicking a
+preset. `direct` is the old behaviour (no retries, a 429 drops the question),
+`sdk` leaves retries to the Groq SDK's defaults (2 per request, per session),
+`limiter` sends everything through one ratelimit.RateLimiter sized to the
+mock's limit. Answered / failed / turned away, the 429s the server sent and
+end-to-end latency are reported per mode.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from groq import Groq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import complete, stream
+from mock_groq import MockGroq
+from ratelimit import QueueFull, RateLimiter, is_rate_limited
+
+QUESTION = "Determine which formats delivered the highest ROI."
+
+
+def run(mode, args):
+    mock = MockGroq(limit=args.limit, window=args.window, delay_ms=args.delay_ms).start()
+    client = Groq(api_key="test", base_url=mock.url, max_retries=2 if mode == "sdk" else 0)
+    limiter = None
+    if mode == "limiter":
+        limiter = RateLimiter(args.limit * 60 / args.window, 0, max_queue=args.queue, max_retries=args.retries,
+                              burst=args.window)
+    outcomes, latencies = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.sessions)
+
+    def session(i):
+        messages = [{"role": "system", "content": "You are a media analyst."}, {"role": "user", "content": f"{QUESTION} ({i})"}]
+        barrier.wait()
+        start = time.perf_counter()
+        try:
+            if args.stream:
+                "".join(stream(client, messages, limiter=limiter))
+            else:
+                complete(client, messages, limiter=limiter)
+            outcome = "answered"
+        except QueueFull:
+            outcome = "turned away"
+        except Exception as e:
+            outcome = "rate limited" if is_rate_limited(e) else f"error: {type(e).__name__}"
+        with lock:
+            outcomes.append(outcome)
+            if outcome == "answered":
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    mock.stop()
+    return {
+        "answered": outcomes.count("answered"),
+        "failed": sum(o not in ("answered", "turned away") for o in outcomes),
+        "turned_away": outcomes.count("turned away"),
+        "upstream_429": mock.throttled,
+        "p50": float(np.percentile(latencies, 50)) if latencies else float("nan"),
+        "p99": float(np.percentile(latencies, 99)) if latencies else float("nan")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=10, help="mock requests per window")
+    parser.add_argument("--window", type=float, default=5.0, help="mock rate-limit window in seconds")
+    parser.add_argument("--delay-ms", type=float, default=300)
+    parser.add_argument("--queue", type=int, default=50)
+    parser.add_argument("--retries", type=int, default=4)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--modes", nargs="+", default=["direct", "sdk", "limiter"])
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions at once, mock limit {args.limit} / {args.window:g}s")
+    print(f"{'mode':>8} {'answered':>9} {'failed':>7} {'away':>5} {'429s':>5} {'p50 s':>7} {'p99 s':>7}")
+    for mode in args.modes:
+        r = run(mode, args)
+        print(f"{mode:>8} {r['answered']:>9} {r['failed']:>7} {r['turned_away']:>5} {r['upstream_429']:>5} "
+              f"{r['p50']:7.2f} {r['p99']:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Wall time and allocations per Streamlit rerun of chat1.py, driven by AppTest.
+
+    python benchmarks/bench_rerun.py --reruns 20 --history 0 20 100
+
+The first run (data load, cube, client) is reported separately from the warm
+reruns that every widget interaction triggers. --history pre-fills the chat
+with that many question / answer turns; no Groq calls are made. To compare
+with an older revision, check it out to a file in the repo root and pass it
+with --script.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ANSWER = (
+    "**Executive Summary** Home Loans underleverage Search by 60% despite a 1.4x ROAS multiplier.\n\n"
+    + "**Performance Insight** First-home buyers compare rates on Search; TVNZ builds trust for refinancers. " * 12
+    + "\n\n- Shift 15% of TVNZ spend to Search Carousel in weeks 1-12.\n- Keep TVNZ for 35-44 refinancers."
+)
+
+
+def history(turns):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Which formats delivered the highest ROI in week {i + 1}?"})
+        messages.append({"role": "assistant", "content": ANSWER})
+    return messages
+
+
+def timed_run(app):
+    start = time.perf_counter()
+    app.run()
+    return time.perf_counter() - start
+
+
+def peak_alloc(app):
+    """Peak bytes allocated during one rerun (timed separately: tracing slows the run)"""
+    tracemalloc.start()
+    try:
+        app.run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", default=os.path.join(ROOT, "chat1.py"))
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 20, 100], help="pre-filled turns")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args(argv)
+
+    from streamlit.testing.v1 import AppTest
+
+    os.environ.setdefault("GROQ_API_KEY", "bench-not-used")
+    os.environ.setdefault("RESPONSE_CACHE_PATH", "")
+    print(f"{'turns':>6} {'first ms':>9} {'rerun p50 ms':>13} {'rerun p99 ms':>13} {'peak alloc MB':>14} {'elements':>9}")
+    for turns in args.history:
+        app = AppTest.from_file(args.script, default_timeout=args.timeout)
+        app.session_state["chat_history"] = [{"role": "system", "content": ""}] + history(turns)
+        app.session_state["chat_started"] = turns > 0
+        first = timed_run(app)
+        if app.exception:
+            raise SystemExit(f"script raised: {app.exception[0].message}")
+        times = [timed_run(app) * 1000 for _ in range(args.reruns)]
+        peaks = [peak_alloc(app) for _ in range(3)]
+        elements = sum(1 for _ in app.main) + sum(1 for _ in app.sidebar)
+        print(f"{turns:>6} {first * 1000:9.1f} {np.percentile(times, 50):13.1f} {np.percentile(times, 99):13.1f} "
+              f"{np.median(peaks) / 1e6:14.2f} {elements:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Per-column memory and groupby timings for raw vs compact campaign frames.
+
+    DATAGEN_CAMPAIGNS=600 DATAGEN_ROWS_PER_WEEK=20 python benchmarks/bench_schema.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import load_config, load_dataset
+from schema import memory_report
+
+GROUPBYS = [
+    ("Publisher", {"ROAS": "mean", "Spend ($)": "sum", "Revenue ($)": "sum"}),
+    ("Format", {"ROAS": "mean", "CPA ($)": "mean", "Revenue ($)": "sum"}),
+    ("Audience Segment (Demographic)", {"ROAS": "mean", "CPA ($)": "mean"}),
+    ("Campaign", {"Conversions": "sum", "Spend ($)": "sum"})
+]
+
+
+def time_groupbys(df, repeat):
+    timings = {}
+    for key, agg in GROUPBYS:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            df.groupby(key, observed=True).agg(agg)
+            best = min(best, time.perf_counter() - start)
+        timings[key] = best
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config = load_config()
+    raw = load_dataset(config)
+    compact = load_dataset(config, compact=True)
+
+    print(f"rows: {len(raw):,}")
+    print(memory_report(raw, compact).to_string())
+    print()
+
+    raw_times = time_groupbys(raw, args.repeat)
+    compact_times = time_groupbys(compact, args.repeat)
+    print(f"{'groupby key':<32} {'raw ms':>9} {'compact ms':>11} {'speed-up':>9}")
+    for key, _ in GROUPBYS:
+        r, c = raw_times[key] * 1000, compact_times[key] * 1000
+        print(f"{key:<32} {r:>9.2f} {c:>11.2f} {r / c:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
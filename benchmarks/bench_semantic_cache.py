@@ -0,0 +1,122 @@
+"""Semantic cache precision / recall per similarity threshold on labelled paraphrases.
+
+    python benchmarks/bench_semantic_cache.py --thresholds 0.5 0.6 0.7 0.8
+
+Each probe is matched against the preset questions; `expected` is the preset it
+should be answered from, or None when a fresh LLM answer is required.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_cache import ResponseCache, cache_key
+from semantic_cache import SemanticCache
+
+PRESETS = [
+    "💰 Recommend optimal channel mixes for $100M, $200M, and $300M investment levels.",
+    "📊 Determine which formats delivered the highest ROI.",
+    "🎯 Evaluate channels & publishers with the strongest click-to-conversion rates.",
+    "📉 Highlight months with the highest churn and distinguish internal vs. external drivers.",
+    "🎥 Is Video or Static driving higher engagement?",
+    "👥 Which audience segment is underperforming?",
+    "📱 What's driving ROAS on Social vs Display?"
+]
+
+# (probe, index of the preset it may reuse or None)
+PROBES = [
+    ("best format ROI", 1),
+    ("which formats delivered highest ROI?", 1),
+    ("Which ad formats have the top return?", 1),
+    ("what format gives the best ROAS", 1),
+    ("channel mix for $100M, $200M and $300M budgets", 0),
+    ("optimal channel mix at $100M $200M $300M investment", 0),
+    ("which channels and publishers have the best click to conversion rate", 2),
+    ("strongest click-to-conversion by publisher", 2),
+    ("months with highest churn and the internal vs external drivers", 3),
+    ("video vs static engagement", 4),
+    ("is static or video getting more engagement", 4),
+    ("underperforming audience segments", 5),
+    ("which demographic is weakest", 5),
+    ("ROAS drivers social vs display", 6),
+    ("what drives ROAS for social compared with display", 6),
+    # Must not reuse a cached answer
+    ("channel mix for $50M", None),
+    ("which formats delivered the lowest ROI?", None),
+    ("what is the CPA by format", None),
+    ("which campaign had the highest spend in week 12", None),
+    ("how did KiwiSaver perform on TikTok", None),
+    ("is Carousel or Interactive driving higher engagement?", None),
+    ("which audience segment is outperforming?", None),
+    ("what's driving CPA on Search vs YouTube?", None),
+    ("summarise Home Loans performance", None),
+    ("which months had the lowest spend", None),
+]
+
+
+def evaluate(threshold, audit_path):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, "responses.sqlite3"))
+        for i, question in enumerate(PRESETS):
+            cache.put(cache_key("m", "p", question, "v"), f"answer {i}", question=question, scope="s")
+        semantic = SemanticCache(cache, threshold, audit_path)
+
+        tp = fp = fn = tn = 0
+        timings = []
+        for probe, expected in PROBES:
+            start = time.perf_counter()
+            response, match = semantic.lookup("s", probe)
+            timings.append(time.perf_counter() - start)
+            got = int(response.split()[-1]) if response else None
+            if got is not None and got == expected:
+                tp += 1
+            elif got is not None:
+                fp += 1
+                semantic.audit("false_hit", probe, match)
+            elif expected is not None:
+                fn += 1
+            else:
+                tn += 1
+        return {
+            "threshold": threshold,
+            "precision": tp / max(1, tp + fp),
+            "recall": tp / max(1, tp + fn),
+            "false_hits": fp,
+            "hit_rate": (tp + fp) / len(PROBES),
+            "lookup_ms_p50": float(np.median(timings)) * 1000
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.65, 0.7, 0.75, 0.8, 0.9])
+    parser.add_argument("--audit", default="", help="write lookups to this audit log (default: none)")
+    parser.add_argument("--verbose", action="store_true", help="print the best match for every probe")
+    args = parser.parse_args(argv)
+
+    if args.verbose:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(os.path.join(tmp, "responses.sqlite3"))
+            for question in PRESETS:
+                cache.put(cache_key("m", "p", question, "v"), question, question=question, scope="s")
+            semantic = SemanticCache(cache, threshold=2.0, audit_path="")
+            for probe, expected in PROBES:
+                _, match = semantic.lookup("s", probe)
+                print(f"{match['similarity'] if match else 0:5.2f}  {'=' if expected is not None else 'x'}  "
+                      f"{probe!r} -> {match['question'] if match else None!r}")
+            print()
+
+    print(f"{'threshold':>9} {'precision':>9} {'recall':>6} {'false hits':>10} {'hit rate':>8} {'lookup ms':>9}")
+    for threshold in args.thresholds:
+        r = evaluate(threshold, args.audit)
+        print(f"{r['threshold']:9.2f} {r['precision']:9.2f} {r['recall']:6.2f} {r['false_hits']:10d} "
+              f"{r['hit_rate']:8.2f} {r['lookup_ms_p50']:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""WebSocket pass-through in app.py: hundreds of concurrent sockets plus a backpressure check.
+
+    pip install websockets   # client / stand-in upstream only
+    python benchmarks/bench_websocket.py --sockets 300 --messages 20
+
+The stand-in upstream echoes every message on /_stcore/stream and drains
+/slow at a fixed rate; the proxy runs behind werkzeug's threaded server.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from bench_proxy import free_port, peak_rss_mb, wait_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# -------------------------------
+# STAND-IN UPSTREAM
+# -------------------------------
+async def serve_upstream(port, slow_bytes_per_s):
+    import websockets
+
+    async def handler(ws):
+        if ws.request.path.startswith("/slow"):
+            # Drain slowly and report how much arrived; the sender must be throttled, not buffered
+            received = 0
+            async for message in ws:
+                received += len(message)
+                await asyncio.sleep(len(message) / slow_bytes_per_s)
+            return
+        async for message in ws:
+            await ws.send(message)
+
+    async with websockets.serve(handler, "127.0.0.1", port, max_size=None, compression=None):
+        await asyncio.Future()
+
+
+def run_proxy(port, target):
+    import logging
+
+    from werkzeug import serving
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    serving.BaseWSGIServer.request_queue_size = 4096
+    os.environ["TARGET_URL"] = target
+    from app import app
+    serving.make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+# -------------------------------
+# CLIENTS
+# -------------------------------
+async def session(url, messages, size, connect_times, rtts):
+    import websockets
+
+    payload = os.urandom(size)
+    start = time.perf_counter()
+    async with websockets.connect(url, max_size=None, compression=None, open_timeout=60) as ws:
+        connect_times.append(time.perf_counter() - start)
+        for _ in range(messages):
+            sent = time.perf_counter()
+            await ws.send(payload)
+            if await ws.recv() != payload:
+                raise AssertionError("echo mismatch")
+            rtts.append(time.perf_counter() - sent)
+
+
+async def concurrency_test(port, sockets, messages, size):
+    connect_times, rtts = [], []
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(session(url, messages, size, connect_times, rtts) for _ in range(sockets)), return_exceptions=True
+    )
+    elapsed = time.perf_counter() - start
+    failures = [r for r in results if isinstance(r, Exception)]
+    return {
+        "sockets": sockets,
+        "failed": len(failures),
+        "first error": repr(failures[0]) if failures else "",
+        "messages/s": round(len(rtts) / elapsed, 1),
+        "connect p50 ms": round(np.percentile(connect_times, 50) * 1000, 1) if connect_times else None,
+        "connect p99 ms": round(np.percentile(connect_times, 99) * 1000, 1) if connect_times else None,
+        "echo p50 ms": round(np.percentile(rtts, 50) * 1000, 2) if rtts else None,
+        "echo p99 ms": round(np.percentile(rtts, 99) * 1000, 2) if rtts else None
+    }
+
+
+async def backpressure_test(port, total_mb, seconds):
+    """Push as fast as possible into a slow consumer for `seconds`; return MB accepted"""
+    import websockets
+
+    chunk = os.urandom(256 * 1024)
+    sent = 0
+    async with websockets.connect(f"ws://127.0.0.1:{port}/slow", max_size=None, compression=None) as ws:
+        deadline = time.perf_counter() + seconds
+        while sent < total_mb * 1024 * 1024 and time.perf_counter() < deadline:
+            try:
+                await asyncio.wait_for(ws.send(chunk), timeout=max(0.01, deadline - time.perf_counter()))
+            except asyncio.TimeoutError:
+                break
+            sent += len(chunk)
+    return sent / 1024 / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sockets", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--size", type=int, default=1024, help="bytes per echo message")
+    parser.add_argument("--slow-mb-per-s", type=float, default=2, help="drain rate of the slow consumer")
+    parser.add_argument("--push-seconds", type=float, default=5)
+    parser.add_argument("--role", choices=["upstream", "proxy"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--target", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.role == "upstream":
+        return asyncio.run(serve_upstream(args.port, args.slow_mb_per_s * 1024 * 1024))
+    if args.role == "proxy":
+        return run_proxy(args.port, args.target)
+
+    upstream_port, proxy_port = free_port(), free_port()
+    upstream = subprocess.Popen([sys.executable, __file__, "--role", "upstream", "--port", str(upstream_port),
+                                 "--slow-mb-per-s", str(args.slow_mb_per_s)])
+    proxy = subprocess.Popen([sys.executable, __file__, "--role", "proxy", "--port", str(proxy_port),
+                              "--target", f"http://127.0.0.1:{upstream_port}"])
+    try:
+        wait_for(upstream_port)
+        wait_for(proxy_port)
+        for name, value in asyncio.run(concurrency_test(proxy_port, args.sockets, args.messages, args.size)).items():
+            print(f"{name:>16}: {value}")
+        print(f"{'proxy peak RSS':>16}: {peak_rss_mb(proxy.pid):.1f} MB")
+
+        rss_before = peak_rss_mb(proxy.pid)
+        pushed = asyncio.run(backpressure_test(proxy_port, 1024, args.push_seconds))
+        print(f"\nslow consumer at {args.slow_mb_per_s} MB/s for {args.push_seconds}s:")
+        print(f"{'accepted':>16}: {pushed:.1f} MB (unthrottled would be far more)")
+        print(f"{'proxy RSS growth':>16}: {peak_rss_mb(proxy.pid) - rss_before:.1f} MB")
+    finally:
+        for process in (proxy, upstream):
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
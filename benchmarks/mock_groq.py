@@ -0,0 +1,189 @@
+"""Local stand-in for Groq's chat completions API, with its own rate limit.
+
+    python benchmarks/mock_groq.py --port 8900 --limit 10 --window 5
+    GROQ_BASE_URL=http://127.0.0.1:8900 GROQ_API_KEY=test streamlit run chat1.py
+
+Answers POST /openai/v1/chat/completions after --delay-ms, blocking or as an
+SSE stream (usage on the final chunk under `x_groq`, as Groq sends it).
+More than --limit requests in a --window second window get a 429 with a
+Retry-After header and Groq's error body. The benchmarks import MockGroq
+and read its counters.
+"""
+import argparse
+import json
+import math
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = ("Executive Summary: Video outperformed Static on CTR (2.4% vs 1.6%) and Meta led ROAS at 4.1x. "
+          "Recommendation: shift 10% of Display spend into Social video.")
+CHUNK_WORDS = 4  # words per streamed delta
+
+
+def _tokens(text):
+    return max(1, math.ceil(len(text) / 4))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # a whole burst of sessions connects at once
+
+
+class MockGroq:
+    """Threaded mock server; `limit` requests per `window` seconds (0 = unlimited)
+
+    `delay_ms` may also be a dict of model → delay, so slower "large" models
+    can be told apart from fast ones.
+    """
+
+    def __init__(self, port=0, limit=0, window=60.0, delay_ms=200, answer=ANSWER):
+        self.limit = limit
+        self.window = window
+        self.delay_ms = delay_ms
+        self.answer = answer
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.requests = 0
+        self.throttled = 0
+        self.prompts = Counter()  # last user message → upstream calls
+        self.models = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = _Server(("127.0.0.1", port), self._handler())
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _admit(self):
+        """None if the request may proceed, else seconds until the window resets"""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= self.window:
+                self.window_start, self.window_count = now, 0
+            if self.limit and self.window_count >= self.limit:
+                self.throttled += 1
+                return self.window - (now - self.window_start)
+            self.window_count += 1
+            self.requests += 1
+            return None
+
+    def _delay(self, model):
+        delay = self.delay_ms.get(model, 0) if isinstance(self.delay_ms, dict) else self.delay_ms
+        return delay / 1000
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _json(self, status, payload, headers=()):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._json(404, {"error": {"message": "not found"}})
+                    return
+                wait = mock._admit()
+                if wait is not None:
+                    self._json(429, {"error": {
+                        "message": f"Rate limit reached for model `{request.get('model')}`. Please try again in {wait:.1f}s.",
+                        "type": "requests", "code": "rate_limit_exceeded"
+                    }}, [("retry-after", str(max(1, math.ceil(wait))))])
+                    return
+                model = request.get("model", "")
+                messages = request.get("messages", [])
+                question = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+                with mock.lock:
+                    mock.prompts[question] += 1
+                    mock.models[model] += 1
+                    mock.in_flight += 1
+                    mock.max_in_flight = max(mock.max_in_flight, mock.in_flight)
+                try:
+                    usage = {"prompt_tokens": sum(_tokens(m.get("content") or "") + 4 for m in messages),
+                             "completion_tokens": _tokens(mock.answer)}
+                    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                    if request.get("stream"):
+                        self._stream(model, usage)
+                    else:
+                        time.sleep(mock._delay(model))
+                        self._json(200, {
+                            "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()),
+                            "model": model, "usage": usage,
+                            "choices": [{"index": 0, "finish_reason": "stop",
+                                         "message": {"role": "assistant", "content": mock.answer}}]
+                        })
+                finally:
+                    with mock.lock:
+                        mock.in_flight -= 1
+
+            def _stream(self, model, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                words = mock.answer.split(" ")
+                pieces = [" ".join(words[i:i + CHUNK_WORDS]) + " " for i in range(0, len(words), CHUNK_WORDS)]
+                # Half the delay before the first token, the rest spread over the deltas
+                time.sleep(mock._delay(model) / 2)
+                base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion.chunk",
+                        "created": int(time.time()), "model": model}
+                for i, piece in enumerate(pieces):
+                    self._event({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+                    time.sleep(mock._delay(model) / 2 / len(pieces))
+                self._event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                             "x_groq": {"id": base["id"], "usage": usage}})
+                self._chunk(b"data: [DONE]\n\n")
+                self._chunk(b"")
+
+            def _event(self, payload):
+                self._chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+            def _chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--limit", type=int, default=10, help="requests per window (0 = unlimited)")
+    parser.add_argument("--window", type=float, default=5.0, help="seconds")
+    parser.add_argument("--delay-ms", type=float, default=800)
+    args = parser.parse_args()
+    mock = MockGroq(args.port, args.limit, args.window, args.delay_ms).start()
+    print(f"mock Groq API on {mock.url} ({args.limit or 'unlimited'} requests / {args.window:g}s)")
+    try:
+        while True:
+            time.sleep(args.window)
+            print(f"served {mock.requests}, throttled {mock.throttled}")
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
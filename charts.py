@@ -0,0 +1,205 @@
+import altair as alt
+
+from cube import get_cube
+from intent import MAX_CHARTS, rank_intents, route
+from schema import add_derived_columns
+
+# -------------------------------
+# DERIVED COLUMNS
+# -------------------------------
+# Publisher → channel; one table shared by the Channel and Social/Display keys
+PUBLISHER_CHANNELS = {
+    'Meta': 'Social',
+    'TikTok': 'Social',
+    'LinkedIn': 'Social',
+    'NZ Herald': 'Display',
+    'TVNZ': 'Display',
+    'Search': 'Search',
+    'YouTube': 'Video'
+}
+
+# Channel → Social/Display comparison group
+CHANNEL_TYPES = {
+    'Social': 'Social',
+    'Display': 'Display'
+}
+
+
+def week_to_month(week):
+    return ((week - 1) // 4) + 1
+
+
+# name → (source column, function or lookup table); categorical sources are remapped
+# once per category, in order, so later keys can build on earlier ones
+DERIVED_COLUMNS = {
+    'Month': ('Week', week_to_month),
+    'Channel': ('Publisher', PUBLISHER_CHANNELS),
+    'Channel Type': ('Channel', CHANNEL_TYPES)
+}
+
+
+def prepare_chart_frame(df):
+    """Add the derived chart keys to df in place and build its aggregate cube"""
+    add_derived_columns(df, DERIVED_COLUMNS)
+    get_cube(df)
+    return df
+
+
+# -------------------------------
+# CHART ROUTING
+# -------------------------------
+# Questions are routed to intents by intent.py; ties and no-match fall back to intent.DEFAULT_INTENT
+# intent → (group by, {measure: agg}, where, sort by, top n): the cube rollup behind each chart
+CHART_DATA = {
+    'channel_mix': ('Channel', {'ROAS': 'mean', 'Spend ($)': 'sum', 'Revenue ($)': 'sum'}, None, 'ROAS', 10),
+    'format_roi': ('Format', {'ROAS': 'mean', 'CPA ($)': 'mean', 'Revenue ($)': 'sum'}, None, 'ROAS', None),
+    'conversion': ('Channel', {'Conversion Rate (%)': 'mean', 'CTR (%)': 'mean', 'Conversions': 'sum'},
+                   None, 'Conversion Rate (%)', 10),
+    'churn': ('Month', {'Conversions': 'sum', 'Spend ($)': 'sum', 'ROAS': 'mean', 'CPA ($)': 'mean'}, None, None, None),
+    'engagement': ('Format', {'CTR (%)': 'mean', 'Time on Site (min)': 'mean', 'Pages Per Session': 'mean',
+                              'Social Likes': 'sum', 'Social Shares': 'sum'},
+                   {'Format': ['Video', 'Static']}, None, None),
+    'audience': ('Audience Segment (Demographic)', {'ROAS': 'mean', 'CPA ($)': 'mean'}, None, None, None),
+    'social_display': ('Channel Type', {'ROAS': 'mean', 'CTR (%)': 'mean', 'Conversion Rate (%)': 'mean',
+                                        'Revenue ($)': 'sum'},
+                       {'Channel Type': ['Social', 'Display']}, None, None),
+    'channel_roas': ('Channel', {'ROAS': 'mean'}, None, 'ROAS', 10)
+}
+
+
+def chart_intent(user_query):
+    """Which chart a question asks for (the top-ranked intent)"""
+    return rank_intents(user_query)[0][0]
+
+
+def chart_data(intent, cube):
+    """The aggregated rows an intent's chart plots"""
+    by, agg, where, sort_by, top = CHART_DATA[intent]
+    data = cube.rollup(by, agg, where=where)
+    if sort_by:
+        data = data.sort_values(sort_by, ascending=False)
+    if top:
+        data = data.head(top)
+    if intent == 'churn':
+        # Calculate churn proxy (inverse of conversions normalized)
+        data['Churn Index'] = 100 - (data['Conversions'] / data['Conversions'].max() * 100)
+    return data
+
+
+# -------------------------------
+# DYNAMIC CHART GENERATION
+# -------------------------------
+def generate_dynamic_chart(user_query, df):
+    """Generate a chart based on what the user is asking about"""
+    intent = chart_intent(user_query)
+    # Aggregates come from the cube built once per data version, not from df
+    return build_chart(intent, chart_data(intent, get_cube(df)))
+
+
+def generate_charts(user_query, df, max_charts=MAX_CHARTS):
+    """One chart per routed intent, best match first
+
+    A question that spans two topics ("ROI by format and audience
+    segment") gets a chart for each; most questions get one.
+    """
+    cube = get_cube(df)
+    return [build_chart(intent, chart_data(intent, cube)) for intent in route(user_query, max_charts=max_charts)]
+
+
+def build_chart(intent, data):
+    """The Altair chart for an intent, drawn from its chart_data() rows"""
+    # Channel mix / investment / budget allocation questions
+    if intent == 'channel_mix':
+        chart = alt.Chart(data).mark_bar(color='#8b5cf6').encode(
+            x=alt.X('Channel:N', sort='-y'),
+            y=alt.Y('ROAS:Q', title='Average ROAS'),
+            tooltip=['Channel', alt.Tooltip('ROAS:Q', format='.2f'), alt.Tooltip('Spend ($):Q', format='$,.0f')]
+        ).properties(width=800, height=400, title='Channel Performance by ROAS').interactive()
+        
+        return chart
+    
+    # ROI and CPA by format
+    elif intent == 'format_roi':
+        base = alt.Chart(data).encode(x='Format:N')
+        
+        roas_chart = base.mark_bar(color='#10b981').encode(
+            y=alt.Y('ROAS:Q', title='Average ROAS'),
+            tooltip=['Format', alt.Tooltip('ROAS:Q', format='.2f'), alt.Tooltip('CPA ($):Q', format='$,.2f')]
+        )
+        
+        cpa_line = base.mark_line(point=True, color='#ef4444', size=3).encode(
+            y=alt.Y('CPA ($):Q', title='CPA ($)', axis=alt.Axis(orient='right')),
+            tooltip=['Format', alt.Tooltip('CPA ($):Q', format='$,.2f')]
+        )
+        
+        return alt.layer(roas_chart, cpa_line).resolve_scale(y='independent').properties(
+            width=800, height=400, title='Format Performance: ROAS vs CPA'
+        ).interactive()
+    
+    # Click-to-conversion rates by channel/publisher
+    elif intent == 'conversion':
+        chart = alt.Chart(data).mark_bar(color='#3b82f6').encode(
+            x=alt.X('Channel:N', sort='-y'),
+            y=alt.Y('Conversion Rate (%):Q', title='Conversion Rate (%)'),
+            tooltip=['Channel', alt.Tooltip('Conversion Rate (%):Q', format='.2f'), alt.Tooltip('CTR (%):Q', format='.2f')]
+        ).properties(width=800, height=400, title='Channels by Conversion Rate').interactive()
+        
+        return chart
+    
+    # Churn analysis by month
+    elif intent == 'churn':
+        chart = alt.Chart(data).mark_line(point=True, color='#ef4444', size=3).encode(
+            x=alt.X('Month:Q', title='Month'),
+            y=alt.Y('Churn Index:Q', title='Churn Index'),
+            tooltip=['Month', alt.Tooltip('Churn Index:Q', format='.1f'), alt.Tooltip('Conversions:Q', format=',.0f')]
+        ).properties(width=800, height=400, title='Churn Index by Month').interactive()
+        
+        return chart
+    
+    # Video vs Static engagement
+    elif intent == 'engagement':
+        chart = alt.Chart(data).mark_bar(color='#06b6d4').encode(
+            x='Format:N',
+            y=alt.Y('CTR (%):Q', title='Average CTR (%)'),
+            tooltip=['Format', alt.Tooltip('CTR (%):Q', format='.2f'), alt.Tooltip('Time on Site (min):Q', format='.1f')]
+        ).properties(width=800, height=400, title='Video vs Static: Engagement Metrics').interactive()
+        
+        return chart
+    
+    # Audience segment performance
+    elif intent == 'audience':
+        base = alt.Chart(data).encode(x='Audience Segment (Demographic):N')
+        
+        roas_chart = base.mark_bar(color='#00d4ff').encode(
+            y=alt.Y('ROAS:Q', title='ROAS'),
+            tooltip=['Audience Segment (Demographic)', alt.Tooltip('ROAS:Q', format='.2f')]
+        )
+        
+        cpa_line = base.mark_line(point=True, color='#ef4444', size=3).encode(
+            y=alt.Y('CPA ($):Q', title='CPA ($)', axis=alt.Axis(orient='right')),
+            tooltip=['Audience Segment (Demographic)', alt.Tooltip('CPA ($):Q', format='$,.2f')]
+        )
+        
+        return alt.layer(roas_chart, cpa_line).resolve_scale(y='independent').properties(
+            width=800, height=400, title='Audience Segment Performance'
+        ).interactive()
+    
+    # Social vs Display ROAS drivers
+    elif intent == 'social_display':
+        chart = alt.Chart(data).mark_bar(color='#ec4899').encode(
+            x='Channel Type:N',
+            y=alt.Y('ROAS:Q', title='Average ROAS'),
+            tooltip=['Channel Type', alt.Tooltip('ROAS:Q', format='.2f'), alt.Tooltip('CTR (%):Q', format='.2f')]
+        ).properties(width=800, height=400, title='Social vs Display: ROAS Comparison').interactive()
+        
+        return chart
+    
+    # Default fallback
+    else:
+        chart = alt.Chart(data).mark_bar(color='#00d4ff').encode(
+            x=alt.X('Channel:N', sort='-y'),
+            y=alt.Y('ROAS:Q', title='Average ROAS'),
+            tooltip=['Channel', alt.Tooltip('ROAS:Q', format='.2f')]
+        ).properties(width=800, height=400, title='Channel Performance by ROAS').interactive()
+        
+        return chart
@@ -0,0 +1,160 @@
+import re
+
+# -------------------------------
+# OUTPUT CLEANUP
+# -------------------------------
+PLACEHOLDER_MARKERS = ("[Insert Chart", "<Chart")
+PLACEHOLDER_CLOSERS = {"[": "]", "<": ">"}
+
+
+def _substitute(text):
+    # Remove [Insert Chart X: ...] patterns
+    text = re.sub(r'\[Insert Chart \d+:.*?\]', '', text, flags=re.DOTALL)
+    # Remove <Chart: ...> patterns
+    text = re.sub(r'<Chart:.*?>', '', text, flags=re.DOTALL)
+
+    # Clean up broken spacing in numbers/currency (fixes italics issue)
+    text = re.sub(r'(\d)([a-z])', r'\1 \2', text)  # "$285million" → "$285 million"
+    text = re.sub(r'(\w)\s{2,}(\w)', r'\1 \2', text)  # Multiple spaces → single
+    return text
+
+
+def _is_chart_line(line):
+    return line.strip().startswith(PLACEHOLDER_MARKERS)
+
+
+def clean_output(text):
+    """Remove formatting artifacts and chart placeholders from AI output"""
+    text = _substitute(text)
+
+    # Remove any lingering chart references
+    lines = text.split('\n')
+    cleaned_lines = [line for line in lines if not _is_chart_line(line)]
+    return '\n'.join(cleaned_lines).strip()
+
+
+class StreamCleaner:
+    """Incremental clean_output() for streamed completions
+
+    feed() buffers raw deltas and returns the cleaned text that can no longer
+    change: the tail is held back while it could still be part of a
+    placeholder, an undecided chart-reference line, a digit+unit pair or a
+    whitespace run. finish() flushes the rest. The concatenated output
+    matches clean_output() of the full text except in contrived overlaps of
+    those rules; `raw` keeps the full text so callers can store the
+    canonical clean_output() version.
+    """
+
+    def __init__(self):
+        self.raw = ""
+        self._pending = ""
+        self._at_line_start = True
+        self._line_dropped = False
+        self._lines_kept = False
+        self._started = False
+        self._trailing_ws = ""
+
+    def feed(self, delta):
+        self.raw += delta
+        self._pending += delta
+        cut = self._safe_cut(self._pending)
+        if cut <= 0:
+            return ""
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._emit(ready, final=False)
+
+    def finish(self):
+        ready, self._pending = self._pending, ""
+        return self._emit(ready, final=True)
+
+    def _emit(self, text, final):
+        # Same line filter as clean_output(), but a segment that continues the
+        # previous chunk's last line shares that line's keep/drop decision
+        pieces = []
+        for i, line in enumerate(_substitute(text).split('\n')):
+            if i == 0 and not self._at_line_start:
+                if not self._line_dropped:
+                    pieces.append(line)
+                continue
+            self._line_dropped = _is_chart_line(line)
+            if not self._line_dropped:
+                pieces.append(('\n' if self._lines_kept else '') + line)
+                self._lines_kept = True
+        # Cuts always fall between two non-space characters, so we never resume at a line start
+        self._at_line_start = False
+
+        text = ''.join(pieces)
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        if final:
+            body = text.rstrip()
+            return self._trailing_ws + body if body else ""
+
+        # Trailing whitespace is only emitted once something follows it (clean_output strips it)
+        text = self._trailing_ws + text
+        body = text.rstrip()
+        self._trailing_ws = text[len(body):]
+        return body
+
+    def _safe_cut(self, text):
+        """Largest index that splits `text` without straddling anything a rule could match"""
+        # Keep at least one character: the next delta may pair with it
+        cut = len(text) - 1
+
+        # Hold from just before the first placeholder that is unclosed or still forming
+        closed = []
+        i = 0
+        while i < len(text):
+            opener = text[i]
+            if opener in PLACEHOLDER_CLOSERS:
+                tail = text[i:]
+                if any(marker.startswith(tail) for marker in PLACEHOLDER_MARKERS):
+                    cut = min(cut, i - 1)
+                    break
+                marker = next((m for m in PLACEHOLDER_MARKERS if tail.startswith(m)), None)
+                if marker:
+                    close = text.find(PLACEHOLDER_CLOSERS[opener], i + len(marker))
+                    if close == -1 or close >= len(text) - 1:
+                        cut = min(cut, i - 1)
+                        break
+                    closed.append((i, close))
+                    i = close
+            i += 1
+
+        while cut > 0:
+            # Removing a placeholder joins its neighbours, so don't cut next to one either
+            inside = next((start for start, end in closed if start <= cut <= end + 1), None)
+            if inside is not None:
+                cut = inside - 1
+                continue
+            left, right = text[cut - 1], text[cut]
+            if left.isspace() or right.isspace() or (left.isdigit() and right.islower()):
+                cut -= 1
+                continue
+            if self._line_undecided(text[:cut]):
+                line_start = text.rfind('\n', 0, cut)
+                cut = line_start - 1 if line_start > 0 else cut - 1
+                continue
+            break
+        return max(cut, 0)
+
+    def _line_undecided(self, prefix):
+        """True if the last line of the cleaned prefix may still turn into a chart reference"""
+        processed = _substitute(prefix)
+        if '\n' not in processed and not self._at_line_start:
+            return False  # continues a line whose fate is already settled
+        head = processed.rsplit('\n', 1)[-1].lstrip()
+        return any(marker.startswith(head) and marker != head for marker in PLACEHOLDER_MARKERS)
+
+
+def clean_stream(deltas, cleaner=None):
+    """Yield cleaned text for a stream of raw deltas (e.g. into st.write_stream)"""
+    cleaner = cleaner or StreamCleaner()
+    for delta in deltas:
+        text = cleaner.feed(delta)
+        if text:
+            yield text
+    tail = cleaner.finish()
+    if tail:
+        yield tail
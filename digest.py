@@ -0,0 +1,109 @@
+import os
+
+from charts import chart_data
+from context import count_tokens
+from cube import get_cube
+from intent import route
+from tools import compact_table
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+BUDGET_ENV = "CHAT_DIGEST_BUDGET"
+DEFAULT_BUDGET = 400  # tokens; 0 disables the digest
+MIN_ROWS = 2  # a slice squeezed below this is dropped rather than sent
+
+# Supporting slices per chart intent, after the chart's own data:
+# (title, group by, {measure: agg}, where). All are cube rollups.
+DIGEST_SLICES = {
+    'channel_mix': [
+        ('Publisher', 'Publisher', {'ROAS': 'mean', 'Spend ($)': 'sum', 'Revenue ($)': 'sum'}, None),
+        ('Format', 'Format', {'ROAS': 'mean', 'Spend ($)': 'sum'}, None)
+    ],
+    'format_roi': [
+        ('Format by channel', ['Format', 'Channel'], {'ROAS': 'mean', 'CPA ($)': 'mean'}, None)
+    ],
+    'conversion': [
+        ('Publisher', 'Publisher', {'Conversion Rate (%)': 'mean', 'CTR (%)': 'mean', 'Conversions': 'sum'}, None)
+    ],
+    'churn': [
+        ('Channel by month', ['Month', 'Channel'], {'Conversions': 'sum'}, None)
+    ],
+    'engagement': [
+        ('Video vs Static by channel', ['Format', 'Channel'], {'CTR (%)': 'mean', 'Time on Site (min)': 'mean'},
+         {'Format': ['Video', 'Static']})
+    ],
+    'audience': [
+        ('Segment by channel', ['Audience Segment (Demographic)', 'Channel'], {'ROAS': 'mean', 'CPA ($)': 'mean'}, None)
+    ],
+    'social_display': [
+        ('Publisher', 'Publisher', {'ROAS': 'mean', 'CTR (%)': 'mean', 'Revenue ($)': 'sum'},
+         {'Channel Type': ['Social', 'Display']})
+    ],
+    'channel_roas': [
+        ('Format', 'Format', {'ROAS': 'mean'}, None)
+    ]
+}
+
+HEADER = "Data digest (aggregates of df, FY weeks 1-52; quote these figures):"
+
+
+def digest_budget(environ=None):
+    environ = os.environ if environ is None else environ
+    return int(environ.get(BUDGET_ENV, DEFAULT_BUDGET))
+
+
+# -------------------------------
+# DIGEST
+# -------------------------------
+def digest_slices(question, df):
+    """(title, frame) pairs relevant to a question, most relevant first
+
+    Routed like generate_charts(), so the model sees the numbers behind
+    every chart shown next to its answer; supporting slices follow for the
+    best-matching intent only.
+    """
+    intents = route(question)
+    cube = get_cube(df)
+    slices = [(f"Chart: {intent.replace('_', ' ')}", chart_data(intent, cube)) for intent in intents]
+    for title, by, agg, where in DIGEST_SLICES.get(intents[0], []):
+        data = cube.rollup(by, agg, where=where)
+        slices.append((title, data.sort_values(next(iter(agg)), ascending=False)))
+    return slices
+
+
+def build_digest(question, df, budget=None):
+    """Compact CSV digest of the relevant slices within `budget` tokens; returns (text, tokens)
+
+    Slices are added whole while they fit; the first one that does not is
+    cut to as many rows as fit, and the rest are dropped.
+    """
+    budget = digest_budget() if budget is None else budget
+    if budget <= 0:
+        return "", 0
+    parts = [HEADER]
+    used = count_tokens(HEADER)
+    for title, data in digest_slices(question, df):
+        rows = len(data)
+        while rows > 0 and rows >= min(MIN_ROWS, len(data)):
+            block = f"[{title}]\n{compact_table(data, max_rows=rows)}"
+            tokens = count_tokens(block)
+            if used + tokens <= budget:
+                parts.append(block)
+                used += tokens
+                break
+            # Shrink in proportion to the overshoot rather than one row at a time
+            rows = min(rows - 1, int(rows * (budget - used) / tokens))
+        if rows < len(data):
+            break
+    if len(parts) == 1:
+        return "", 0
+    text = "\n".join(parts)
+    return text, count_tokens(text)
+
+
+def with_digest(messages, digest):
+    """Insert the digest as a system message just before the current question"""
+    if not digest:
+        return messages
+    return messages[:-1] + [{"role": "system", "content": digest}] + messages[-1:]
@@ -0,0 +1,336 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+SIZE_ENV = "PROXY_CACHE_SIZE"
+ENTRY_ENV = "PROXY_CACHE_MAX_ENTRY"
+DIR_ENV = "PROXY_CACHE_DIR"
+
+DEFAULT_SIZE = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRY = 8 * 1024 * 1024
+
+# Keys include the negotiated Content-Encoding, so varying on Accept-Encoding is harmless
+SAFE_VARY = {"accept-encoding"}
+
+# Copied from a 304 onto the stored entry (RFC 9111 §4.3.4)
+REVALIDATION_HEADERS = {"cache-control", "date", "etag", "expires", "last-modified"}
+
+HIT, REVALIDATED, MISS = "HIT", "REVALIDATED", "MISS"
+
+
+# -------------------------------
+# HEADERS
+# -------------------------------
+def header(headers, name, default=""):
+    """First value of a header in a list of (name, value) pairs, case-insensitive"""
+    name = name.lower()
+    return next((value for key, value in headers if key.lower() == name), default)
+
+
+def cache_control(value):
+    """`public, max-age=60` → {"public": "", "max-age": "60"}"""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"')
+    return directives
+
+
+def _seconds(value):
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers):
+    """Seconds a shared cache may serve the response without revalidating; None if not stated"""
+    directives = cache_control(header(headers, "Cache-Control"))
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            return _seconds(directives[name]) or 0
+    expires = _http_date(header(headers, "Expires"))
+    if expires is not None:
+        date = _http_date(header(headers, "Date")) or time.time()
+        return max(0, int(expires - date))
+    return None
+
+
+def bypasses_cache(method, headers):
+    """Requests the edge cache must not answer or store"""
+    if method not in ("GET", "HEAD"):
+        return True
+    return "no-store" in cache_control(header(headers, "Cache-Control")) or bool(header(headers, "Authorization"))
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison, as If-None-Match requires"""
+    if not etag or not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+# -------------------------------
+# ENTRIES
+# -------------------------------
+class Entry:
+    """One stored 200 response; body is None while it only lives on disk"""
+
+    __slots__ = ("key", "headers", "size", "stored", "age", "lifetime", "body")
+
+    def __init__(self, key, headers, size, stored, age, lifetime, body=None):
+        self.key = key
+        self.headers = headers
+        self.size = size
+        self.stored = stored
+        self.age = age
+        self.lifetime = lifetime
+        self.body = body
+
+    @property
+    def etag(self):
+        return header(self.headers, "ETag")
+
+    def current_age(self, now):
+        return self.age + max(0, now - self.stored)
+
+    def is_fresh(self, now):
+        return self.current_age(now) < self.lifetime
+
+    def validators(self):
+        """Conditional request headers for revalidating this entry upstream"""
+        validators = {}
+        if self.etag:
+            validators["If-None-Match"] = self.etag
+        last_modified = header(self.headers, "Last-Modified")
+        if last_modified:
+            validators["If-Modified-Since"] = last_modified
+        return validators
+
+    def meta(self):
+        return {"key": self.key, "headers": self.headers, "size": self.size, "stored": self.stored,
+                "age": self.age, "lifetime": self.lifetime}
+
+
+# -------------------------------
+# LRU STORE
+# -------------------------------
+class EdgeCache:
+    """Size-bounded LRU of cacheable upstream GET responses, in memory or on disk
+
+    Only 200s with an explicit freshness lifetime or a validator are kept;
+    stale entries are revalidated with If-None-Match / If-Modified-Since and
+    a 304 refreshes them in place. With a directory, bodies live in files
+    (one per entry, plus a JSON sidecar) and survive restarts; the index and
+    the LRU order are in memory. Counters are per process.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_SIZE, max_entry_bytes=DEFAULT_MAX_ENTRY, directory=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.directory = directory or None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_stored = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load()
+
+    @staticmethod
+    def key(path, query="", encoding=None):
+        """One entry per URL and negotiated Content-Encoding"""
+        key = f"{path}?{query}" if query else path
+        return f"{key}|{encoding}" if encoding else key
+
+    # -- disk --
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + suffix)
+
+    def _write(self, entry):
+        for suffix, data in ((".body", entry.body), (".json", json.dumps(entry.meta()).encode())):
+            tmp = self._path(entry.key, suffix + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(entry.key, suffix))
+
+    def _remove(self, key):
+        for suffix in (".json", ".body"):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _load(self):
+        metas = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        metas.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        for meta in sorted(metas, key=lambda m: m["stored"]):
+            entry = Entry(meta["key"], [tuple(pair) for pair in meta["headers"]], meta["size"], meta["stored"],
+                          meta["age"], meta["lifetime"])
+            self._entries[entry.key] = entry
+            self.bytes_stored += entry.size
+        self._evict()
+
+    # -- lookups --
+    def get(self, key):
+        """Entry for key with its body loaded, or None; refreshes LRU order, no stats"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        if entry.body is not None:
+            return entry
+        try:
+            with open(self._path(key, ".body"), "rb") as f:
+                body = f.read()
+        except OSError:
+            self.discard(key)
+            return None
+        return Entry(entry.key, entry.headers, entry.size, entry.stored, entry.age, entry.lifetime, body)
+
+    def storable(self, status, headers, size):
+        if status != 200 or size > self.max_entry_bytes or header(headers, "Set-Cookie"):
+            return False
+        directives = cache_control(header(headers, "Cache-Control"))
+        if "no-store" in directives or "private" in directives:
+            return False
+        vary = {v.strip().lower() for v in header(headers, "Vary").split(",") if v.strip()}
+        if vary - SAFE_VARY:
+            return False
+        # Without a lifetime the entry is only useful if it can be revalidated
+        return freshness_lifetime(headers) is not None or bool(header(headers, "ETag") or header(headers, "Last-Modified"))
+
+    def put(self, key, status, headers, body, now=None):
+        """Store a response if it is cacheable; returns the entry or None"""
+        if self.max_bytes <= 0 or not self.storable(status, headers, len(body)):
+            return None
+        now = time.time() if now is None else now
+        directives = cache_control(header(headers, "Cache-Control"))
+        lifetime = 0 if "no-cache" in directives else (freshness_lifetime(headers) or 0)
+        entry = Entry(key, list(headers), len(body), now, _seconds(header(headers, "Age")) or 0, lifetime, body)
+        self._save(entry)
+        return entry
+
+    def refresh(self, entry, headers, now=None):
+        """Apply a 304's headers to a stale entry and restart its freshness clock"""
+        now = time.time() if now is None else now
+        updates = {name.lower(): (name, value) for name, value in headers if name.lower() in REVALIDATION_HEADERS}
+        merged = [(name, value) for name, value in entry.headers if name.lower() not in updates]
+        merged += list(updates.values())
+        directives = cache_control(header(merged, "Cache-Control"))
+        lifetime = 0 if "no-cache" in directives else (freshness_lifetime(merged) or 0)
+        refreshed = Entry(entry.key, merged, entry.size, now, _seconds(header(headers, "Age")) or 0, lifetime,
+                          entry.body)
+        self._save(refreshed)
+        return refreshed
+
+    def _save(self, entry):
+        if self.directory:
+            self._write(entry)
+            stored = Entry(entry.key, entry.headers, entry.size, entry.stored, entry.age, entry.lifetime)
+        else:
+            stored = entry
+        with self._lock:
+            previous = self._entries.pop(entry.key, None)
+            if previous is not None:
+                self.bytes_stored -= previous.size
+            self._entries[entry.key] = stored
+            self.bytes_stored += entry.size
+            self._evict()
+
+    def _evict(self):
+        while self.bytes_stored > self.max_bytes and self._entries:
+            key, entry = self._entries.popitem(last=False)
+            self.bytes_stored -= entry.size
+            if self.directory:
+                self._remove(key)
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes_stored -= entry.size
+        if entry is not None and self.directory:
+            self._remove(key)
+
+    # -- serving --
+    def record(self, state, size=0):
+        """Count a lookup; size is the body bytes that did not have to come from upstream"""
+        with self._lock:
+            if state == HIT:
+                self.hits += 1
+            elif state == REVALIDATED:
+                self.revalidated += 1
+            else:
+                self.misses += 1
+            if state != MISS:
+                self.bytes_saved += size
+
+    @staticmethod
+    def response_headers(entry, state, now=None):
+        """Stored headers plus Content-Length, Age and X-Cache for replaying an entry"""
+        now = time.time() if now is None else now
+        headers = [(name, value) for name, value in entry.headers if name.lower() not in ("age", "date")]
+        headers += [("Content-Length", str(entry.size)), ("Date", formatdate(now, usegmt=True)),
+                    ("Age", str(int(entry.current_age(now)))), ("X-Cache", state)]
+        return headers
+
+    @staticmethod
+    def not_modified_headers(entry, now=None):
+        """Headers for a 304 to a client whose If-None-Match already matches the entry"""
+        now = time.time() if now is None else now
+        headers = [(name, value) for name, value in entry.headers if name.lower() in REVALIDATION_HEADERS - {"date"}]
+        return headers + [("Date", formatdate(now, usegmt=True)), ("X-Cache", HIT)]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "entries": len(self),
+            "bytes_stored": self.bytes_stored,
+            "max_bytes": self.max_bytes
+        }
+
+
+def get_edge_cache(environ=None):
+    """Edge cache configured from PROXY_CACHE_* env vars; None when the size is 0"""
+    environ = os.environ if environ is None else environ
+    size = int(environ.get(SIZE_ENV, DEFAULT_SIZE))
+    if size <= 0:
+        return None
+    return EdgeCache(size, int(environ.get(ENTRY_ENV, DEFAULT_MAX_ENTRY)), environ.get(DIR_ENV) or None)
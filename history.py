@@ -0,0 +1,78 @@
+import os
+
+import streamlit as st
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+WINDOW_ENV = "CHAT_HISTORY_WINDOW"
+DEFAULT_WINDOW = 10  # messages, i.e. five question / answer turns
+WINDOW_STATE = "history_window"
+
+
+def history_window(environ=None):
+    environ = os.environ if environ is None else environ
+    return max(2, int(environ.get(WINDOW_ENV, DEFAULT_WINDOW)))
+
+
+# -------------------------------
+# TURN ARTEFACTS
+# -------------------------------
+def assistant_message(content, charts=None, caption=None):
+    """History entry for an answer with what was rendered alongside it
+
+    `charts` are Vega-Lite specs (data inlined) so earlier charts redraw
+    without re-running generate_charts() or Altair validation.
+    """
+    message = {"role": "assistant", "content": content}
+    if charts:
+        message["charts"] = list(charts)
+    if caption:
+        message["caption"] = caption
+    return message
+
+
+def split_history(history, window):
+    """(hidden message count, last `window` user / assistant messages)
+
+    The window never opens on an answer whose question is cut off.
+    """
+    turns = [m for m in history if m["role"] in ("user", "assistant")]
+    start = max(0, len(turns) - window)
+    while 0 < start < len(turns) and turns[start]["role"] != "user":
+        start += 1
+    return start, turns[start:]
+
+
+# -------------------------------
+# RENDERING
+# -------------------------------
+def render_message(message):
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        if message.get("caption"):
+            st.caption(message["caption"])
+        for chart in message.get("charts", []):
+            st.vega_lite_chart(chart, use_container_width=True)
+
+
+def _show_earlier():
+    st.session_state[WINDOW_STATE] += history_window()
+
+
+def reset_window():
+    st.session_state.pop(WINDOW_STATE, None)
+
+
+def render_history(history):
+    """Render the latest window of the chat; older turns stay behind a "show earlier" button
+
+    Per-rerun cost depends on the window, not on how long the conversation is.
+    """
+    if WINDOW_STATE not in st.session_state:
+        st.session_state[WINDOW_STATE] = history_window()
+    hidden, visible = split_history(history, st.session_state[WINDOW_STATE])
+    if hidden:
+        st.button(f"Show earlier messages ({hidden} hidden)", key="history_show_earlier", on_click=_show_earlier)
+    for message in visible:
+        render_message(message)
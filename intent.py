@@ -0,0 +1,105 @@
+import re
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# -------------------------------
+# INTENT VOCABULARY
+# -------------------------------
+# intent → [(pattern, weight)]. Specific phrases outweigh generic words, and a
+# longer phrase wins over the words inside it ("return on investment" is ROI,
+# not budget allocation), so branch order no longer decides the chart.
+INTENT_PATTERNS = {
+    'channel_mix': [
+        (r'channel mix\w*', 3), (r'media mix', 3), (r'\$\d+(?:\.\d+)?\s?[mk]\b', 3), (r'scenario\w*', 2),
+        (r'investment', 2), (r'invest\w*', 2), (r'budget\w*', 2), (r'allocat\w*', 2), (r'optimal', 1),
+        (r'mix\w*', 1), (r'spend', 1)
+    ],
+    'format_roi': [
+        (r'return on investment', 3), (r'cost per acquisition', 3), (r'roi', 2), (r'cpa', 2),
+        (r'formats?', 1), (r'carousel', 1), (r'interactive', 1), (r'radio', 1)
+    ],
+    'conversion': [
+        (r'click[- ]to[- ]conversion', 3), (r'conversion rates?', 3), (r'click[- ]through', 2), (r'ctr', 2),
+        (r'clicks?', 2), (r'conversions?', 1), (r'convert\w*', 1), (r'strongest', 1)
+    ],
+    'churn': [
+        (r'churn\w*', 3), (r'monthly', 2), (r'months?', 2), (r'seasonal\w*', 2), (r'trend\w*', 1),
+        (r'internal', 1), (r'external', 1), (r'drivers?', 1), (r'over time', 1)
+    ],
+    'engagement': [
+        (r'engagement', 3), (r'engag\w*', 2), (r'video', 2), (r'static', 2), (r'time on site', 2),
+        (r'likes', 2), (r'shares', 2), (r'pages per session', 2)
+    ],
+    'audience': [
+        (r'audiences?', 3), (r'segments?', 2), (r'demographic\w*', 2), (r'behaviou?ral', 2),
+        (r'first home buyers', 2), (r'refinancers', 2), (r'wealth builders', 2), (r'pre-retirees', 2),
+        (r'underperform\w*', 1)
+    ],
+    'social_display': [
+        (r'social (?:vs\.?|versus|or|and) display', 4), (r'social', 2), (r'display', 2), (r'roas', 1),
+        (r'driving', 1), (r'meta', 1), (r'tiktok', 1), (r'linkedin', 1), (r'tvnz', 1), (r'nz herald', 1)
+    ],
+    'channel_roas': [
+        (r'channels?', 1), (r'publishers?', 1)
+    ]
+}
+DEFAULT_INTENT = 'channel_roas'
+
+# A second chart is only drawn when its intent carries this share of the total score
+MIN_SHARE = 0.25
+MAX_CHARTS = 2
+
+
+def specificity(pattern):
+    """Length of the shortest text a pattern can match, however long its source is"""
+    return sre_parse.parse(pattern).getwidth()[0]
+
+
+def _compile(patterns):
+    """One alternation, most specific patterns first, with a named group per pattern
+
+    The regex engine takes the first alternative that matches at a position,
+    so a phrase must come before any shorter pattern that matches its start
+    ("channel mix" before "channels?"). Equally specific patterns go heaviest first.
+    """
+    entries = [(pattern, intent, weight) for intent, items in patterns.items() for pattern, weight in items]
+    entries.sort(key=lambda entry: (-specificity(entry[0]), -entry[2]))
+    regex = "|".join(f"(?P<p{i}>{pattern})" for i, (pattern, _, _) in enumerate(entries))
+    weights = {f"p{i}": (intent, weight) for i, (_, intent, weight) in enumerate(entries)}
+    return re.compile(rf"(?<!\w)(?:{regex})(?!\w)"), weights
+
+
+_PATTERN, _WEIGHTS = _compile(INTENT_PATTERNS)
+
+
+# -------------------------------
+# ROUTING
+# -------------------------------
+def rank_intents(query):
+    """[(intent, confidence)] best first, from a single scan of the query
+
+    Confidence is the intent's share of all matched weight; a query with no
+    matches gets [(DEFAULT_INTENT, 0.0)].
+    """
+    scores = {}
+    for match in _PATTERN.finditer(query.lower()):
+        intent, weight = _WEIGHTS[match.lastgroup]
+        scores[intent] = scores.get(intent, 0) + weight
+    total = sum(scores.values())
+    if not total:
+        return [(DEFAULT_INTENT, 0.0)]
+    # Ties go to the intent listed first in INTENT_PATTERNS
+    order = list(INTENT_PATTERNS)
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], order.index(item[0])))
+    return [(intent, score / total) for intent, score in ranked]
+
+
+def route(query, max_charts=MAX_CHARTS, min_share=MIN_SHARE):
+    """Intents to chart for a query: the best one, plus runners-up with at least min_share"""
+    ranked = rank_intents(query)
+    # The generic channel chart only ever leads; as a runner-up it repeats the lead chart's axis
+    extra = [intent for intent, share in ranked[1:] if share >= min_share and intent != DEFAULT_INTENT]
+    return [ranked[0][0]] + extra[:max_charts - 1]
@@ -0,0 +1,176 @@
+import os
+import time
+
+import pandas as pd
+
+from context import count_message_tokens
+from ratelimit import COMPLETION_ALLOWANCE
+
+# -------------------------------
+# GROQ CHAT COMPLETIONS
+# -------------------------------
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+STREAM_ENV = "GROQ_STREAM"
+TOOLS_ENV = "GROQ_TOOLS"
+
+# Tool-call rounds per answer; the last request is sent without tools so the model has to answer
+MAX_TOOL_ROUNDS = 3
+
+
+def _flag(environ, name):
+    environ = os.environ if environ is None else environ
+    return environ.get(name, "1").strip().lower() not in ("0", "false", "no")
+
+
+def streaming_enabled(environ=None):
+    """Streaming is on unless GROQ_STREAM is 0 / false / no"""
+    return _flag(environ, STREAM_ENV)
+
+
+def tools_enabled(environ=None):
+    """Data tools are offered to the model unless GROQ_TOOLS is 0 / false / no"""
+    return _flag(environ, TOOLS_ENV)
+
+
+# -------------------------------
+# TOOL ROUNDS
+# -------------------------------
+def _tool_kwargs(tools, round_):
+    if tools is None or round_ >= MAX_TOOL_ROUNDS:
+        return {}
+    return {"tools": tools.schemas, "tool_choice": "auto"}
+
+
+def _tool_messages(calls, tools):
+    """The assistant's tool-call turn plus one result message per call"""
+    messages = [{"role": "assistant", "content": "", "tool_calls": [
+        {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+        for call in calls
+    ]}]
+    for call in calls:
+        messages.append({"role": "tool", "tool_call_id": call["id"], "content": tools.call(call["name"], call["arguments"])})
+    return messages
+
+
+def _add_usage(metrics, usage):
+    """Accumulate token counts from a response's `usage` across tool rounds"""
+    if usage is None:
+        return
+    for field in ("prompt_tokens", "completion_tokens"):
+        metrics[f"usage_{field}"] = metrics.get(f"usage_{field}", 0) + (getattr(usage, field, None) or 0)
+
+
+def _chunk_usage(chunk):
+    # Groq reports usage on the final chunk under x_groq; OpenAI-style servers on the chunk itself
+    return getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+
+
+def _create(client, limiter, on_wait, metrics, **kwargs):
+    """chat.completions.create, through the shared rate limiter when there is one; returns (response, reserved tokens)"""
+    if limiter is None:
+        return client.chat.completions.create(**kwargs), 0
+    reserved = count_message_tokens(kwargs["messages"]) + COMPLETION_ALLOWANCE
+    return limiter.call(lambda: client.chat.completions.create(**kwargs), reserved, on_wait, metrics), reserved
+
+
+def _used(metrics):
+    return metrics.get("usage_prompt_tokens", 0) + metrics.get("usage_completion_tokens", 0)
+
+
+def complete(client, messages, model=DEFAULT_MODEL, metrics=None, tools=None, limiter=None, on_wait=None):
+    """Blocking completion; returns the full text and records latency and token usage in `metrics`
+
+    With `tools` (a tools.DataTools), tool calls are executed and fed back
+    until the model answers in text. With `limiter` (a ratelimit.RateLimiter)
+    each request waits its turn and 429s are retried; on_wait(position,
+    seconds) reports the queue.
+    """
+    metrics = {} if metrics is None else metrics
+    messages = list(messages)
+    tool_calls = 0
+    start = time.perf_counter()
+    for round_ in range(MAX_TOOL_ROUNDS + 1):
+        used = _used(metrics)
+        response, reserved = _create(client, limiter, on_wait, metrics, model=model, messages=messages,
+                                     **_tool_kwargs(tools, round_))
+        _add_usage(metrics, getattr(response, "usage", None))
+        if limiter is not None:
+            limiter.settle(reserved, _used(metrics) - used)
+        message = response.choices[0].message
+        if not getattr(message, "tool_calls", None):
+            break
+        calls = [{"id": c.id, "name": c.function.name, "arguments": c.function.arguments} for c in message.tool_calls]
+        messages += _tool_messages(calls, tools)
+        tool_calls += len(calls)
+    elapsed = time.perf_counter() - start
+    # Nothing is visible before the whole answer arrives, so TTFT == total
+    metrics.update(mode="blocking", model=model, ttft=elapsed, total=elapsed, tool_calls=tool_calls)
+    return message.content
+
+
+def stream(client, messages, model=DEFAULT_MODEL, metrics=None, tools=None, limiter=None, on_wait=None):
+    """Yield content deltas as they arrive; `metrics` gets ttft / total / token usage once consumed
+
+    Tool-call deltas are accumulated instead of yielded; once a response
+    ends with tool calls they are executed and the next round is streamed.
+    `limiter` / `on_wait` as in complete(); only opening a stream is retried.
+    """
+    metrics = {} if metrics is None else metrics
+    metrics.update(mode="streaming", model=model, ttft=None, total=None, chunks=0, tool_calls=0)
+    messages = list(messages)
+    start = time.perf_counter()
+    for round_ in range(MAX_TOOL_ROUNDS + 1):
+        used = _used(metrics)
+        response, reserved = _create(client, limiter, on_wait, metrics, model=model, messages=messages, stream=True,
+                                     **_tool_kwargs(tools, round_))
+        calls = {}
+        for chunk in response:
+            _add_usage(metrics, _chunk_usage(chunk))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            for part in getattr(delta, "tool_calls", None) or []:
+                call = calls.setdefault(part.index, {"id": "", "name": "", "arguments": ""})
+                call["id"] = part.id or call["id"]
+                if part.function is not None:
+                    call["name"] += part.function.name or ""
+                    call["arguments"] += part.function.arguments or ""
+            if not delta.content:
+                continue
+            if metrics["ttft"] is None:
+                metrics["ttft"] = time.perf_counter() - start
+            metrics["chunks"] += 1
+            yield delta.content
+        if limiter is not None:
+            limiter.settle(reserved, _used(metrics) - used)
+        if not calls:
+            break
+        calls = [calls[index] for index in sorted(calls)]
+        messages += _tool_messages(calls, tools)
+        metrics["tool_calls"] += len(calls)
+    metrics["total"] = time.perf_counter() - start
+
+
+def relay(deltas, metrics, model=DEFAULT_MODEL):
+    """Pass through another caller's stream (see singleflight.py), timing it as this turn saw it"""
+    metrics.update(mode="coalesced", model=model, ttft=None, total=None, chunks=0, tool_calls=0)
+    start = time.perf_counter()
+    for delta in deltas:
+        if metrics["ttft"] is None:
+            metrics["ttft"] = time.perf_counter() - start
+        metrics["chunks"] += 1
+        yield delta
+    metrics["total"] = time.perf_counter() - start
+
+
+def summarise_latency(log):
+    """Turns, median TTFT / total latency (seconds) and mean tokens per answer, per mode and model tier"""
+    frame = pd.DataFrame(log, columns=["mode", "tier", "ttft", "total", "usage_prompt_tokens", "usage_completion_tokens"])
+    frame["tier"] = frame["tier"].fillna("fast")
+    frame["tokens"] = frame["usage_prompt_tokens"].fillna(0) + frame["usage_completion_tokens"].fillna(0)
+    return frame.dropna(subset=["mode", "ttft", "total"]).groupby(["mode", "tier"]).agg(
+        turns=("total", "size"),
+        ttft_p50=("ttft", "median"),
+        total_p50=("total", "median"),
+        tokens=("tokens", "mean")
+    ).round(2).reset_index()
@@ -0,0 +1,115 @@
+import os
+import re
+
+from intent import rank_intents, route
+from llm import DEFAULT_MODEL
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+FAST_ENV = "GROQ_FAST_MODEL"
+LARGE_ENV = "GROQ_LARGE_MODEL"  # unset or empty sends everything to the fast model
+THRESHOLD_ENV = "GROQ_LARGE_THRESHOLD"
+
+DEFAULT_FAST = DEFAULT_MODEL
+DEFAULT_LARGE = ""  # opt in, e.g. GROQ_LARGE_MODEL=llama-3.3-70b-versatile
+DEFAULT_THRESHOLD = 3  # complexity score at which a question goes to the large model
+
+# -------------------------------
+# COMPLEXITY SIGNALS
+# -------------------------------
+# signal → weight. Lookups ("Which audience segment is underperforming?")
+# score 0; planning a budget scenario ("$200M across channels") scores 3 or more.
+# Only the question itself is scored: the chosen model is part of the response
+# cache key, so the same question must route the same way at any point in a chat.
+SIGNAL_WEIGHTS = {
+    'scenario': 2,      # leading chart intent is channel mix / budget allocation
+    'amounts': 1,       # per dollar amount to plan for, at most MAX_AMOUNTS
+    'multi_intent': 1,  # the question spans two chart intents
+    'reasoning': 1,     # per reasoning cue, at most MAX_REASONING
+    'long': 1           # more than LONG_QUERY_WORDS words
+}
+MAX_AMOUNTS = 2
+MAX_REASONING = 2
+LONG_QUERY_WORDS = 25
+
+SCENARIO_INTENTS = {'channel_mix'}
+_AMOUNT = re.compile(r"\$\d+(?:\.\d+)?\s?[mkb]\b", re.IGNORECASE)
+_REASONING = re.compile(
+    r"\b(?:why|explain|recommend\w*|strateg\w*|plan\w*|trade[- ]?offs?|forecast\w*|what if|should we|"
+    r"distinguish\w*|prioriti[sz]\w*|scenarios?)\b",
+    re.IGNORECASE
+)
+
+
+def complexity(query):
+    """(score, signals) for a question; `signals` maps each signal that fired to its contribution"""
+    signals = {}
+    ranked = rank_intents(query)
+    if ranked[0][1] > 0 and ranked[0][0] in SCENARIO_INTENTS:
+        signals['scenario'] = SIGNAL_WEIGHTS['scenario']
+    amounts = len(_AMOUNT.findall(query))
+    if amounts:
+        signals['amounts'] = SIGNAL_WEIGHTS['amounts'] * min(amounts, MAX_AMOUNTS)
+    if len(route(query)) > 1:
+        signals['multi_intent'] = SIGNAL_WEIGHTS['multi_intent']
+    cues = len(_REASONING.findall(query))
+    if cues:
+        signals['reasoning'] = SIGNAL_WEIGHTS['reasoning'] * min(cues, MAX_REASONING)
+    if len(query.split()) > LONG_QUERY_WORDS:
+        signals['long'] = SIGNAL_WEIGHTS['long']
+    return sum(signals.values()), signals
+
+
+# -------------------------------
+# ROUTING
+# -------------------------------
+class ModelChoice:
+    """The tier and model picked for one question, and why"""
+
+    def __init__(self, tier, model, score, signals):
+        self.tier = tier
+        self.model = model
+        self.score = score
+        self.signals = signals
+
+    def as_dict(self):
+        return {"tier": self.tier, "model": self.model, "complexity": self.score, "signals": sorted(self.signals)}
+
+    def __repr__(self):
+        return f"ModelChoice({self.tier}, {self.model}, score={self.score})"
+
+
+class ModelRouter:
+    """Fast model for lookups, large model once a question's complexity reaches `threshold`"""
+
+    def __init__(self, fast=DEFAULT_FAST, large=DEFAULT_LARGE, threshold=DEFAULT_THRESHOLD):
+        self.fast = fast
+        self.large = large or None
+        self.threshold = threshold
+
+    @property
+    def tiers(self):
+        return ["fast", "large"] if self.large is not None else ["fast"]
+
+    def choose(self, query):
+        score, signals = complexity(query)
+        if self.large is not None and score >= self.threshold:
+            return ModelChoice("large", self.large, score, signals)
+        return ModelChoice("fast", self.fast, score, signals)
+
+
+_ROUTERS = {}
+
+
+def get_model_router(environ=None):
+    """Router configured from GROQ_FAST_MODEL / GROQ_LARGE_MODEL / GROQ_LARGE_THRESHOLD"""
+    environ = os.environ if environ is None else environ
+    config = (
+        environ.get(FAST_ENV) or DEFAULT_FAST,
+        environ.get(LARGE_ENV, DEFAULT_LARGE),
+        float(environ.get(THRESHOLD_ENV, DEFAULT_THRESHOLD))
+    )
+    if config not in _ROUTERS:
+        _ROUTERS[config] = ModelRouter(*config)
+    return _ROUTERS[config]
@@ -0,0 +1,335 @@
+import hashlib
+import os
+import re
+import sys
+
+from datagen import (
+    CAMPAIGNS, DEMO_ROAS_ADJUST, FORMAT_ROAS_ADJUST, PUBLISHER_ROAS_ADJUST, build_campaigns, build_formats,
+    build_publishers, config_version, load_config, seasonal_multiplier
+)
+from response_cache import normalize_prompt
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+VERSION_ENV = "CHAT_PROMPT_VERSION"  # which PROMPT_VERSIONS entry to send; defaults to the latest
+
+# -------------------------------
+# VERSION 1: HAND-WRITTEN PROSE
+# -------------------------------
+# Kept verbatim for comparison and rollback ($CHAT_PROMPT_VERSION=1)
+PROMPT_V1 = """
+You are the ANZ Conversational Analytics tool — a senior strategist delivering enterprise-level marketing intelligence to C-suite stakeholders.Your role is to synthesize performance across all channels, formats, funnel layers, and audience segments and deliver quantified, executive-ready insights that reflect fiscal year context and strategic impact.
+Use new zealand spelling and context. 
+**CRITICAL: You have access to real data. Do NOT invent hypothetical data.**
+- The dataframe `df` contains actual campaign performance across all 6 campaigns, 7 publishers, and 52 weeks
+- Every claim MUST reference real metrics from this data
+- If asked about something the data doesn't contain, say "Data insufficient" — do NOT generate hypothetical examples
+
+**Current Dataset Context**
+- FY2025: April 2024 - March 2025 (Week 1 = Early April, Week 52 = Late March)
+- Total Annual Investment: $300-500 million across 6 campaigns
+- Publishers: Meta, Google, YouTube, TikTok, LinkedIn, TVNZ, NZ Herald
+- 7 Publishers, 6 Campaigns, 52 Weeks, 3 Funnel Layers, 4 Formats
+
+Always reference specific campaigns. If the query doesn't specify campaigns, pick 2-3 relevant examples.
+
+**6 Campaigns & Objectives:**
+1. Home Loans ($80M, Weeks 1-26, 25-44): Drive consideration + enquiries. Channels: TVNZ, YouTube, Meta, Search, NZ Herald. Funnel: Consideration. Barrier: complexity of mortgage process + upfront costs.
+2. Business Banking ($65M, Year-round, 35-54): Acquire SME customers. Channels: LinkedIn, Search, NZ Herald, YouTube. Funnel: Consideration. Barrier: skepticism about fintech; need proof of track record.
+3. KiwiSaver ($55M, Weeks 1-26, 18-54): Drive enrollments during tax season. Channels: TVNZ, YouTube, Meta, Search, NZ Herald. Funnel: Consideration. Barrier: financial literacy + tax confusion.
+4. Personal Banking ($45M, Year-round, 25-54): Drive account switching. Channels: Meta, Search, YouTube, NZ Herald. Funnel: Conversion. Barrier: loyalty to existing bank + perception of switching friction.
+5. Airpoints Visa ($25M, Weeks 35-40, 18-35): Acquire younger customers post-Kiwibank switch. Channels: Meta, Search, TikTok, NZ Herald. Funnel: Conversion. Barrier: rewards comparison across products; emotional attachment to Kiwibank brand.
+6. goMoney App ($15M, Weeks 1-26, 18-44): Drive downloads + activation. Channels: Meta, Search, TikTok, YouTube, TVNZ. Funnel: Conversion. Barrier: digital literacy + willingness to switch from incumbent banking app.
+
+**Audience Demographics & Decision Drivers:**
+- 25-34 (First Home Buyers): Value digital convenience + clarity. Decision driver: desire to own home; motivated by life stage. Respond to: comparative information, trust signals, urgency (first-time opportunity).
+- 35-44 (Mortgage Refinancers): Established, higher income, value trust. Decision driver: potential savings. Respond to: premium environments (TVNZ), authority voices, detailed comparisons.
+- 45-54 (Wealth Builders/SME Owners): Peak earning, investment-focused, skeptical of fintech. Decision driver: ROI + control. Respond to: professional channels (LinkedIn), data-driven proof, track record.
+- 18-35 (Young Professionals/Digital-First): Mobile-first, social proof-driven. Decision driver: rewards + convenience. Respond to: peer recommendations, authentic content, instant gratification (TikTok, Meta).
+
+**Publisher ROAS Multipliers:** Search 1.4x, Meta 1.0x, YouTube 1.05x, TikTok 0.95x, LinkedIn 0.9x, TVNZ 0.85x, NZ Herald 0.75x
+**Format ROAS Multipliers:** Carousel 1.2x, Video 1.15x, Interactive 1.1x, Static 0.85x, Radio 0.75x
+**Demographic ROAS Multipliers:** Wealth Builders 1.15x, Mortgage Refinancers 1.1x, Young Professionals 1.08x, First Home Buyers 1.05x, Pre-retirees 0.95x
+
+**Seasonality:** Q1 (Weeks 1-12) 1.25x [Tax time, KiwiSaver peak, home buying], Q2 (13-26) 0.85x [Winter lull], Q3 (27-39) 1.15x [Year-end push], Q4 (40-52) 1.05x [Summer lull recovery]
+
+**Response Format:**
+
+1. **Executive Summary** (1-2 sentences)
+   - State specific finding + campaign(s) + business impact
+   - Example: "Home Loans underleverage Search by 60% despite 1.4x ROAS multiplier—$3.2M recoverable margin in Q1 because first-home buyers actively compare mortgage rates on Search."
+
+2. **Performance Insight** (3-4 paragraphs)
+   - Use template: "[Campaign] underperforms [Publisher] because [audience barrier]. [Demographic] needs [format/channel] because [psychological driver]. Data shows [metric] = [value], indicating [root cause]."
+   - Example: "Home Loans underperforms TVNZ relative to Search because first-home buyers in Consideration actively compare rates (intent signal), not seeking upper-funnel awareness. However, Mortgage Refinancers (35-44) need TVNZ's premium environment because they require trust-building for $500K+ decisions; Search's transactional tone doesn't build confidence for existing-customer retention."
+   - Compare like-for-like only (Video vs Video, Consideration vs Consideration)
+   - Always explain the causal chain, not just the metric
+
+3. **Recommendations** (2-3 bullets with full structure)
+   - Format: a) Campaign(s), b) Change, c) Why (barrier + fit), d) Impact (quantified), e) Trade-off
+   - Example: "Home Loans → Shift 15% TVNZ spend ($2.1M) to Search Carousel in Q1 (weeks 1-12). Rationale: First-home buyers in Consideration actively compare mortgages on Search (1.4x ROAS baseline vs TVNZ 0.85x); Carousel format drives 1.2x additional lift by showing 4 loan product angles. Impact: CPA improves $31→$24 (22% efficiency), ROAS +0.4x. Preserve $6.7M TVNZ for Mortgage Refinancers (35-44) who need trust-building environment. Result: Home Loans portfolio ROAS moves 3.2→3.6."
+
+**If query doesn't specify campaigns:**
+Pick 2-3 relevant ones. Example: "Home Loans and Business Banking both sit in Consideration. Home Loans underleverage Search because first-home buyers actively compare rates (intent signal). Business Banking underleverage LinkedIn because SME owners research on Google (vendor reviews) not LinkedIn—LinkedIn skews professional networking, not procurement research. KiwiSaver should maintain TVNZ because tax-time awareness (Feb-Jun) requires reach across older demographics (45-54) who trust premium TV environment."
+
+**Investment Scenario Planning:**
+- Current: $285M baseline
+- $100M: Cut awareness. Focus Conversion (Personal Banking, Airpoints, goMoney) on Search + Meta. Home Loans → Search + YouTube only. Business Banking → Search only. Remove TVNZ, Herald, LinkedIn. Expected ROAS: 3.8-4.2 (portfolio squeeze, reach collapse).
+- $200M: Split Consideration/Conversion. Home Loans + KiwiSaver → Search + Meta (Q1 seasonality). Business Banking → Search + YouTube (year-round). Airpoints + goMoney → Meta + TikTok (high-ROI Conversion). Cut TVNZ, reduce LinkedIn. Expected ROAS: 3.4-3.6.
+- $300M: Full portfolio with Awareness. Scale Home Loans + KiwiSaver across all channels (TVNZ + Herald for reach). LinkedIn for Business Banking (SME targeting). Airpoints + goMoney → full channel mix. Expected ROAS: 2.8-3.2 (reach dilution, lower average ROAS but volume trade-off).
+
+**BAN THESE PHRASES:**
+- "enables/enable precise tracking," "cost efficiency," "dynamic testing," "unique capabilities"
+- "drives engagement" (unless: "drives engagement because Carousel shows 4 angles, reducing decision friction")
+- "Comparative analysis shows," "highlights the importance," "it's important to note"
+- "Performance variance across channels" (state specific variance + why)
+- "Amplify high-performing channels," "Optimize targeting" (vague, non-causal)
+
+**CRITICAL: No chart descriptions, visualization references, or placeholder text. Text analysis only. Use NZ spelling.**
+"""
+
+# -------------------------------
+# VERSION 2: FACTS FROM THE DATA GENERATOR
+# -------------------------------
+# Context the generator does not model: campaign → (objective, barrier)
+CAMPAIGN_BRIEFS = {
+    "ANZ Home Loans": ("Drive consideration + enquiries", "complexity of mortgage process + upfront costs"),
+    "ANZ Business Banking": ("Acquire SME customers", "skepticism about fintech; need proof of track record"),
+    "ANZ KiwiSaver": ("Drive enrollments during tax season", "financial literacy + tax confusion"),
+    "ANZ Personal Banking": ("Drive account switching", "loyalty to existing bank + perceived switching friction"),
+    "ANZ Airpoints Visa": ("Acquire younger customers post-Kiwibank switch",
+                           "rewards comparison across products; emotional attachment to Kiwibank brand"),
+    "ANZ goMoney App": ("Drive downloads + activation", "digital literacy + willingness to switch from incumbent banking app")
+}
+
+# audience segment → (profile, decision driver, responds to)
+AUDIENCE_BRIEFS = {
+    "First Home Buyers (25-34)": ("value digital convenience + clarity", "desire to own home; life stage",
+                                  "comparative information, trust signals, urgency (first-time opportunity)"),
+    "Mortgage Refinancers (35-44)": ("established, higher income, value trust", "potential savings",
+                                     "premium environments (TVNZ), authority voices, detailed comparisons"),
+    "Wealth Builders (45-54)": ("peak earning, investment-focused, skeptical of fintech; SME owners", "ROI + control",
+                                "professional channels (LinkedIn), data-driven proof, track record"),
+    "Young Professionals (25-34)": ("mobile-first, social proof-driven", "rewards + convenience",
+                                    "peer recommendations, authentic content, instant gratification (TikTok, Meta)")
+}
+
+# Seasonal periods in week order, as produced by datagen.seasonal_multiplier()
+SEASON_NOTES = ["tax time, KiwiSaver peak, home buying", "winter lull", "year-end push", "summer lull recovery"]
+
+
+def _millions(amount):
+    return f"${amount / 1e6:g}M"
+
+
+def _week_ranges(weeks):
+    """[1, 2, 3, 7, 8] → '1-3, 7-8'; a full year → 'year-round'"""
+    weeks = sorted(weeks)
+    if weeks == list(range(1, 53)):
+        return "year-round"
+    runs, start = [], weeks[0]
+    for prev, week in zip(weeks, weeks[1:] + [None]):
+        if week != prev + 1:
+            runs.append(f"{start}-{prev}" if prev != start else str(start))
+            start = week
+    return ", ".join(runs)
+
+
+def _short(name):
+    """Table label without the brand prefix or age band: 'ANZ Home Loans' → 'Home Loans'"""
+    return re.sub(r"^ANZ |\s*\([^)]*\)$", "", name)
+
+
+def _multipliers(table):
+    return ", ".join(f"{_short(name)} {value:g}" for name, value in sorted(table.items(), key=lambda item: -item[1]))
+
+
+def _seasons():
+    """Runs of equal seasonal multiplier over weeks 1-52, with their notes"""
+    runs = []
+    for week in range(1, 53):
+        value = seasonal_multiplier(week)
+        if runs and runs[-1][2] == value:
+            runs[-1][1] = week
+        else:
+            runs.append([week, week, value])
+    notes = SEASON_NOTES + [""] * len(runs)
+    return "; ".join(f"{a}-{b} {v:g}" + (f" ({note})" if note else "") for (a, b, v), note in zip(runs, notes))
+
+
+def _year_range(config):
+    """FY label and months covered by config['years'] fiscal years from config['fy_year']"""
+    first, last = config["fy_year"], config["fy_year"] + config["years"] - 1
+    label = f"FY{first}" if first == last else f"FY{first}-FY{last}"
+    return f"{label}: April {first - 1} - March {last}"
+
+
+def _publishers(publishers):
+    base = [name for name in publishers if name in PUBLISHER_ROAS_ADJUST]
+    if len(base) == len(publishers):
+        return ", ".join(publishers)
+    return f"{', '.join(base)}, plus synthetic Publisher {len(base) + 1}-{len(publishers)}"
+
+
+def data_facts(config=None):
+    """The factual half of the prompt, as compact tables built from the dataset config behind df
+
+    Campaigns, publishers, formats and years come from the same
+    load_config() / build_* calls that generate df, and the multipliers from
+    datagen's own tables, so resizing the data or editing a multiplier
+    updates the prompt (and its hash). Returns (text, annual investment).
+    """
+    config = load_config() if config is None else config
+    campaigns = build_campaigns(config)
+    publishers = build_publishers(config["publishers"])
+    formats = build_formats(config["formats"])
+    templates = list(campaigns.items())[:len(CAMPAIGNS)]
+    total = sum(spec["spend_annual"] for spec in campaigns.values())
+    weeks = "52 weeks" if config["years"] == 1 else f"52 weeks per year ({config['years']} years)"
+    lines = [
+        f"**Dataset:** {_year_range(config)} (Week 1 = early April, Week 52 = late March). "
+        f"{len(campaigns)} campaigns, {len(publishers)} publishers ({_publishers(publishers)}), "
+        f"{len(formats)} formats ({', '.join(formats)}), {weeks}; {_millions(total)} annual investment.",
+        "",
+        "**Campaigns** (df names start with \"ANZ \"; name | budget | weeks | funnel | audiences | channels | objective | barrier):"
+    ]
+    for name, spec in templates:
+        objective, barrier = CAMPAIGN_BRIEFS.get(name, ("", ""))
+        lines.append(" | ".join([
+            _short(name), _millions(spec["spend_annual"]), _week_ranges(spec["weeks"]), spec["funnel"],
+            ", ".join(_short(demo) for demo in spec["demo"]), ", ".join(spec["channels"]), objective, barrier
+        ]))
+    if len(campaigns) > len(templates):
+        lines.append(f"Campaigns {len(templates) + 1}-{len(campaigns)} repeat these in order (\"ANZ Home Loans 2\", ...) "
+                     "with the same budget, weeks, funnel and audiences, on the same or synthetic publishers.")
+    demos = {demo for spec in campaigns.values() for demo in spec["demo"]}
+    lines += ["", "**Audiences** (segment | profile | decision driver | responds to):"]
+    lines += [" | ".join([name, *brief]) for name, brief in AUDIENCE_BRIEFS.items() if name in demos]
+    lines += [
+        "",
+        "**ROAS multipliers (x baseline):**",
+        f"- Publisher: {_multipliers({k: v for k, v in PUBLISHER_ROAS_ADJUST.items() if k in publishers})}",
+        f"- Format: {_multipliers({k: v for k, v in FORMAT_ROAS_ADJUST.items() if k in formats})}",
+        f"- Audience: {_multipliers({k: v for k, v in DEMO_ROAS_ADJUST.items() if k in demos})}",
+        f"- Seasonality by week: {_seasons()}"
+    ]
+    return "\n".join(lines), total
+
+
+def build_prompt_v2(config=None):
+    facts, total = data_facts(config)
+    return f"""
+You are the ANZ Conversational Analytics tool: a senior strategist delivering enterprise-level marketing intelligence to C-suite stakeholders. Synthesise performance across channels, formats, funnel layers and audience segments into quantified, executive-ready insights with fiscal-year context and strategic impact. Use New Zealand spelling and context.
+
+**CRITICAL: You have access to real data. Do NOT invent hypothetical data.**
+- The dataframe `df` holds actual performance for every campaign, publisher and week below
+- Every claim MUST reference real metrics from this data
+- If the data doesn't cover a question, say "Data insufficient"; never generate hypothetical examples
+- Always reference specific campaigns; if the query names none, pick 2-3 relevant ones
+
+{facts}
+
+**Response Format:**
+1. **Executive Summary** (1-2 sentences): specific finding + campaign(s) + business impact.
+   Example: "Home Loans underleverage Search by 60% despite 1.4x ROAS multiplier—$3.2M recoverable margin in Q1 because first-home buyers actively compare mortgage rates on Search."
+2. **Performance Insight** (3-4 paragraphs): "[Campaign] underperforms [Publisher] because [audience barrier]. [Demographic] needs [format/channel] because [psychological driver]. Data shows [metric] = [value], indicating [root cause]."
+   Example: "Home Loans underperforms TVNZ relative to Search because first-home buyers in Consideration actively compare rates (intent signal), not seeking upper-funnel awareness. However, Mortgage Refinancers (35-44) need TVNZ's premium environment because they require trust-building for $500K+ decisions."
+   Compare like-for-like only (Video vs Video, Consideration vs Consideration) and always explain the causal chain, not just the metric.
+3. **Recommendations** (2-3 bullets): a) campaign(s), b) change, c) why (barrier + fit), d) impact (quantified), e) trade-off.
+   Example: "Home Loans → Shift 15% TVNZ spend ($2.1M) to Search Carousel in Q1 (weeks 1-12). Rationale: first-home buyers compare mortgages on Search (1.4x ROAS vs TVNZ 0.85x); Carousel adds 1.2x lift by showing 4 loan product angles. Impact: CPA $31→$24 (22% efficiency), ROAS +0.4x. Preserve $6.7M TVNZ for Mortgage Refinancers (35-44) who need a trust-building environment. Result: Home Loans ROAS 3.2→3.6."
+
+**If the query doesn't specify campaigns**, pick 2-3, e.g. "Home Loans and Business Banking both sit in Consideration. Home Loans underleverage Search because first-home buyers compare rates (intent signal). Business Banking underleverages LinkedIn because SME owners research vendors on Google, not LinkedIn. KiwiSaver should keep TVNZ because tax-time awareness needs reach across older demographics (45-54) who trust premium TV."
+
+**Investment Scenario Planning** (current baseline {_millions(total)}):
+- $100M: cut awareness. Conversion (Personal Banking, Airpoints, goMoney) on Search + Meta; Home Loans → Search + YouTube only; Business Banking → Search only; remove TVNZ, Herald, LinkedIn. Expected ROAS 3.8-4.2 (portfolio squeeze, reach collapse).
+- $200M: split Consideration/Conversion. Home Loans + KiwiSaver → Search + Meta (Q1 seasonality); Business Banking → Search + YouTube (year-round); Airpoints + goMoney → Meta + TikTok (high-ROI Conversion); cut TVNZ, reduce LinkedIn. Expected ROAS 3.4-3.6.
+- $300M: full portfolio with Awareness. Scale Home Loans + KiwiSaver across all channels (TVNZ + Herald for reach); LinkedIn for Business Banking (SME targeting); Airpoints + goMoney → full channel mix. Expected ROAS 2.8-3.2 (reach dilution; lower average ROAS, more volume).
+
+**BAN THESE PHRASES:** "enables/enable precise tracking", "cost efficiency", "dynamic testing", "unique capabilities"; "drives engagement" (unless causal: "drives engagement because Carousel shows 4 angles, reducing decision friction"); "Comparative analysis shows", "highlights the importance", "it's important to note"; "Performance variance across channels" (state the variance + why); "Amplify high-performing channels", "Optimize targeting".
+
+**CRITICAL: No chart descriptions, visualization references, or placeholder text. Text analysis only. Use NZ spelling.**
+"""
+
+
+# -------------------------------
+# VERSIONED PROMPTS
+# -------------------------------
+# version → builder taking the dataset config (version 1 is fixed prose and ignores it)
+PROMPT_VERSIONS = {
+    1: lambda config: PROMPT_V1,
+    2: build_prompt_v2
+}
+LATEST_VERSION = max(PROMPT_VERSIONS)
+
+
+# Appended when the data tools (tools.DataTools) are offered to the model
+TOOLS_PROMPT = """
+**Data tools:** `df` is not in this prompt; query it with the tools instead.
+- group_by_metric: metrics by up to 2 dimensions; top_n: best / worst N by one metric; weekly_trend: a metric per week or month
+- All three accept filters (e.g. {"Campaign": ["ANZ Home Loans"]}) and week_from / week_to (FY weeks 1-52)
+- Call a tool for every figure you cite and quote the returned numbers; never estimate them from the multipliers above
+- Prefer one or two targeted calls over broad tables
+"""
+
+
+def prompt_hash(text):
+    """Short hash of a prompt's normalised text; part of every response cache key"""
+    return hashlib.sha256(normalize_prompt(text).encode()).hexdigest()[:12]
+
+
+class Prompt:
+    """A system prompt as a versioned artefact: `id` ("v2-1a2b3c4d5e6f") names exactly what was sent"""
+
+    def __init__(self, version, text):
+        self.version = version
+        self.text = text
+        self.hash = prompt_hash(text)
+        self.id = f"v{version}-{self.hash}"
+
+    def __repr__(self):
+        return f"Prompt({self.id})"
+
+
+def prompt_version(environ=None):
+    environ = os.environ if environ is None else environ
+    version = int(environ.get(VERSION_ENV, LATEST_VERSION))
+    if version not in PROMPT_VERSIONS:
+        raise ValueError(f"unknown {VERSION_ENV} {version}; use one of {sorted(PROMPT_VERSIONS)}")
+    return version
+
+
+_PROMPTS = {}
+
+
+def get_prompt(version=None, tools=False, config=None):
+    """The system prompt for a version (default $CHAT_PROMPT_VERSION or the latest), plus TOOLS_PROMPT with tools on
+
+    `config` is the dataset config df was generated from (default
+    datagen.load_config()). Prompts are built and hashed once per process
+    and config, not on every Streamlit rerun.
+    """
+    version = prompt_version() if version is None else version
+    config = load_config() if config is None else config
+    key = (version, bool(tools), config_version(config))
+    if key not in _PROMPTS:
+        text = PROMPT_VERSIONS[version](config)
+        _PROMPTS[key] = Prompt(version, text + TOOLS_PROMPT if tools else text)
+    return _PROMPTS[key]
+
+
+def main():
+    """Token counts per prompt version, with and without the tools suffix"""
+    from context import count_tokens
+
+    print(f"{'version':>7} {'tools':>5} {'chars':>6} {'tokens':>6}  id")
+    for version in PROMPT_VERSIONS:
+        for tools in (False, True):
+            prompt = get_prompt(version, tools)
+            print(f"{version:>7} {'on' if tools else 'off':>5} {len(prompt.text):>6} {count_tokens(prompt.text):>6}  {prompt.id}")
+    if "--show" in sys.argv[1:]:
+        print(get_prompt().text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import email.utils
+import os
+import random
+import threading
+import time
+from collections import deque
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+RPM_ENV = "GROQ_RPM"
+TPM_ENV = "GROQ_TPM"
+LARGE_RPM_ENV = "GROQ_LARGE_RPM"
+LARGE_TPM_ENV = "GROQ_LARGE_TPM"
+QUEUE_ENV = "GROQ_QUEUE_SIZE"
+RETRIES_ENV = "GROQ_MAX_RETRIES"
+BURST_ENV = "GROQ_BURST"
+
+# Groq's free-tier limits for llama-3.1-8b-instant; 0 disables that bucket
+DEFAULT_RPM = 30
+DEFAULT_TPM = 6000
+# Groq's free-tier limits for llama-3.3-70b-versatile; each model has its own quota
+DEFAULT_LARGE_RPM = 30
+DEFAULT_LARGE_TPM = 12000
+DEFAULT_QUEUE = 20  # requests waiting per process before new ones are turned away
+DEFAULT_RETRIES = 4
+DEFAULT_BURST = 10.0  # seconds of the request budget that may go out back to back
+
+BACKOFF_BASE = 1.0  # seconds; attempt n waits up to BACKOFF_BASE * 2**n
+BACKOFF_CAP = 30.0
+RETRY_STATUSES = {429, 503}
+
+# Reserved for the answer until the response's usage settles the real count
+COMPLETION_ALLOWANCE = 600
+
+# Model tier (see model_router.py) → its request / token limit env vars and defaults
+TIER_LIMITS = {
+    "fast": (RPM_ENV, TPM_ENV, DEFAULT_RPM, DEFAULT_TPM),
+    "large": (LARGE_RPM_ENV, LARGE_TPM_ENV, DEFAULT_LARGE_RPM, DEFAULT_LARGE_TPM)
+}
+
+
+class QueueFull(Exception):
+    """More requests are already waiting than the queue holds"""
+
+
+# -------------------------------
+# ERRORS FROM THE API
+# -------------------------------
+def status_code(error):
+    """HTTP status of an API error (groq / openai / httpx style), or None"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_rate_limited(error):
+    return isinstance(error, QueueFull) or status_code(error) == 429
+
+
+def retry_after(error, now=None):
+    """Seconds the server asked us to wait (Retry-After as seconds or an HTTP date), or None"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+def backoff(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Full-jitter exponential backoff: uniform over [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# -------------------------------
+# TOKEN BUCKETS
+# -------------------------------
+class TokenBucket:
+    """`per_minute` units refilled continuously, bursting up to `burst` seconds' worth
+
+    The level may go negative: a response that used more tokens than were
+    reserved is paid back before the next request goes out.
+    """
+
+    def __init__(self, per_minute, burst=60.0):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        # A request larger than the bucket waits for a full one rather than forever
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= amount
+
+    def drain(self, now):
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class RateLimiter:
+    """Process-wide request and token budget for the Groq API, shared by every session
+
+    Callers queue in arrival order; the head of the queue goes out as soon
+    as both buckets allow it. A 429 / 503 pauses the whole queue for the
+    server's Retry-After (or a jittered backoff), since every session in the
+    process shares the same API key and limits.
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_RPM, tokens_per_minute=DEFAULT_TPM, max_queue=DEFAULT_QUEUE,
+                 max_retries=DEFAULT_RETRIES, burst=DEFAULT_BURST):
+        self.requests = TokenBucket(requests_per_minute, burst) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._paused_until = 0.0
+        self.admitted = self.rejected = self.throttled = self.retries = 0
+        self.max_depth = 0
+
+    # -- admission --
+    def _wait_time(self, tokens, now):
+        waits = [self._paused_until - now]
+        if self.requests is not None:
+            waits.append(self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            waits.append(self.tokens.wait_time(tokens, now))
+        return max(0.0, *waits)
+
+    def _estimate(self, position, head_wait):
+        """Rough seconds until the caller at `position` goes out"""
+        per_request = 1 / self.requests.rate if self.requests is not None else 0.0
+        return head_wait + position * per_request
+
+    def acquire(self, tokens, on_wait=None, retry=False):
+        """Block until a request of ~`tokens` may be sent; returns the seconds spent waiting
+
+        on_wait(position, seconds) is called (outside the lock) whenever the
+        caller's place in the queue or its rounded wait estimate changes;
+        position 0 is next in line. Retries rejoin at the front.
+        """
+        ticket = object()
+        start = time.monotonic()
+        with self._cond:
+            if retry:
+                self._queue.appendleft(ticket)
+            elif len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"{len(self._queue)} requests already waiting")
+            else:
+                self._queue.append(ticket)
+            self.max_depth = max(self.max_depth, len(self._queue))
+        reported = None
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    position = self._queue.index(ticket)
+                    head_wait = self._wait_time(tokens if position == 0 else 1, now)
+                    if position == 0 and head_wait <= 0:
+                        if self.requests is not None:
+                            self.requests.take(1)
+                        if self.tokens is not None:
+                            self.tokens.take(tokens)
+                        self.admitted += 1
+                        return time.monotonic() - start
+                    estimate = self._estimate(position, head_wait)
+                if on_wait is not None and (position, round(estimate)) != reported:
+                    reported = (position, round(estimate))
+                    on_wait(position, estimate)
+                with self._cond:
+                    # Woken early when the queue moves; re-checked at least twice a second
+                    self._cond.wait(min(head_wait, 0.5) if position == 0 else 0.5)
+        finally:
+            with self._cond:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def settle(self, reserved, used):
+        """Correct a token reservation once the response reports its real usage"""
+        if self.tokens is None or not used:
+            return
+        with self._cond:
+            self.tokens.take(used - reserved)
+
+    def pause(self, seconds):
+        """Hold every queued request for `seconds` (after a 429 / 503), then let them out at the steady rate"""
+        with self._cond:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            if self.requests is not None:
+                self.requests.drain(now)
+            self._cond.notify_all()
+
+    # -- retry scheduling --
+    def call(self, fn, tokens, on_wait=None, metrics=None):
+        """fn() within the limits, retrying 429 / 503 with Retry-After or jittered backoff
+
+        Queue wait and retries are added to `metrics`; the final error is
+        raised once max_retries is spent.
+        """
+        metrics = {} if metrics is None else metrics
+        for attempt in range(self.max_retries + 1):
+            metrics["queue_wait"] = metrics.get("queue_wait", 0.0) + self.acquire(tokens, on_wait, retry=attempt > 0)
+            try:
+                return fn()
+            except Exception as e:
+                if status_code(e) not in RETRY_STATUSES:
+                    raise
+                with self._cond:
+                    self.throttled += 1
+                if attempt == self.max_retries:
+                    raise
+                hinted = retry_after(e)
+                # Jitter on top of Retry-After too, so sessions released together do not collide again
+                delay = hinted + random.uniform(0, BACKOFF_BASE) if hinted is not None else backoff(attempt)
+                with self._cond:
+                    self.retries += 1
+                metrics["retries"] = metrics.get("retries", 0) + 1
+                self.pause(delay)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "max_depth": self.max_depth,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+                "retries": self.retries
+            }
+
+
+_LIMITERS = {}
+_LOCK = threading.Lock()
+
+
+def get_rate_limiter(environ=None, tier="fast"):
+    """Process-wide limiter for a model tier
+
+    Groq enforces limits per model, so each tier gets its own buckets and
+    queue: GROQ_RPM / GROQ_TPM for the fast tier, GROQ_LARGE_RPM /
+    GROQ_LARGE_TPM for the large one. GROQ_QUEUE_SIZE / GROQ_MAX_RETRIES /
+    GROQ_BURST apply to both.
+    """
+    environ = os.environ if environ is None else environ
+    rpm_env, tpm_env, default_rpm, default_tpm = TIER_LIMITS[tier]
+    config = (
+        int(environ.get(rpm_env, default_rpm)),
+        int(environ.get(tpm_env, default_tpm)),
+        int(environ.get(QUEUE_ENV, DEFAULT_QUEUE)),
+        int(environ.get(RETRIES_ENV, DEFAULT_RETRIES)),
+        float(environ.get(BURST_ENV, DEFAULT_BURST))
+    )
+    with _LOCK:
+        if (tier, config) not in _LIMITERS:
+            _LIMITERS[tier, config] = RateLimiter(*config)
+        return _LIMITERS[tier, config]
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+PATH_ENV = "RESPONSE_CACHE_PATH"
+TTL_ENV = "RESPONSE_CACHE_TTL"
+SIZE_ENV = "RESPONSE_CACHE_SIZE"
+
+DEFAULT_PATH = ".cache/responses.sqlite3"
+DEFAULT_TTL = 24 * 3600
+DEFAULT_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    scope TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL,
+    question TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+# -------------------------------
+# KEYS
+# -------------------------------
+def normalize_prompt(text):
+    """Whitespace-insensitive system prompt"""
+    return " ".join((text or "").split())
+
+
+def normalize_question(text):
+    """Case, emoji, punctuation and whitespace-insensitive question
+
+    "💰 Recommend optimal channel mixes..." and "recommend optimal channel
+    mixes" share a key; $ and % are kept since they change the meaning.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"[^\w\s$%]+", " ", text)
+    return " ".join(text.split())
+
+
+def cache_scope(model, prompt_id, data_version):
+    """Everything besides the question that an answer depends on
+
+    `prompt_id` is prompts.Prompt.id, which already hashes the normalised
+    prompt text, so the key never needs the full prompt.
+    """
+    payload = json.dumps([model, prompt_id, data_version])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def cache_key(model, prompt_id, question, data_version):
+    """Key for an answer to `question` asked on its own
+
+    The conversation is not part of the key, so only turns sent without
+    earlier history may be stored or looked up under it.
+    """
+    scope = cache_scope(model, prompt_id, data_version)
+    return hashlib.sha256(f"{scope}:{normalize_question(question)}".encode()).hexdigest()
+
+
+# -------------------------------
+# SQLITE STORE
+# -------------------------------
+class ResponseCache:
+    """Cleaned assistant responses in SQLite, with TTL expiry and LRU eviction
+
+    One connection per call, so the cache can be shared by every Streamlit
+    session thread and by other processes on the same host; WAL mode keeps
+    readers from blocking on writes. Hit / miss counters are per process.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            # Databases created before answers were scoped
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(responses)")]
+            if "scope" not in columns:
+                conn.execute("ALTER TABLE responses ADD COLUMN scope TEXT NOT NULL DEFAULT ''")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def fetch(self, key, now=None):
+        """Cached response for key, or None if missing / expired; refreshes LRU order, no stats"""
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row:
+                conn.execute("UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        return row[0] if row else None
+
+    def get(self, key, now=None):
+        """fetch() counted towards the hit rate"""
+        response = self.fetch(key, now)
+        with self._lock:
+            if response is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return response
+
+    def questions_since(self, rowid=0):
+        """(rowid, key, scope, question) of entries added after rowid, oldest first"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT rowid, key, scope, question FROM responses WHERE rowid > ? ORDER BY rowid", (rowid,)
+            ).fetchall()
+
+    def keys(self):
+        """Keys currently stored, expired or not"""
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT key FROM responses")}
+
+    def put(self, key, response, model="", question="", scope="", now=None):
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, scope, model, question, response, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, model, question, response, now, now)
+            )
+            # Expired rows first, then least recently used beyond max_entries
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY last_access DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self)
+        }
+
+
+_CACHES = {}
+
+
+def get_cache(environ=None):
+    """Process-wide cache configured from RESPONSE_CACHE_* env vars; None when the path is empty"""
+    environ = os.environ if environ is None else environ
+    path = environ.get(PATH_ENV, DEFAULT_PATH)
+    if not path:
+        return None
+    if path not in _CACHES:
+        _CACHES[path] = ResponseCache(
+            path,
+            ttl=float(environ.get(TTL_ENV, DEFAULT_TTL)),
+            max_entries=int(environ.get(SIZE_ENV, DEFAULT_SIZE))
+        )
+    return _CACHES[path]
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# COLUMN GROUPS
+# -------------------------------
+# Low-cardinality labels → categoricals (cheap storage, fast groupby keys)
+DIMENSION_COLUMNS = [
+    "Campaign", "Publisher", "Strategy", "Funnel Layer", "Format", "Creative Messaging",
+    "Audience Segment (Demographic)", "Audience Segment (Behavioral)", "Station"
+]
+
+# Small-range integers
+SMALL_INT_COLUMNS = ["FY Year", "Week"]
+
+# Rates and ratios with a handful of significant digits; dollar totals
+# (Spend, Revenue, Cost Per ...) stay float64 so large sums don't drift
+FLOAT32_COLUMNS = [
+    "ROAS", "CTR (%)", "CPA ($)", "Conversion Rate (%)", "Viewability (%)",
+    "Time on Site (min)", "Pages Per Session", "Bounce Rate (%)"
+]
+
+# Only populated for Radio on TVNZ / NZ Herald; None everywhere else
+RADIO_COLUMNS = ["TARPs", "Reach (%)", "Frequency", "Spot Count"]
+
+RADIO_DTYPES = {
+    "sparse": pd.SparseDtype("float32", np.nan),
+    "nullable": "Float32"
+}
+
+
+def _downcast_int(series):
+    """int32 when every value fits, otherwise leave as int64"""
+    info = np.iinfo(np.int32)
+    if len(series) == 0 or (series.min() >= info.min and series.max() <= info.max):
+        return series.astype(np.int32)
+    return series
+
+
+def compact_frame(df, categories=None, radio="sparse"):
+    """Return a copy of the campaign frame with compact dtypes
+
+    - dimensions → category (with fixed `categories` per column if given,
+      so independently compacted chunks concatenate without upcasting)
+    - FY Year / Week → int16, other counts → int32 when in range
+    - rates → float32
+    - radio-only columns → sparse (default) or nullable Float32
+    """
+    categories = categories or {}
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if col in DIMENSION_COLUMNS:
+            dtype = pd.CategoricalDtype(categories[col]) if col in categories else "category"
+            out[col] = series.astype(dtype)
+        elif col in SMALL_INT_COLUMNS:
+            out[col] = series.astype(np.int16)
+        elif col in FLOAT32_COLUMNS:
+            out[col] = series.astype(np.float32)
+        elif col in RADIO_COLUMNS:
+            numeric = pd.to_numeric(series, errors="coerce").astype(np.float32)
+            out[col] = numeric.astype(RADIO_DTYPES[radio])
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            out[col] = _downcast_int(series)
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+# -------------------------------
+# MEMORY REPORT
+# -------------------------------
+def memory_report(df, compact=None):
+    """Per-column dtype and deep memory usage, optionally against a compacted frame"""
+    report = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "bytes": df.memory_usage(deep=True, index=False)
+    })
+    if compact is not None:
+        report["compact dtype"] = compact.dtypes.astype(str)
+        report["compact bytes"] = compact.memory_usage(deep=True, index=False)
+        report["ratio"] = (report["bytes"] / report["compact bytes"].clip(lower=1)).round(1)
+
+    total = {"dtype": "", "bytes": report["bytes"].sum()}
+    if compact is not None:
+        total.update({
+            "compact dtype": "",
+            "compact bytes": report["compact bytes"].sum(),
+            "ratio": round(report["bytes"].sum() / max(1, report["compact bytes"].sum()), 1)
+        })
+    report.loc["TOTAL"] = total
+    return report
+
+
+# -------------------------------
+# DERIVED COLUMNS
+# -------------------------------
+def map_categories(series, func):
+    """Categorical result of func(value), evaluated once per category instead of per row"""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype("category")
+    mapped = [func(value) for value in series.cat.categories]
+    categories = sorted(set(mapped), key=str)
+    lookup = np.array([categories.index(value) for value in mapped] + [-1], dtype=np.int32)
+    # codes of -1 (missing) index the trailing -1 and stay missing
+    codes = lookup[series.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=series.index, name=series.name)
+
+
+def add_derived_columns(df, derived, default="Other"):
+    """Add {name: (source, func)} columns to df in place, without copying existing columns
+
+    `func` may be a lookup table (dict); values missing from it map to
+    `default`. Categorical / string sources go through map_categories();
+    numeric sources are passed to func as a whole Series, so func must be
+    vectorizable.
+    """
+    for name, (source, func) in derived.items():
+        series = df[source]
+        if isinstance(func, dict):
+            df[name] = map_categories(series, lambda value, table=func: table.get(value, default))
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            df[name] = func(series)
+        else:
+            df[name] = map_categories(series, func)
+    return df
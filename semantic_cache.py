@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from response_cache import get_cache, normalize_question
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+THRESHOLD_ENV = "SEMANTIC_CACHE_THRESHOLD"
+AUDIT_ENV = "SEMANTIC_CACHE_AUDIT"
+
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_AUDIT = ".cache/semantic_audit.jsonl"
+# 4 KB per float32 row; the labelled paraphrases score the same as at 2 ** 14
+DIMENSIONS = 2 ** 10
+INITIAL_ROWS = 64  # index buffer rows, doubled when full
+NGRAM = 3
+NGRAM_WEIGHT = 0.5
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "do", "does", "did", "what", "which", "who",
+    "whats", "how", "me", "my", "our", "we", "you", "your", "i", "it", "its", "of", "for", "in", "on", "at",
+    "to", "by", "with", "and", "or", "that", "this", "these", "those", "there", "can", "could", "would",
+    "should", "please", "show", "tell", "give", "us", "about", "across", "than", "vs", "versus", "compare",
+    "delivered", "deliver", "delivering", "driving", "drive", "drives", "performing", "performance",
+    "determine", "evaluate", "highlight", "recommend", "give", "gives", "get", "getting", "have", "has",
+    "level", "levels"
+}
+
+# Analyst shorthand for the same idea
+SYNONYMS = {
+    "highest": "best", "top": "best", "strongest": "best", "greatest": "best",
+    "outperforming": "best", "lowest": "worst", "weakest": "worst",
+    "underperforming": "worst", "poorest": "worst",
+    "budget": "investment", "budgets": "investment",
+    "roi": "roas", "return": "roas", "returns": "roas",
+    "publisher": "channel", "platform": "channel", "media": "channel",
+    "audience": "segment", "demographic": "segment", "demo": "segment",
+    "creative": "format", "ad": "format"
+}
+
+# Questions that differ only in amounts ($100M vs $200M) or weeks, or ask for the
+# opposite end (highest vs lowest), score high but are not interchangeable
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+POLARITY = {"best", "worst"}
+
+
+# -------------------------------
+# VECTORS
+# -------------------------------
+def _stem(word):
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def terms(question):
+    """Content words of a question after stopword removal, stemming and synonym folding"""
+    words = [w for w in normalize_question(question).split() if w not in STOPWORDS and not NUMBER.fullmatch(w)]
+    return [SYNONYMS.get(_stem(w), SYNONYMS.get(w, _stem(w))) for w in words]
+
+
+def guard(question):
+    """Numbers and best / worst polarity, which must match exactly for a hit"""
+    return (
+        frozenset(NUMBER.findall(normalize_question(question))),
+        frozenset(t for t in terms(question) if t in POLARITY)
+    )
+
+
+def vectorize(question):
+    """L2-normalised hashed bag of terms plus character trigrams (catches spelling variants)"""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for term in terms(question):
+        vector[zlib.crc32(term.encode()) % DIMENSIONS] += 1.0
+        padded = f"#{term}#"
+        grams = [padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)]
+        for gram in grams:
+            vector[zlib.crc32(("~" + gram).encode()) % DIMENSIONS] += NGRAM_WEIGHT / len(grams)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def similarity(a, b):
+    return float(vectorize(a) @ vectorize(b))
+
+
+# -------------------------------
+# INDEX
+# -------------------------------
+class SemanticCache:
+    """Nearest cached question by cosine similarity, on top of the exact ResponseCache
+
+    The index holds only vectors and keys; answers stay in SQLite, so TTL and
+    LRU eviction still apply. Each lookup pulls in entries added since the
+    last one (by any session or process) and drops rows whose keys SQLite no
+    longer holds, so the index never outgrows the response cache. Vectors
+    live in a preallocated buffer that doubles when full; a removed row is
+    overwritten by the last one. Every decision is appended to a JSONL audit
+    log for tuning.
+    """
+
+    def __init__(self, cache, threshold=DEFAULT_THRESHOLD, audit_path=DEFAULT_AUDIT):
+        self.cache = cache
+        self.threshold = threshold
+        self.audit_path = audit_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._last_rowid = 0
+        self._rows = {}  # key → row in the buffer
+        self._keys = []
+        self._scopes = []
+        self._questions = []
+        self._guards = []
+        self._matrix = np.zeros((INITIAL_ROWS, DIMENSIONS), dtype=np.float32)
+
+    # -- index buffer (callers hold self._lock) --
+    def _append(self, key, scope, question, vector):
+        size = len(self._keys)
+        if size == len(self._matrix):
+            grown = np.zeros((2 * len(self._matrix), DIMENSIONS), dtype=np.float32)
+            grown[:size] = self._matrix
+            self._matrix = grown
+        self._matrix[size] = vector
+        self._rows[key] = size
+        self._keys.append(key)
+        self._scopes.append(scope)
+        self._questions.append(question)
+        self._guards.append(guard(question))
+
+    def _remove(self, key):
+        i = self._rows.pop(key, None)
+        if i is None:
+            return
+        last = len(self._keys) - 1
+        if i != last:
+            self._matrix[i] = self._matrix[last]
+            for column in (self._keys, self._scopes, self._questions, self._guards):
+                column[i] = column[last]
+            self._rows[self._keys[i]] = i
+        for column in (self._keys, self._scopes, self._questions, self._guards):
+            column.pop()
+
+    def _sync(self):
+        rows = self.cache.questions_since(self._last_rowid)
+        live = self.cache.keys()
+        vectors = {row[0]: vectorize(row[3]) for row in rows}
+        with self._lock:
+            for rowid, key, scope, question in rows:
+                # Another session thread may have synced these rows meanwhile
+                if rowid <= self._last_rowid:
+                    continue
+                # INSERT OR REPLACE gives a replaced key a new rowid: keep the newest copy only
+                self._remove(key)
+                self._append(key, scope, question, vectors[rowid])
+                self._last_rowid = rowid
+            # Evicted by LRU / TTL since the last sync
+            for key in [key for key in self._rows if key not in live]:
+                self._remove(key)
+
+    def _drop(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, scope, question, now=None):
+        """(response, match) for the most similar cached question in scope, or (None, best candidate)"""
+        self._sync()
+        start = time.perf_counter()
+        query_guard = guard(question)
+        vector = vectorize(question)
+        # Scored under the lock, since a concurrent sync moves rows within the buffer
+        best = score = None
+        with self._lock:
+            scores = self._matrix[:len(self._keys)] @ vector
+            for i in np.argsort(-scores):
+                if self._scopes[i] == scope and self._guards[i] == query_guard:
+                    score = scores[i]
+                    best = {"key": self._keys[i], "question": self._questions[i], "similarity": round(float(score), 3)}
+                    break
+
+        if best is not None and score >= self.threshold:
+            response = self.cache.fetch(best["key"], now)
+            if response is not None:
+                self.hits += 1
+                self.audit("hit", question, best, time.perf_counter() - start)
+                return response, best
+            self._drop(best["key"])  # expired since the last sync
+
+        self.misses += 1
+        self.audit("miss", question, best, time.perf_counter() - start)
+        return None, best
+
+    def audit(self, event, question, match=None, seconds=None):
+        """Append one decision ('hit' | 'miss' | 'false_hit') to the audit log"""
+        if not self.audit_path:
+            return
+        record = {
+            "ts": round(time.time(), 3),
+            "event": event,
+            "question": question,
+            "matched": match["question"] if match else None,
+            "similarity": match["similarity"] if match else None,
+            "threshold": self.threshold
+        }
+        if seconds is not None:
+            record["lookup_ms"] = round(seconds * 1000, 3)
+        directory = os.path.dirname(self.audit_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.audit_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "indexed": len(self)
+        }
+
+
+_SEMANTIC = {}
+
+
+def get_semantic_cache(environ=None):
+    """Process-wide semantic layer over get_cache(); None when either is disabled
+
+    SEMANTIC_CACHE_THRESHOLD=0 (or off) turns it off without touching the exact cache.
+    """
+    environ = os.environ if environ is None else environ
+    cache = get_cache(environ)
+    raw = environ.get(THRESHOLD_ENV, str(DEFAULT_THRESHOLD)).strip().lower()
+    if cache is None or raw in ("", "0", "off", "false", "no"):
+        return None
+    threshold = float(raw)
+    audit_path = environ.get(AUDIT_ENV, DEFAULT_AUDIT)
+    key = (cache.path, threshold, audit_path)
+    if key not in _SEMANTIC:
+        _SEMANTIC[key] = SemanticCache(cache, threshold, audit_path)
+    return _SEMANTIC[key]
+
+
+# -------------------------------
+# AUDIT REPORT
+# -------------------------------
+def summarise_audit(path=DEFAULT_AUDIT):
+    """Hit rate, false-hit rate and similarity spread from an audit log"""
+    log = pd.read_json(path, lines=True)
+    lookups = log[log["event"].isin(["hit", "miss"])]
+    hits = int((lookups["event"] == "hit").sum())
+    false_hits = int((log["event"] == "false_hit").sum())
+    near_misses = lookups[(lookups["event"] == "miss") & lookups["similarity"].notna()]
+    return {
+        "lookups": len(lookups),
+        "hit_rate": round(hits / max(1, len(lookups)), 3),
+        "false_hit_rate": round(false_hits / max(1, hits), 3),
+        "hit_similarity_p10": round(lookups.loc[lookups["event"] == "hit", "similarity"].quantile(0.1), 3) if hits else None,
+        "false_hit_similarity_max": round(log.loc[log["event"] == "false_hit", "similarity"].max(), 3) if false_hits else None,
+        "miss_similarity_p90": round(near_misses["similarity"].quantile(0.9), 3) if len(near_misses) else None,
+        "lookup_ms_p50": round(lookups["lookup_ms"].median(), 3) if "lookup_ms" in lookups else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise the semantic cache audit log")
+    parser.add_argument("--audit", default=os.environ.get(AUDIT_ENV, DEFAULT_AUDIT))
+    args = parser.parse_args(argv)
+    for name, value in summarise_audit(args.audit).items():
+        print(f"{name:>26}: {value}")
+
+
+if __name__ == "__main__":
+    main()
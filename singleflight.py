@@ -0,0 +1,187 @@
+import threading
+import weakref
+
+# -------------------------------
+# SINGLE-FLIGHT REQUESTS
+# -------------------------------
+# Sessions that ask the same question at the same moment (a room clicking the
+# same preset) share one upstream call: the first caller for a key makes it,
+# everyone who arrives while it is in flight gets its result, or replays its
+# stream from the first delta. Keys are response cache keys, so a flight only
+# ever merges requests the response cache would answer with the same text.
+
+# Seconds a follower waits for the next chunk before giving up on the flight
+FOLLOWER_TIMEOUT = 120.0
+
+
+class FlightAbandoned(Exception):
+    """The caller that was to make the shared call never did"""
+
+
+class FlightTimeout(TimeoutError):
+    """No chunk arrived from the shared call within FOLLOWER_TIMEOUT"""
+
+
+class Flight:
+    """One in-flight upstream call: its text so far, and how it ended"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.followers = 0
+        self.started = False
+        self.cond = threading.Condition()
+
+    def append(self, chunk):
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def replay(self, timeout=None):
+        """Every chunk from the first, waiting up to `timeout` seconds for each new one until the flight ends"""
+        i = 0
+        while True:
+            with self.cond:
+                while i >= len(self.chunks) and not self.done:
+                    if not self.cond.wait(timeout):
+                        raise FlightTimeout(f"no response from the shared call in {timeout:g}s")
+                if i < len(self.chunks):
+                    chunk = self.chunks[i]
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            i += 1
+            yield chunk
+
+    def result(self, timeout=None):
+        return "".join(self.replay(timeout))
+
+
+class SingleFlight:
+    """Process-wide registry of in-flight calls keyed by response cache key
+
+    A flight is registered as soon as its first caller asks, so identical
+    requests arriving before the leader's stream is first read still share
+    it. If the leader's stream is then dropped unread (its rerun stopped),
+    the flight is unregistered and its followers fail with FlightAbandoned;
+    followers also give up after `timeout` seconds without a chunk.
+    """
+
+    def __init__(self, timeout=FOLLOWER_TIMEOUT):
+        self.timeout = timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.calls = self.shared = 0
+
+    def _join(self, key):
+        """(flight, True) for a follower, (new flight, False) for the caller that must make the call"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                with flight.cond:
+                    flight.followers += 1
+                self.shared += 1
+                return flight, True
+            flight = self._flights[key] = Flight()
+            self.calls += 1
+            return flight, False
+
+    def _land(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _follow(self, key, flight):
+        try:
+            yield from flight.replay(self.timeout)
+        except FlightTimeout:
+            # A stuck flight must not capture later identical questions too
+            self._land(key, flight)
+            raise
+
+    def do(self, key, fn):
+        """fn() once per key at a time; returns (text, shared)"""
+        flight, shared = self._join(key)
+        if shared:
+            return "".join(self._follow(key, flight)), True
+        try:
+            text = fn()
+            flight.append(text)
+            flight.finish()
+            return text, False
+        except BaseException as e:
+            flight.finish(e)
+            raise
+        finally:
+            self._land(key, flight)
+
+    def stream(self, key, fn):
+        """(deltas, shared): fn()'s stream for the first caller, a replay of it for the rest"""
+        flight, shared = self._join(key)
+        if shared:
+            return self._follow(key, flight), True
+        lead = self._lead(key, flight, fn)
+        # Runs when the leader's generator is collected; only acts if it was never read
+        weakref.finalize(lead, self._abandon, key, flight)
+        return lead, False
+
+    def _abandon(self, key, flight):
+        if not flight.started:
+            self._land(key, flight)
+            flight.finish(FlightAbandoned("the leading session dropped its stream before reading it"))
+
+    def _lead(self, key, flight, fn):
+        flight.started = True
+        iterator = None
+        try:
+            iterator = iter(fn())
+            for chunk in iterator:
+                flight.append(chunk)
+                yield chunk
+            flight.finish()
+        except GeneratorExit:
+            # The leader stopped reading (its session went away). Unregistered first, so nobody
+            # joins after the follower count is read; followers get the rest from a background
+            # thread rather than holding up the leader's close()
+            self._land(key, flight)
+            if flight.followers:
+                threading.Thread(target=self._drain, args=(flight, iterator), daemon=True).start()
+            else:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+                flight.finish()
+            raise
+        except BaseException as e:
+            flight.finish(e)
+            raise
+        finally:
+            self._land(key, flight)
+
+    @staticmethod
+    def _drain(flight, iterator):
+        try:
+            for chunk in iterator:
+                flight.append(chunk)
+            flight.finish()
+        except Exception as e:
+            flight.finish(e)
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._flights), "calls": self.calls, "shared": self.shared}
+
+
+_SINGLE_FLIGHT = SingleFlight()
+
+
+def get_single_flight():
+    return _SINGLE_FLIGHT
@@ -0,0 +1,48 @@
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("altair")
+
+from charts import generate_charts, generate_dynamic_chart, prepare_chart_frame
+from datagen import load_config, load_dataset
+
+QUERIES = [
+    "Recommend optimal channel mixes for $100M, $200M, and $300M investment levels.",
+    "Determine which formats delivered the highest ROI.",
+    "Evaluate channels & publishers with the strongest click-to-conversion rates.",
+    "Highlight months with the highest churn and distinguish internal vs. external drivers.",
+    "Is Video or Static driving higher engagement?",
+    "Which audience segment is underperforming?",
+    "What's driving ROAS on Social vs Display?",
+    "Summarise performance"
+]
+
+# A chart request allocates its small aggregate and the chart spec; a copy of df would be 100%
+MAX_FRACTION = 0.05
+
+
+@pytest.fixture(scope="module")
+def df():
+    config = load_config(environ={"DATAGEN_CAMPAIGNS": "60", "DATAGEN_ROWS_PER_WEEK": "40"})
+    return prepare_chart_frame(load_dataset(config, compact=True))
+
+
+def _peak(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_chart_requests_do_not_copy_the_frame(df, query):
+    frame_bytes = df.memory_usage(deep=True).sum()
+    columns = list(df.columns)
+    generate_charts(query, df)  # the cube is built once per data version, outside the measured request
+    for build in (lambda: generate_dynamic_chart(query, df), lambda: generate_charts(query, df)):
+        assert _peak(build) < MAX_FRACTION * frame_bytes
+    # Derived keys are added once by prepare_chart_frame(), never per request
+    assert list(df.columns) == columns
@@ -0,0 +1,57 @@
+import pytest
+
+from cleanup import StreamCleaner, clean_output, clean_stream
+
+SAMPLES = [
+    # Plain markdown with a heading, bullets and a trailing newline
+    "## Executive Summary\n\n- Meta leads on ROAS at **4.2x**.\n- TikTok trails.\n",
+    # Chart placeholders inline and on their own lines
+    "Spend rose 12%. [Insert Chart 1: ROAS by channel] Search held steady.\n[Insert Chart 2: Weekly trend]\nDone.",
+    "Intro line\n<Chart: Social vs Display>\nSocial returns 5.1x against display at 3.2x.",
+    "Chart lines go:\n  [Insert Chart for audiences\n<Chart shows formats\nKept after them.",
+    # Digit + unit pairs and whitespace runs
+    "Budget of $285million across 3channels, with  two   gaps between   words.",
+    "  Leading whitespace and 12months of data  \n\nand a tail   ",
+    # A placeholder spanning lines, and markers that never complete
+    "Before [Insert Chart 3: multi\nline title] after.\n[Insert nothing] <Char> [Ins",
+    "Q4 2024: 45m impressions, 1.2k clicks, ROAS 3x; CPA $18.5avg.\n\n### Next steps\n1. Shift 10% to Search."
+]
+
+
+def _splits(text):
+    """Every two-chunk split, plus one character at a time"""
+    for offset in range(len(text) + 1):
+        yield [text[:offset], text[offset:]]
+    yield list(text)
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_chunked_cleanup_matches_clean_output(text):
+    expected = clean_output(text)
+    for chunks in _splits(text):
+        assert "".join(clean_stream(chunks)) == expected, chunks
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_three_chunk_splits(text):
+    expected = clean_output(text)
+    for a in range(0, len(text) + 1, 3):
+        for b in range(a, len(text) + 1, 5):
+            chunks = [text[:a], text[a:b], text[b:]]
+            assert "".join(clean_stream(chunks)) == expected, chunks
+
+
+def test_raw_keeps_the_full_text():
+    cleaner = StreamCleaner()
+    "".join(clean_stream(["Spend [Insert", " Chart 1: x] up"], cleaner))
+    assert cleaner.raw == "Spend [Insert Chart 1: x] up"
+
+
+def test_text_is_released_before_the_stream_ends():
+    cleaner = StreamCleaner()
+    # One character is held back in case the next delta pairs with it
+    assert cleaner.feed("Meta leads on ROAS this quarter ") == "Meta leads on ROAS this quarte"
+    # Nothing is released while a placeholder is open
+    assert cleaner.feed("[Insert Chart 1: ROAS") == ""
+    assert cleaner.feed("] and more") == "r and mor"
+    assert cleaner.finish() == "e"
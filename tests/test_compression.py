@@ -0,0 +1,41 @@
+import gzip
+
+from compression import STATIC_CACHE_CONTROL, static_file
+
+
+def _headers(found):
+    return dict(found[1])
+
+
+def test_static_files_revalidate(tmp_path):
+    (tmp_path / "Font.woff2").write_bytes(b"wOF2" + b"\0" * 64)
+    found = static_file(str(tmp_path), "Font.woff2", "gzip, br")
+    headers = _headers(found)
+    assert "immutable" not in headers["Cache-Control"]
+    assert headers["Cache-Control"] == STATIC_CACHE_CONTROL
+    assert headers["Content-Type"] == "font/woff2"
+    assert headers["ETag"]
+
+
+def test_missing_woff2_falls_back_to_the_opentype_source(tmp_path):
+    (tmp_path / "Font.otf").write_bytes(b"OTTO" + b"\0" * 64)
+    path, headers = static_file(str(tmp_path), "Font.woff2", None)
+    assert path == str(tmp_path / "Font.otf")
+    assert dict(headers)["Content-Type"] == "font/otf"
+    assert static_file(str(tmp_path), "Other.woff2", None) is None
+
+
+def test_precompressed_variant_is_preferred(tmp_path):
+    raw = b"OTTO" + b"\0" * 4096
+    (tmp_path / "Font.otf").write_bytes(raw)
+    (tmp_path / "Font.otf.gz").write_bytes(gzip.compress(raw))
+    path, headers = static_file(str(tmp_path), "Font.otf", "gzip")
+    assert path.endswith(".otf.gz")
+    assert dict(headers)["Content-Encoding"] == "gzip"
+
+
+def test_paths_outside_the_directory_are_refused(tmp_path):
+    (tmp_path / "static").mkdir()
+    (tmp_path / "secret.otf").write_bytes(b"OTTO")
+    assert static_file(str(tmp_path / "static"), "../secret.otf", None) is None
+    assert static_file(str(tmp_path / "static"), "../secret.woff2", None) is None
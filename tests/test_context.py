@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from context import (BUDGET_ENV, ConversationContext, count_message_tokens, count_tokens, summarise_turns)
+
+SYSTEM = "You are a media analytics assistant. " * 10
+WORDS = "meta tiktok search display roas spend revenue audience segment budget format video static conversion".split()
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _chat(ctx, exchanges, rng, question=20, answer=80):
+    """Ask `exchanges` questions; yields (turns so far, messages sent) for each"""
+    history = [{"role": "system", "content": SYSTEM}]
+    for _ in range(exchanges):
+        history.append({"role": "user", "content": _text(rng, question)})
+        yield [m for m in history if m["role"] != "system"], ctx.messages(history)
+        history.append({"role": "assistant", "content": _text(rng, answer)})
+
+
+def _live(messages):
+    return messages[2:] if len(messages) > 1 and messages[1]["content"].startswith("Summary") else messages[1:]
+
+
+def test_short_conversation_is_sent_verbatim():
+    ctx = ConversationContext(SYSTEM, budget=4000, min_recent=6)
+    for turns, messages in _chat(ctx, 3, random.Random(0)):
+        assert messages == [{"role": "system", "content": SYSTEM}] + turns
+    assert ctx.folded == 0 and ctx.summary == ""
+
+
+@pytest.mark.parametrize("min_recent", [2, 4, 6])
+def test_stays_within_the_budget_from_the_environment(monkeypatch, min_recent):
+    monkeypatch.setenv(BUDGET_ENV, "2000")
+    ctx = ConversationContext(SYSTEM, min_recent=min_recent)
+    assert ctx.budget == 2000
+    for turns, messages in _chat(ctx, 40, random.Random(min_recent)):
+        assert count_message_tokens(messages) <= 2000
+        assert messages[0] == {"role": "system", "content": SYSTEM}
+        recent = min(min_recent, len(turns))
+        assert messages[-recent:] == turns[-recent:]
+        assert ctx.stats["prompt_tokens"] == count_message_tokens(messages)
+    assert ctx.folded > 0
+
+
+def test_folds_whole_exchanges_from_the_front():
+    folds = []
+
+    def record(summary, messages):
+        folds.append(messages)
+        return summarise_turns(summary, messages)
+
+    ctx = ConversationContext(SYSTEM, budget=700, min_recent=3, summarise=record)
+    for turns, messages in _chat(ctx, 15, random.Random(1)):
+        live = _live(messages)
+        assert live == turns[ctx.folded:]
+        assert live[0]["role"] == "user"
+    assert folds
+    for fold in folds:
+        assert [m["role"] for m in fold] == ["user", "assistant"]
+    assert [m for fold in folds for m in fold] == turns[:ctx.folded]
+    assert messages[1]["content"].startswith("Summary of the earlier conversation:\nQ: ")
+
+
+def test_exchange_reaching_into_the_recent_window_stays_whole():
+    ctx = ConversationContext(SYSTEM, budget=10, min_recent=3)
+    history = [{"role": r, "content": f"{r} message number {i}"} for i, r in enumerate(["user", "assistant"] * 2 + ["user"])]
+    messages = ctx.messages(history)
+    # Only the first exchange lies wholly before the last three messages
+    assert ctx.folded == 2
+    assert _live(messages) == history[2:]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_conversations_keep_the_invariants(seed):
+    rng = random.Random(seed)
+    min_recent = rng.randint(1, 7)
+    ctx = ConversationContext(SYSTEM, budget=rng.randint(300, 1500), min_recent=min_recent)
+    for turns, messages in _chat(ctx, rng.randint(1, 20), rng, rng.randint(5, 40), rng.randint(10, 120)):
+        live = _live(messages)
+        assert messages[0]["content"] == SYSTEM
+        assert live == turns[ctx.folded:]
+        assert live[0]["role"] == "user"
+        assert len(live) >= min(min_recent, len(turns))
+
+
+def test_summary_keeps_the_newest_lines():
+    messages = [{"role": "user", "content": f"Question {i} about spend and revenue by channel."} for i in range(50)]
+    summary = summarise_turns("", messages, max_tokens=60)
+    assert count_tokens(summary) <= 60
+    assert summary.splitlines()[-1] == "Q: Question 49 about spend and revenue by channel."
+
+
+def test_reset_forgets_the_summary():
+    ctx = ConversationContext(SYSTEM, budget=300, min_recent=2)
+    for _ in _chat(ctx, 6, random.Random(2)):
+        pass
+    assert ctx.folded and ctx.summary
+    ctx.reset()
+    assert (ctx.folded, ctx.summary, ctx.stats) == (0, "", {})
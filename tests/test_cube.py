@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+import cube
+from cube import MAX_CUBES, data_version, get_cube, invalidate
+from datagen import load_config, load_dataset
+
+
+@pytest.fixture(scope="module")
+def df():
+    config = load_config(environ={"DATAGEN_CAMPAIGNS": "12", "DATAGEN_ROWS_PER_WEEK": "10"})
+    return load_dataset(config, compact=True)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cubes():
+    invalidate()
+    yield
+    invalidate()
+
+
+def test_filtered_frame_gets_its_own_cube(df):
+    one_format = df[df["Format"] == df["Format"].iloc[0]]
+    assert one_format.attrs["data_version"] == df.attrs["data_version"]  # pandas copies attrs
+    assert data_version(one_format) != data_version(df)
+    full, subset = get_cube(df), get_cube(one_format)
+    assert full is not subset
+    assert (full.source_rows, subset.source_rows) == (len(df), len(one_format))
+    rolled = subset.rollup(["Publisher"], {"Spend ($)": "sum"}).set_index("Publisher")["Spend ($)"]
+    live = one_format.groupby("Publisher", observed=True)["Spend ($)"].sum()
+    assert rolled.to_dict() == pytest.approx(live.to_dict())
+
+
+def test_same_size_subsets_do_not_collide(df):
+    assert data_version(df.iloc[:100]) != data_version(df.iloc[100:200])
+    assert data_version(df.iloc[:100]) == data_version(df.iloc[:100])
+
+
+def test_cube_is_reused_and_bounded(df):
+    assert get_cube(df) is get_cube(df)
+    for i in range(MAX_CUBES + 1):
+        get_cube(df.iloc[i * 10:(i + 1) * 10])
+    assert len(cube._CUBES) == MAX_CUBES
+    assert data_version(df) not in cube._CUBES
+
+
+def test_concurrent_sessions_build_once(monkeypatch, df):
+    builds = []
+    build = cube.AggregateCube
+
+    def counting(frame):
+        builds.append(len(frame))
+        return build(frame)
+
+    monkeypatch.setattr(cube, "AggregateCube", counting)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_cube(df))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert len(builds) == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
@@ -0,0 +1,82 @@
+import json
+
+import pandas as pd
+import pytest
+
+from datagen import (DEFAULT_CONFIG, FORMATS, OPTIONAL_COLUMNS, build_formats, estimate_rows, iter_chunks, load_config,
+                     load_dataset, parity_report)
+
+
+def test_env_overrides_file_overrides_defaults(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"campaigns": 8, "rows_per_week": 3}))
+    config = load_config(str(path), environ={"DATAGEN_ROWS_PER_WEEK": "5", "DATAGEN_FORMATS": "Video, Static"})
+    assert (config["campaigns"], config["rows_per_week"], config["formats"]) == (8, 5, ["Video", "Static"])
+    assert config["years"] == DEFAULT_CONFIG["years"]
+
+
+def test_unknown_file_keys_are_rejected(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"campaings": 8}))
+    with pytest.raises(ValueError, match="campaings"):
+        load_config(str(path), environ={})
+
+
+@pytest.mark.parametrize("key, value", [
+    ("YEARS", "0"), ("CAMPAIGNS", "0"), ("ROWS_PER_WEEK", "0"), ("PUBLISHERS", "0"), ("CHUNK_ROWS", "0"),
+    ("FORMATS", "0"), ("FORMATS", ",")
+])
+def test_empty_dimensions_are_rejected(key, value):
+    with pytest.raises(ValueError, match=f"'{key.lower()}' must be at least 1"):
+        load_config(environ={f"DATAGEN_{key}": value})
+
+
+def test_empty_format_list_in_a_file_is_rejected(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"formats": []}))
+    with pytest.raises(ValueError, match="'formats' must be at least 1"):
+        load_config(str(path), environ={})
+
+
+def test_format_count_extends_the_known_formats():
+    assert build_formats(2) == FORMATS[:2]
+    assert build_formats(len(FORMATS) + 1)[-1] == f"Format {len(FORMATS) + 1}"
+    assert build_formats(["Video"]) == ["Video"]
+
+
+# -------------------------------
+# GENERATION
+# -------------------------------
+@pytest.mark.parametrize("seed, rows_per_week", [(42, 4), (7, 2)])
+def test_vectorized_engine_matches_the_loop(seed, rows_per_week):
+    report = parity_report(seed=seed, rows_per_week=rows_per_week)
+    assert report.attrs["schema_match"]
+    assert report.attrs["rows"] > 0
+    assert report["OK"].all(), report[~report["OK"]].to_string()
+
+
+@pytest.fixture(scope="module")
+def chunked_config():
+    # Two years and small chunks, so the dataset spans several chunks per year
+    return load_config(environ={"DATAGEN_YEARS": "2", "DATAGEN_CAMPAIGNS": "9", "DATAGEN_ROWS_PER_WEEK": "3",
+                                "DATAGEN_CHUNK_ROWS": "300"})
+
+
+def test_chunks_concatenate_to_the_dataset(chunked_config):
+    chunks = list(iter_chunks(chunked_config))
+    assert len(chunks) > 2
+    combined = pd.concat(chunks, ignore_index=True)
+    for col in OPTIONAL_COLUMNS:
+        combined[col] = combined[col].infer_objects()
+    dataset = load_dataset(chunked_config)
+    assert len(dataset) == estimate_rows(chunked_config)
+    pd.testing.assert_frame_equal(combined, dataset)
+
+
+def test_compact_dataset_holds_the_same_values(chunked_config):
+    dataset = load_dataset(chunked_config)
+    compact = load_dataset(chunked_config, compact=True)
+    assert list(compact.columns) == list(dataset.columns)
+    assert compact["Campaign"].astype(str).tolist() == dataset["Campaign"].astype(str).tolist()
+    assert compact["Spend ($)"].to_numpy() == pytest.approx(dataset["Spend ($)"].to_numpy(), rel=1e-6)
+    assert compact.attrs["data_version"] == dataset.attrs["data_version"]
@@ -0,0 +1,83 @@
+import pytest
+
+from charts import chart_data, prepare_chart_frame
+from context import count_tokens
+from cube import get_cube
+from datagen import load_config, load_dataset
+from digest import HEADER, MIN_ROWS, build_digest, digest_slices, with_digest
+from intent import route
+from tools import compact_table
+
+QUESTIONS = [
+    "Recommend optimal channel mixes for $100M, $200M, and $300M investment levels.",
+    "Determine which formats delivered the highest ROI.",
+    "Highlight months with the highest churn and distinguish internal vs. external drivers.",
+    "Which audience segment is underperforming?",
+    "What's driving ROAS on Social vs Display?",
+    "Summarise performance"
+]
+
+
+@pytest.fixture(scope="module")
+def df():
+    config = load_config(environ={"DATAGEN_CAMPAIGNS": "12", "DATAGEN_ROWS_PER_WEEK": "10"})
+    return prepare_chart_frame(load_dataset(config, compact=True))
+
+
+def _block(title, data, rows=None):
+    return f"[{title}]\n{compact_table(data, max_rows=len(data) if rows is None else rows)}"
+
+
+@pytest.mark.parametrize("question", QUESTIONS)
+@pytest.mark.parametrize("budget", [30, 60, 120, 250, 400, 2000])
+def test_digest_stays_within_budget(df, question, budget):
+    text, tokens = build_digest(question, df, budget=budget)
+    assert tokens <= budget
+    assert tokens == count_tokens(text)
+    assert not text or text.startswith(HEADER)
+
+
+@pytest.mark.parametrize("budget", [0, -5])
+def test_no_budget_no_digest(df, budget):
+    assert build_digest(QUESTIONS[0], df, budget=budget) == ("", 0)
+
+
+@pytest.mark.parametrize("question", QUESTIONS)
+def test_first_slice_is_the_chart_data(df, question):
+    intent = route(question)[0]
+    title, data = digest_slices(question, df)[0]
+    assert title == f"Chart: {intent.replace('_', ' ')}"
+    expected = chart_data(intent, get_cube(df))
+    assert list(data.columns) == list(expected.columns)
+    assert data.to_numpy().tolist() == expected.to_numpy().tolist()
+    text, _ = build_digest(question, df, budget=10_000)
+    assert _block(title, data) in text
+
+
+def test_first_slice_that_does_not_fit_is_cut_and_ends_the_digest(df):
+    question = QUESTIONS[0]
+    slices = digest_slices(question, df)
+    first = _block(*slices[0])
+    second = _block(*slices[1], rows=4)
+    assert len(slices) > 2 and len(slices[1][1]) > 4
+    # Room for the header, the first slice and four rows of the second
+    budget = count_tokens(HEADER) + count_tokens(first) + count_tokens(second)
+    text, _ = build_digest(question, df, budget=budget)
+    assert text.startswith(f"{HEADER}\n{first}\n[{slices[1][0]}]")
+    assert "more rows)" in text
+    assert text.count("\n[") == 2  # nothing after the truncated slice
+
+
+def test_slice_squeezed_below_min_rows_is_dropped(df):
+    question = QUESTIONS[3]
+    title, data = digest_slices(question, df)[0]
+    assert len(data) > MIN_ROWS
+    # Enough for the header and one row of the first slice, not MIN_ROWS
+    budget = count_tokens(HEADER) + count_tokens(_block(title, data, rows=MIN_ROWS)) - 1
+    assert build_digest(question, df, budget=budget) == ("", 0)
+
+
+def test_digest_goes_just_before_the_question():
+    messages = [{"role": "system", "content": "s"}, {"role": "user", "content": "q"}]
+    assert with_digest(messages, "") == messages
+    assert with_digest(messages, "d") == [messages[0], {"role": "system", "content": "d"}, messages[1]]
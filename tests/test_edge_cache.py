@@ -0,0 +1,203 @@
+import threading
+from email.utils import formatdate
+
+import pytest
+
+from edge_cache import (HIT, MISS, REVALIDATED, EdgeCache, bypasses_cache, cache_control, etag_matches,
+                        freshness_lifetime, get_edge_cache)
+
+NOW = 1_700_000_000.0
+
+
+def _date(offset=0):
+    return formatdate(NOW + offset, usegmt=True)
+
+
+# -------------------------------
+# HEADERS
+# -------------------------------
+def test_cache_control_parsing():
+    assert cache_control('public, max-age=60, s-maxage="120", No-Cache') == {
+        "public": "", "max-age": "60", "s-maxage": "120", "no-cache": ""}
+    assert cache_control(None) == {}
+
+
+@pytest.mark.parametrize("headers, lifetime", [
+    ([("Cache-Control", "public, max-age=60")], 60),
+    ([("Cache-Control", "max-age=60, s-maxage=600")], 600),  # shared caches prefer s-maxage
+    ([("Cache-Control", "max-age=-5")], 0),
+    ([("Cache-Control", "max-age=soon")], 0),
+    ([("Expires", _date(300)), ("Date", _date())], 300),
+    ([("Expires", _date(-300)), ("Date", _date())], 0),
+    ([("Cache-Control", "max-age=10"), ("Expires", _date(300)), ("Date", _date())], 10),
+    ([("Expires", "0")], None),
+    ([("ETag", '"v1"')], None)
+])
+def test_freshness_lifetime(headers, lifetime):
+    assert freshness_lifetime(headers) == lifetime
+
+
+@pytest.mark.parametrize("if_none_match, etag, matches", [
+    ('"v1"', '"v1"', True),
+    ('W/"v1"', '"v1"', True),
+    ('"v1"', 'W/"v1"', True),
+    ('"v0", "v1"', '"v1"', True),
+    ("*", '"v1"', True),
+    ('"v2"', '"v1"', False),
+    ("", '"v1"', False),
+    ('"v1"', "", False),
+    (None, '"v1"', False)
+])
+def test_etag_matches_weakly(if_none_match, etag, matches):
+    assert etag_matches(if_none_match, etag) is matches
+
+
+def test_requests_that_bypass_the_cache():
+    assert not bypasses_cache("GET", [])
+    assert not bypasses_cache("HEAD", [("Cache-Control", "no-cache")])
+    assert bypasses_cache("POST", [])
+    assert bypasses_cache("GET", [("Cache-Control", "no-store")])
+    assert bypasses_cache("GET", [("Authorization", "Bearer x")])
+
+
+# -------------------------------
+# STORABLE
+# -------------------------------
+@pytest.mark.parametrize("status, headers, storable", [
+    (200, [("Cache-Control", "public, max-age=60")], True),
+    (200, [("ETag", '"v1"')], True),
+    (200, [("Last-Modified", _date())], True),
+    (200, [("Cache-Control", "no-cache"), ("ETag", '"v1"')], True),
+    (200, [("Content-Type", "text/html")], False),  # no lifetime, nothing to revalidate with
+    (404, [("Cache-Control", "max-age=60")], False),
+    (200, [("Cache-Control", "max-age=60"), ("Set-Cookie", "session=1")], False),
+    (200, [("Cache-Control", "private, max-age=60")], False),
+    (200, [("Cache-Control", "no-store, max-age=60")], False),
+    (200, [("Cache-Control", "max-age=60"), ("Vary", "Accept-Encoding")], True),
+    (200, [("Cache-Control", "max-age=60"), ("Vary", "Accept-Encoding, Cookie")], False),
+    (200, [("Cache-Control", "max-age=60"), ("Vary", "*")], False)
+])
+def test_storable(status, headers, storable):
+    assert EdgeCache(1024).storable(status, headers, 10) is storable
+
+
+def test_entries_over_the_size_limit_are_not_stored():
+    cache = EdgeCache(1024, max_entry_bytes=100)
+    assert cache.put("/big", 200, [("Cache-Control", "max-age=60")], b"x" * 101) is None
+    assert cache.put("/small", 200, [("Cache-Control", "max-age=60")], b"x" * 100) is not None
+
+
+# -------------------------------
+# FRESHNESS AND REVALIDATION
+# -------------------------------
+def test_entry_goes_stale_after_its_lifetime_and_age():
+    cache = EdgeCache(1024)
+    entry = cache.put("/a", 200, [("Cache-Control", "max-age=60"), ("Age", "20")], b"body", now=NOW)
+    assert entry.is_fresh(NOW + 39)
+    assert not entry.is_fresh(NOW + 40)
+    headers = dict(EdgeCache.response_headers(entry, HIT, now=NOW + 10))
+    assert (headers["Age"], headers["Content-Length"], headers["X-Cache"]) == ("30", "4", HIT)
+
+
+def test_no_cache_entries_are_always_revalidated():
+    entry = EdgeCache(1024).put("/a", 200, [("Cache-Control", "no-cache, max-age=600"), ("ETag", '"v1"')], b"b", now=NOW)
+    assert not entry.is_fresh(NOW)
+    assert entry.validators() == {"If-None-Match": '"v1"'}
+
+
+def test_refresh_from_a_304():
+    cache = EdgeCache(1024)
+    stale = cache.put("/a", 200, [("Cache-Control", "max-age=60"), ("ETag", '"v1"'), ("Content-Type", "text/css"),
+                                  ("Last-Modified", _date(-1000))], b"body", now=NOW)
+    assert stale.validators() == {"If-None-Match": '"v1"', "If-Modified-Since": _date(-1000)}
+    later = NOW + 120
+    assert not stale.is_fresh(later)
+    refreshed = cache.refresh(stale, [("Cache-Control", "max-age=300"), ("ETag", '"v1"'), ("X-Other", "ignored")],
+                              now=later)
+    assert refreshed.is_fresh(later + 299) and not refreshed.is_fresh(later + 300)
+    assert refreshed.body == b"body"
+    assert ("Content-Type", "text/css") in refreshed.headers
+    assert ("X-Other", "ignored") not in refreshed.headers
+    assert cache.get("/a").lifetime == 300
+    assert len(cache) == 1 and cache.bytes_stored == 4
+
+
+# -------------------------------
+# LRU
+# -------------------------------
+def test_least_recently_used_entries_are_evicted_first():
+    cache = EdgeCache(max_bytes=30)
+    fresh = [("Cache-Control", "max-age=60")]
+    for name in "abc":
+        cache.put(f"/{name}", 200, fresh, b"x" * 10)
+    cache.get("/a")  # now the most recently used
+    cache.put("/d", 200, fresh, b"x" * 10)
+    assert cache.get("/b") is None
+    assert [cache.get(f"/{name}") is not None for name in "acd"] == [True, True, True]
+    assert cache.bytes_stored == 30
+
+
+def test_replacing_an_entry_does_not_count_it_twice():
+    cache = EdgeCache(max_bytes=30)
+    cache.put("/a", 200, [("Cache-Control", "max-age=60")], b"x" * 10)
+    cache.put("/a", 200, [("Cache-Control", "max-age=60")], b"x" * 20)
+    assert (len(cache), cache.bytes_stored) == (1, 20)
+
+
+def test_disk_entries_survive_a_restart_and_keep_lru_order(tmp_path):
+    cache = EdgeCache(max_bytes=30, directory=str(tmp_path))
+    for i, name in enumerate("ab"):
+        cache.put(f"/{name}", 200, [("ETag", f'"{name}"')], name.encode() * 10, now=NOW + i)
+    reopened = EdgeCache(max_bytes=20, directory=str(tmp_path))
+    assert reopened.get("/a").body == b"a" * 10
+    reopened.put("/c", 200, [("ETag", '"c"')], b"c" * 10)
+    assert reopened.get("/b") is None
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".body", ".body", ".json", ".json"]
+
+
+def test_stats_and_configuration():
+    cache = EdgeCache(1024)
+    for state, size in ((HIT, 100), (REVALIDATED, 50), (MISS, 0), (MISS, 0)):
+        cache.record(state, size)
+    stats = cache.stats()
+    assert (stats["hits"], stats["revalidated"], stats["misses"], stats["bytes_saved"]) == (1, 1, 2, 150)
+    assert stats["hit_ratio"] == 0.5
+    assert get_edge_cache({"PROXY_CACHE_SIZE": "0"}) is None
+    assert get_edge_cache({"PROXY_CACHE_SIZE": "100", "PROXY_CACHE_MAX_ENTRY": "500"}).max_entry_bytes == 100
+
+
+# -------------------------------
+# THROUGH THE PROXY
+# -------------------------------
+def test_stale_entry_is_revalidated_through_the_proxy(monkeypatch):
+    pytest.importorskip("flask")
+    from werkzeug.serving import make_server
+    from werkzeug.wrappers import Request, Response
+
+    import app as proxy_app
+
+    seen = []
+
+    @Request.application
+    def upstream(request):
+        seen.append(request.headers.get("If-None-Match"))
+        headers = {"Cache-Control": "max-age=0", "ETag": '"v1"', "Content-Type": "text/javascript"}
+        if request.headers.get("If-None-Match") == '"v1"':
+            return Response(status=304, headers=headers)
+        return Response("console.log(1)", headers=headers)
+
+    server = make_server("127.0.0.1", 0, upstream, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        monkeypatch.setattr(proxy_app, "TARGET_URL", f"http://127.0.0.1:{server.server_port}")
+        monkeypatch.setattr(proxy_app, "edge", EdgeCache(1024 * 1024))
+        client = proxy_app.app.test_client()
+        first = client.get("/static/app.js", headers={"Accept-Encoding": "identity"})
+        second = client.get("/static/app.js", headers={"Accept-Encoding": "identity"})
+        conditional = client.get("/static/app.js", headers={"Accept-Encoding": "identity", "If-None-Match": '"v1"'})
+    finally:
+        server.shutdown()
+    assert (first.status_code, first.headers["X-Cache"]) == (200, MISS)
+    assert (second.status_code, second.headers["X-Cache"], second.data) == (200, REVALIDATED, b"console.log(1)")
+    assert (conditional.status_code, conditional.headers["X-Cache"]) == (304, HIT)
+    assert seen == [None, '"v1"', '"v1"']
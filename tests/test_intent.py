@@ -0,0 +1,52 @@
+import csv
+import os
+
+import pytest
+
+from intent import DEFAULT_INTENT, _compile, rank_intents, route, specificity
+
+QUERIES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "intent_queries.csv")
+MIN_TOP1 = 0.95
+MIN_TOP2 = 0.98
+
+
+def _labelled():
+    with open(QUERIES, newline="") as f:
+        return [(row["query"], row["intent"]) for row in csv.DictReader(f)]
+
+
+def test_accuracy_on_labelled_queries():
+    labelled = _labelled()
+    ranked = [[intent for intent, _ in rank_intents(query)] for query, _ in labelled]
+    top1 = sum(r[0] == label for r, (_, label) in zip(ranked, labelled)) / len(labelled)
+    top2 = sum(label in r[:2] for r, (_, label) in zip(ranked, labelled)) / len(labelled)
+    assert top1 >= MIN_TOP1
+    assert top2 >= MIN_TOP2
+
+
+def test_specificity_is_the_shortest_match_not_the_source_length():
+    assert specificity(r"\$\d+(?:\.\d+)?\s?[mk]\b") == 3
+    assert specificity(r"channel mix\w*") == 11
+    assert specificity(r"social (?:vs\.?|versus|or|and) display") == 17
+
+
+def test_phrase_is_not_shadowed_by_a_longer_pattern_source():
+    # "(?:q1|q2|q3|q4)" has the longer source but matches only two characters
+    pattern, weights = _compile({"quarter": [(r"(?:q1|q2|q3|q4)", 1)], "budget": [(r"q1 budget", 3)]})
+    assert weights[pattern.search("review the q1 budget").lastgroup] == ("budget", 3)
+    assert weights[pattern.search("q1 results").lastgroup] == ("quarter", 1)
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("What is our return on investment by format?", "format_roi"),
+    ("Compare social vs display", "social_display"),
+    ("Which channel mix works best?", "channel_mix"),
+    ("Show the click-to-conversion rate", "conversion")
+])
+def test_phrases_beat_the_words_inside_them(query, intent):
+    assert rank_intents(query)[0][0] == intent
+
+
+def test_no_match_falls_back_to_the_channel_chart():
+    assert rank_intents("hello there") == [(DEFAULT_INTENT, 0.0)]
+    assert route("hello there") == [DEFAULT_INTENT]
@@ -0,0 +1,78 @@
+import pytest
+from groq import Groq
+
+from benchmarks.mock_groq import MockGroq
+from llm import complete
+from model_router import DEFAULT_FAST, ModelRouter, complexity, get_model_router
+from ratelimit import get_rate_limiter
+
+LARGE = "llama-3.3-70b-versatile"
+
+LOOKUPS = [
+    "👥 Which audience segment is underperforming?",
+    "📊 Determine which formats delivered the highest ROI.",
+    "🎥 Is Video or Static driving higher engagement?",
+    "Which channel converts best?",
+    "CPA by format please"
+]
+PLANNING = [
+    "💰 Recommend optimal channel mixes for $100M, $200M, and $300M investment levels.",
+    "How should we allocate a $200M budget across channels?",
+    "Plan a $300M scenario with awareness included",
+    "What is the best media mix if spend drops to $100M?"
+]
+
+
+@pytest.mark.parametrize("query", LOOKUPS)
+def test_lookups_stay_on_the_fast_model(query):
+    choice = ModelRouter(large=LARGE).choose(query)
+    assert (choice.tier, choice.model) == ("fast", DEFAULT_FAST)
+
+
+@pytest.mark.parametrize("query", PLANNING)
+def test_scenario_planning_goes_to_the_large_model(query):
+    choice = ModelRouter(large=LARGE).choose(query)
+    assert (choice.tier, choice.model) == ("large", LARGE)
+    assert "scenario" in choice.signals
+
+
+def test_scenario_signals():
+    score, signals = complexity(PLANNING[0])
+    assert signals == {"scenario": 2, "amounts": 2, "reasoning": 1}
+    assert score == 5
+    assert complexity(LOOKUPS[0]) == (0, {})
+
+
+def test_large_tier_is_opt_in():
+    router = get_model_router({})
+    assert router.tiers == ["fast"]
+    assert router.choose(PLANNING[0]).model == DEFAULT_FAST
+    router = get_model_router({"GROQ_LARGE_MODEL": LARGE, "GROQ_LARGE_THRESHOLD": "5"})
+    assert router.tiers == ["fast", "large"]
+    assert router.choose(PLANNING[0]).tier == "large"
+    assert router.choose(PLANNING[1]).tier == "fast"
+
+
+def test_each_tier_has_its_own_limiter():
+    environ = {"GROQ_RPM": "30", "GROQ_TPM": "6000", "GROQ_LARGE_RPM": "30", "GROQ_LARGE_TPM": "12000"}
+    fast = get_rate_limiter(environ, tier="fast")
+    large = get_rate_limiter(environ, tier="large")
+    assert fast is not large
+    assert fast is get_rate_limiter(environ, tier="fast")
+    assert large.tokens.rate == 12000 / 60
+
+
+def test_routed_calls_reach_the_chosen_model():
+    mock = MockGroq(delay_ms=0).start()
+    try:
+        client = Groq(api_key="test", base_url=mock.url, max_retries=0)
+        router = ModelRouter(large=LARGE)
+        for query in LOOKUPS + PLANNING:
+            metrics = {}
+            choice = router.choose(query)
+            complete(client, [{"role": "user", "content": query}], model=choice.model, metrics=metrics)
+            assert metrics["model"] == choice.model
+            assert metrics["usage_prompt_tokens"] > 0
+    finally:
+        mock.stop()
+    assert mock.models == {DEFAULT_FAST: len(LOOKUPS), LARGE: len(PLANNING)}
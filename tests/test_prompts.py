@@ -0,0 +1,31 @@
+from datagen import CAMPAIGNS, build_campaigns, load_config
+from prompts import data_facts, get_prompt
+
+
+def test_facts_follow_the_default_dataset():
+    facts, total = data_facts(load_config(environ={}))
+    assert total == sum(spec["spend_annual"] for spec in CAMPAIGNS.values())
+    assert "FY2025: April 2024 - March 2025" in facts
+    assert f"{len(CAMPAIGNS)} campaigns, 7 publishers" in facts
+
+
+def test_facts_follow_a_resized_dataset():
+    config = load_config(environ={"DATAGEN_YEARS": "3", "DATAGEN_CAMPAIGNS": "14", "DATAGEN_PUBLISHERS": "10",
+                                  "DATAGEN_FORMATS": "Video,Static"})
+    facts, total = data_facts(config)
+    assert total == sum(spec["spend_annual"] for spec in build_campaigns(config).values())
+    assert "FY2025-FY2027: April 2024 - March 2027" in facts
+    assert "14 campaigns, 10 publishers" in facts
+    assert "2 formats (Video, Static)" in facts
+    assert "Campaigns 7-14 repeat these" in facts
+    assert "Carousel" not in facts
+
+
+def test_prompt_id_is_bound_to_the_dataset_config():
+    default = get_prompt(2, config=load_config(environ={}))
+    resized = get_prompt(2, config=load_config(environ={"DATAGEN_CAMPAIGNS": "12"}))
+    assert default.id != resized.id
+    assert get_prompt(2, config=load_config(environ={})) is default
+    # Version 1 is fixed prose
+    resized_v1 = get_prompt(1, config=load_config(environ={"DATAGEN_CAMPAIGNS": "12"}))
+    assert get_prompt(1, config=load_config(environ={})).id == resized_v1.id
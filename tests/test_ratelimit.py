@@ -0,0 +1,148 @@
+import threading
+import time
+
+import pytest
+from groq import Groq
+
+import ratelimit
+from benchmarks.mock_groq import MockGroq
+from llm import complete
+from ratelimit import QueueFull, RateLimiter, TokenBucket, backoff, retry_after
+
+
+class ApiError(Exception):
+    """Stand-in for an SDK error: a status code and the response headers"""
+
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.response = type("Response", (), {"headers": headers or {}, "status_code": status})()
+
+
+# -------------------------------
+# TOKEN BUCKET
+# -------------------------------
+def test_bucket_bursts_then_throttles_and_refills():
+    bucket = TokenBucket(per_minute=60, burst=3)  # 1 per second, 3 back to back
+    start = bucket.updated
+    for _ in range(3):
+        assert bucket.wait_time(1, start) == 0
+        bucket.take(1)
+    assert bucket.wait_time(1, start) == pytest.approx(1.0)
+    assert bucket.wait_time(1, start + 0.25) == pytest.approx(0.75)
+    assert bucket.wait_time(1, start + 1.0) == 0
+    # Refill stops at the burst size
+    assert bucket.wait_time(1, start + 3600) == 0
+    assert bucket.level == pytest.approx(3)
+
+
+def test_bucket_pays_back_overuse_and_caps_large_requests():
+    bucket = TokenBucket(per_minute=600, burst=6)  # 10 per second, capacity 60
+    start = bucket.updated
+    bucket.take(90)  # usage settled above the reservation
+    assert bucket.wait_time(1, start) == pytest.approx(3.1)
+    # A request larger than the bucket waits for a full bucket, not forever
+    assert bucket.wait_time(1000, start + 3.0) == pytest.approx(6.0)
+
+
+# -------------------------------
+# QUEUE
+# -------------------------------
+def test_queue_full_turns_new_requests_away():
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=0, max_queue=2, burst=1)
+    limiter.acquire(1)  # spends the only request in the bucket
+    waiting = [threading.Thread(target=limiter.acquire, args=(1,), daemon=True) for _ in range(2)]
+    for thread in waiting:
+        thread.start()
+    while limiter.stats()["queued"] < 2:
+        time.sleep(0.01)
+    with pytest.raises(QueueFull):
+        limiter.acquire(1)
+    assert limiter.stats()["rejected"] == 1
+    with limiter._cond:
+        limiter.requests = None  # lift the limit so the waiters drain
+        limiter._cond.notify_all()
+    for thread in waiting:
+        thread.join(2)
+    assert limiter.stats()["admitted"] == 3
+
+
+def test_on_wait_reports_queue_position():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=0, burst=0.1)  # one per 0.1 s
+    limiter.acquire(1)
+    reports = []
+    limiter.acquire(1, on_wait=lambda position, seconds: reports.append((position, seconds)))
+    assert reports and reports[0][0] == 0 and 0 < reports[0][1] <= 0.1
+
+
+# -------------------------------
+# RETRIES
+# -------------------------------
+def test_retry_after_header_as_seconds_or_date():
+    assert retry_after(ApiError(429, {"retry-after": "7"})) == 7.0
+    assert retry_after(ApiError(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}), now=1445412470) == 10.0
+    assert retry_after(ApiError(429)) is None
+
+
+def test_backoff_is_full_jitter():
+    samples = [backoff(3, base=1.0, cap=30.0) for _ in range(2000)]
+    assert min(samples) >= 0 and max(samples) <= 8.0
+    # Uniform over [0, 8]: spread over the whole range, not clustered at the cap
+    assert min(samples) < 0.5 and max(samples) > 7.5
+    assert sum(samples) / len(samples) == pytest.approx(4.0, abs=0.4)
+    assert max(backoff(20, base=1.0, cap=30.0) for _ in range(200)) <= 30.0
+
+
+def test_call_honours_retry_after(monkeypatch):
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_retries=3)
+    pauses = []
+    monkeypatch.setattr(limiter, "pause", pauses.append)
+    monkeypatch.setattr(ratelimit.random, "uniform", lambda low, high: 0.0)
+    errors = [ApiError(429, {"retry-after": "2"}), ApiError(503, {"retry-after": "5"})]
+
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    metrics = {}
+    assert limiter.call(fn, 10, metrics=metrics) == "ok"
+    assert pauses == [2.0, 5.0]
+    assert metrics["retries"] == 2
+    assert limiter.stats()["throttled"] == 2
+
+
+def test_call_backs_off_without_retry_after_and_gives_up(monkeypatch):
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_retries=2)
+    pauses, attempts = [], []
+    monkeypatch.setattr(limiter, "pause", pauses.append)
+    monkeypatch.setattr(ratelimit, "backoff", lambda attempt: attempts.append(attempt) or 0.0)
+    with pytest.raises(ApiError):
+        limiter.call(lambda: (_ for _ in ()).throw(ApiError(429)), 10)
+    assert attempts == [0, 1]
+    assert len(pauses) == 2
+
+
+def test_other_errors_are_not_retried():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    with pytest.raises(ApiError):
+        limiter.call(lambda: (_ for _ in ()).throw(ApiError(400)), 10)
+    assert limiter.stats()["retries"] == 0
+
+
+def test_limiter_rides_out_429s_from_the_mock_api():
+    mock = MockGroq(limit=2, window=1.0, delay_ms=0).start()
+    try:
+        client = Groq(api_key="test", base_url=mock.url, max_retries=0)
+        limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0, max_retries=4)
+        start = time.perf_counter()
+        for i in range(4):
+            complete(client, [{"role": "user", "content": f"question {i}"}], limiter=limiter)
+        elapsed = time.perf_counter() - start
+    finally:
+        mock.stop()
+    # The third request hit the window limit; its Retry-After (1 s) was waited out before retrying
+    assert mock.requests == 4
+    assert mock.throttled >= 1
+    assert elapsed >= 1.0
+    assert limiter.stats()["retries"] == mock.throttled
@@ -0,0 +1,53 @@
+from response_cache import ResponseCache, cache_key
+from semantic_cache import INITIAL_ROWS, SemanticCache
+
+
+def _put(cache, question, now=None):
+    cache.put(cache_key("m", "p", question, "v"), f"answer to {question}", question=question, scope="s", now=now)
+
+
+def test_index_follows_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_entries=5)
+    semantic = SemanticCache(cache, audit_path="")
+    for i in range(40):
+        _put(cache, f"which formats delivered the highest roi in week {i}")
+        semantic.lookup("s", "best format roi")
+        assert len(semantic) <= 5
+    assert set(semantic._keys) == cache.keys()
+
+
+def test_index_drops_expired_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), ttl=10)
+    semantic = SemanticCache(cache, audit_path="")
+    _put(cache, "which formats delivered the highest roi", now=0)
+    semantic.lookup("s", "best format roi", now=1)
+    assert len(semantic) == 1
+    # A later write purges the expired row from SQLite; the next sync follows
+    _put(cache, "is video or static driving higher engagement", now=100)
+    response, _ = semantic.lookup("s", "best format roi", now=100)
+    assert response is None
+    assert len(semantic) == 1
+
+
+def test_buffer_grows_without_losing_rows(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_entries=1000)
+    semantic = SemanticCache(cache, audit_path="")
+    questions = [f"channel mix for week {i} spend" for i in range(INITIAL_ROWS * 2 + 3)]
+    for question in questions:
+        _put(cache, question)
+    semantic.lookup("s", "anything")
+    assert len(semantic) == len(questions)
+    assert len(semantic._matrix) >= len(questions)
+    response, match = semantic.lookup("s", questions[-1])
+    assert response == f"answer to {questions[-1]}"
+    assert match["question"] == questions[-1]
+
+
+def test_replaced_key_keeps_one_row(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    semantic = SemanticCache(cache, audit_path="")
+    _put(cache, "which audience segment is underperforming")
+    semantic.lookup("s", "weakest segment")
+    _put(cache, "which audience segment is underperforming")
+    semantic.lookup("s", "weakest segment")
+    assert len(semantic) == 1
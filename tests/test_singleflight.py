@@ -0,0 +1,86 @@
+import gc
+import threading
+import time
+
+import pytest
+
+from singleflight import FlightAbandoned, FlightTimeout, SingleFlight
+
+
+def _slow(chunks, delay):
+    for chunk in chunks:
+        time.sleep(delay)
+        yield chunk
+
+
+def test_followers_replay_the_leaders_stream():
+    flights = SingleFlight()
+    lead, shared = flights.stream("k", lambda: _slow(["a", "b", "c"], 0.01))
+    follow, follower_shared = flights.stream("k", lambda: pytest.fail("second upstream call"))
+    assert (shared, follower_shared) == (False, True)
+    result = []
+    thread = threading.Thread(target=lambda: result.append("".join(follow)))
+    thread.start()
+    assert "".join(lead) == "abc"
+    thread.join(5)
+    assert result == ["abc"]
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_unread_leader_releases_followers_and_the_key():
+    flights = SingleFlight()
+    lead, _ = flights.stream("k", lambda: pytest.fail("never read, never called"))
+    follow, shared = flights.stream("k", lambda: iter(()))
+    assert shared
+    del lead
+    gc.collect()
+    with pytest.raises(FlightAbandoned):
+        "".join(follow)
+    fresh, shared = flights.stream("k", lambda: iter(["x"]))
+    assert not shared
+    assert "".join(fresh) == "x"
+
+
+def test_follower_times_out_and_unregisters_a_stuck_flight():
+    flights = SingleFlight(timeout=0.05)
+    lead, _ = flights.stream("k", lambda: iter(["x"]))  # held, never read
+    follow, _ = flights.stream("k", lambda: iter(()))
+    with pytest.raises(FlightTimeout):
+        "".join(follow)
+    _, shared = flights.stream("k", lambda: iter(["y"]))
+    assert not shared
+    del lead
+
+
+def test_closing_the_leader_does_not_wait_for_the_drain():
+    flights = SingleFlight()
+    lead, _ = flights.stream("k", lambda: _slow(["a"] + ["b"] * 20, 0.02))
+    follow, _ = flights.stream("k", lambda: iter(()))
+    assert next(lead) == "a"
+    start = time.perf_counter()
+    lead.close()
+    assert time.perf_counter() - start < 0.1
+    assert "".join(follow) == "a" + "b" * 20
+
+
+def test_do_shares_one_call():
+    flights = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def call():
+        calls.append(1)
+        gate.wait(5)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("k", call))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flights.stats()["shared"] < 4:
+        time.sleep(0.01)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert sorted(results) == [("answer", False)] + [("answer", True)] * 4
@@ -0,0 +1,127 @@
+import json
+
+import pandas as pd
+import pytest
+
+from charts import prepare_chart_frame
+from cube import AggregateCube
+from datagen import load_config, load_dataset
+from tools import DataTools, compact_table
+
+
+@pytest.fixture(scope="module")
+def df():
+    config = load_config(environ={"DATAGEN_CAMPAIGNS": "12", "DATAGEN_ROWS_PER_WEEK": "10"})
+    return prepare_chart_frame(load_dataset(config, compact=True))
+
+
+@pytest.fixture(scope="module")
+def tools(df):
+    return DataTools(df)
+
+
+@pytest.fixture
+def rollups(monkeypatch):
+    """Counts the queries answered from the cube"""
+    calls = []
+    rollup = AggregateCube.rollup
+
+    def counting(self, *args, **kwargs):
+        calls.append(args[0])
+        return rollup(self, *args, **kwargs)
+
+    monkeypatch.setattr(AggregateCube, "rollup", counting)
+    return calls
+
+
+def _direct(df, by, agg, mask=None):
+    frame = df if mask is None else df[mask]
+    return frame.groupby(by, observed=True).agg(agg).reset_index()
+
+
+def _assert_same(result, expected, by):
+    result = result.set_index(by).sort_index()
+    expected = expected.set_index(by).sort_index()
+    assert list(result.index) == list(expected.index)
+    for col in expected.columns:
+        assert result[col].to_numpy(dtype=float) == pytest.approx(expected[col].to_numpy(dtype=float))
+
+
+# -------------------------------
+# QUERIES VS A DIRECT GROUPBY
+# -------------------------------
+def test_group_by_metric_from_the_cube(df, tools, rollups):
+    result = tools.group_by_metric(["Publisher"], ["ROAS", "Spend ($)"])
+    assert rollups
+    _assert_same(result, _direct(df, ["Publisher"], {"ROAS": "mean", "Spend ($)": "sum"}), ["Publisher"])
+    assert list(result["ROAS"]) == sorted(result["ROAS"], reverse=True)
+
+
+def test_group_by_metric_off_the_cube(df, tools, rollups):
+    result = tools.group_by_metric(["Campaign", "Format"], ["Impressions"], agg="sum")
+    assert not rollups
+    _assert_same(result, _direct(df, ["Campaign", "Format"], {"Impressions": "sum"}), ["Campaign", "Format"])
+
+
+def test_filters_and_week_range(df, tools, rollups):
+    fmt = str(df["Format"].iloc[0])
+    result = tools.group_by_metric("Publisher", "Conversions", filters={"Format": [fmt.lower()]}, week_from=5, week_to=10)
+    assert rollups
+    mask = (df["Format"] == fmt) & df["Week"].between(5, 10)
+    _assert_same(result, _direct(df, ["Publisher"], {"Conversions": "sum"}, mask), ["Publisher"])
+
+
+def test_top_n(df, tools):
+    result = tools.top_n("Publisher", "ROAS", n=3, order="lowest")
+    expected = df.groupby("Publisher", observed=True)["ROAS"].mean().nsmallest(3)
+    assert list(result["Publisher"]) == list(expected.index)
+    assert result["ROAS"].to_numpy() == pytest.approx(expected.to_numpy())
+
+
+def test_weekly_trend(df, tools):
+    result = tools.weekly_trend("Spend ($)")
+    _assert_same(result, _direct(df, ["Week"], {"Spend ($)": "sum"}), ["Week"])
+    wide = tools.weekly_trend("ROAS", period="month", by="Channel")
+    expected = df.groupby(["Month", "Channel"], observed=True)["ROAS"].mean().unstack()
+    assert list(wide.columns) == ["Month"] + [str(c) for c in expected.columns]
+    assert wide.drop(columns="Month").to_numpy(dtype=float) == pytest.approx(expected.to_numpy(dtype=float), nan_ok=True)
+
+
+def test_call_returns_a_compact_table(tools):
+    text = tools.call("top_n", json.dumps({"by": "Format", "metric": "ROAS", "n": 2}))
+    assert text.splitlines()[0] == "Format,ROAS"
+    assert len(text.splitlines()) == 3
+
+
+def test_compact_table_notes_truncated_rows():
+    text = compact_table(pd.DataFrame({"a": range(30), "b": [0.12345] * 30}), max_rows=2)
+    assert text == "a,b\n0,0.123\n1,0.123\n(+28 more rows)"
+
+
+# -------------------------------
+# MALFORMED ARGUMENTS
+# -------------------------------
+@pytest.mark.parametrize("name, arguments, error", [
+    ("group_by_metric", {"by": ["Publisher"], "metrics": ["ROAS"], "filters": ["x"]}, "filters must be an object"),
+    ("group_by_metric", {"by": ["Publisher"], "metrics": ["ROAS"], "filters": {"Format": "Video"}},
+     "filters['Format'] must be a non-empty list"),
+    ("group_by_metric", {"by": ["Publisher"], "metrics": ["ROAS"], "filters": {"Format": []}},
+     "filters['Format'] must be a non-empty list"),
+    ("group_by_metric", {"by": ["Publisher"], "metrics": ["ROAS"], "filters": {"Format": ["Hologram"]}},
+     "unknown Format values ['Hologram']"),
+    ("group_by_metric", {"by": [], "metrics": ["ROAS"]}, "by must name at least one dimension"),
+    ("group_by_metric", {"by": ["Publisher", "Publisher"], "metrics": ["ROAS"]}, "by lists 'Publisher' more than once"),
+    ("group_by_metric", {"by": ["Publisher"], "metrics": []}, "metrics must name at least one metric"),
+    ("group_by_metric", {"by": ["Colour"], "metrics": ["ROAS"]}, "unknown dimension 'Colour'"),
+    ("group_by_metric", {"by": ["Publisher"], "metrics": ["ROAS"], "agg": "median"}, "agg must be auto, mean or sum"),
+    ("top_n", {"by": "Publisher"}, "missing 1 required positional argument: 'metric'"),
+    ("top_n", {"by": "Publisher", "metric": "Mood"}, "unknown metric 'Mood'"),
+    ("weekly_trend", {"metric": "ROAS", "by": "Week"}, "by must be a dimension other than Week / Month"),
+    ("weekly_trend", {"metric": "ROAS", "week_from": 10, "week_to": 2}, "week_from must not be after week_to"),
+    ("weekly_trend", "{not json", "Expecting property name"),
+    ("forecast", {}, "unknown tool 'forecast'")
+])
+def test_bad_arguments_come_back_as_an_error(tools, name, arguments, error):
+    text = tools.call(name, arguments)
+    assert text.startswith("error: ")
+    assert error in text
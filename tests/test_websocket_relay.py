@@ -0,0 +1,84 @@
+import socket
+import threading
+
+import pytest
+
+pytest.importorskip("flask")
+websockets = pytest.importorskip("websockets")
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+from websockets.sync.server import serve
+from werkzeug.serving import make_server
+
+import app as proxy_app
+
+
+def _echo(ws):
+    """Echo every message; `/close` ends the socket from the upstream side, `/drop` without a close frame"""
+    if ws.request.path == "/close":
+        ws.close(4000, "upstream done")
+        return
+    if ws.request.path == "/drop":
+        ws.recv()
+        ws.socket.shutdown(socket.SHUT_RDWR)
+        return
+    for message in ws:
+        ws.send(message)
+
+
+@pytest.fixture
+def echo():
+    server = serve(_echo, "127.0.0.1", 0, compression=None)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.socket.getsockname()[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def proxy(monkeypatch, echo):
+    monkeypatch.setattr(proxy_app, "TARGET_URL", echo)
+    server = make_server("127.0.0.1", 0, proxy_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"ws://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_frames_round_trip(proxy):
+    with connect(f"{proxy}/_stcore/stream", compression=None, open_timeout=5) as ws:
+        for message in ("hello", b"\x00\xff" * 10, "x" * 200_000):
+            ws.send(message)
+            assert ws.recv(timeout=5) == message
+
+
+def test_client_close_reaches_upstream(proxy):
+    with connect(f"{proxy}/_stcore/stream", compression=None, open_timeout=5) as ws:
+        ws.send("ping")
+        assert ws.recv(timeout=5) == "ping"
+        ws.close(1000, "client done")
+    # The close handshake completed through the relay: the echo server answered the client's close frame
+    assert ws.protocol.close_rcvd is not None
+    assert ws.protocol.close_rcvd.code == 1000
+
+
+def test_upstream_close_reaches_client(proxy):
+    with connect(f"{proxy}/close", compression=None, open_timeout=5) as ws:
+        with pytest.raises(ConnectionClosed) as closed:
+            ws.recv(timeout=5)
+    assert closed.value.rcvd.code == 4000
+    assert closed.value.rcvd.reason == "upstream done"
+
+
+def test_upstream_drop_closes_client(proxy):
+    with connect(f"{proxy}/drop", compression=None, open_timeout=5) as ws:
+        ws.send("bye")
+        with pytest.raises(ConnectionClosed) as closed:
+            ws.recv(timeout=5)
+    # No close frame was sent upstream, so the client only sees the TCP connection end
+    assert closed.value.rcvd is None
+
+
+def test_unreachable_upstream_is_a_502(monkeypatch, proxy):
+    monkeypatch.setattr(proxy_app, "TARGET_URL", "http://127.0.0.1:1")
+    with pytest.raises(websockets.InvalidStatus) as refused:
+        connect(f"{proxy}/_stcore/stream", open_timeout=5)
+    assert refused.value.response.status_code == 502
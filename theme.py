@@ -0,0 +1,81 @@
+import re
+
+import streamlit as st
+
+# -------------------------------
+# PAGE CHROME
+# -------------------------------
+# Streamlit drops any element a rerun does not emit again, so the CSS still goes
+# out on every rerun; it is one pre-minified block built once per process.
+
+# Hide Streamlit branding and menu
+HIDE_CHROME_CSS = """
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    .stDeployButton {visibility: hidden;}
+"""
+
+APP_CSS = """
+    .stSidebar {
+        min-width: 336px;
+    }
+    .stSidebar .stHeading {
+        color: #FAFAFA;
+    }
+    .stSidebar .stElementContainer {
+        width: auto;
+    }
+    .stAppHeader {
+        display: none;
+    }
+    .stMainBlockContainer div[data-testid="stVerticalBlock"] > div[data-testid="stElementContainer"] > div[data-testid="stButton"] {
+        text-align: center;
+    }
+    .stMainBlockContainer div[data-testid="stVerticalBlock"] > div[data-testid="stElementContainer"] > div[data-testid="stButton"] button {
+        color: #FAFAFA;
+        border: 1px solid #FAFAFA33;
+        transition: all 0.3s ease;
+        background-color: #0E1117;
+        width: fit-content;
+    }
+    .stMainBlockContainer div[data-testid="stVerticalBlock"] > div[data-testid="stElementContainer"] > div[data-testid="stButton"] button:hover {
+        transform: translateY(-2px);
+    }
+"""
+
+HEADER_HTML = """
+<div>
+    <h1 style="text-align: center; font-size: 64px;">
+        <span style="color: #FAFAFA; text-shadow: 0 0 4px rgba(216, 237, 255, 0.16), 0 2px 20px rgba(164, 214, 255, 0.36);">dentsu</span>
+        <span style="background: radial-gradient(909.23% 218.25% at -4.5% 144.64%, #80D5FF 0%, #79AAFA 44.5%, #C4ADFF 100%); background-clip: text; -webkit-background-clip: text; -webkit-text-fill-color: transparent;">Conversational Analytics</span>
+    </h1>
+</div>
+"""
+
+DISCLAIMER_HTML = """
+<div style="background-color: #481d00; margin-bottom: 32px; padding: 16px; font-size: 14px; border-radius: 8px;">
+    <p style="margin: 0;">Legal Disclaimer — The insights and visualisations generated by this tool are for informational purposes only and should not be considered financial, legal, or business advice.</p>
+</div>
+"""
+
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,>])\s*", r"\1", css).strip()
+
+
+STYLE_BLOCK = f"<style>{minify_css(HIDE_CHROME_CSS + APP_CSS)}</style>"
+
+
+def inject_css():
+    st.markdown(STYLE_BLOCK, unsafe_allow_html=True)
+
+
+def render_header():
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
+
+
+def render_disclaimer():
+    st.markdown("---")
+    st.markdown(DISCLAIMER_HTML, unsafe_allow_html=True)
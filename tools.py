@@ -0,0 +1,237 @@
+import csv
+import io
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from cube import get_cube
+from schema import DIMENSION_COLUMNS, RADIO_COLUMNS
+
+# -------------------------------
+# LIMITS
+# -------------------------------
+MAX_ROWS = 25  # per tool result; the model gets a "+N more rows" note beyond this
+MAX_TOP_N = 20
+MAX_GROUP_BY = 2
+MAX_METRICS = 4
+
+# Chart keys derived in charts.prepare_chart_frame()
+DERIVED_DIMENSIONS = ["Channel", "Channel Type", "Month", "Week"]
+NON_METRICS = {"FY Year", "Week", "Month"}
+
+# Rates, ratios and unit costs average; counts and dollar totals add up
+MEAN_MARKERS = ("(%)", "ROAS", "CPA", "Cost Per", "Time on Site", "Pages Per Session", "Frequency")
+
+
+def default_agg(metric):
+    return "mean" if any(marker in metric for marker in MEAN_MARKERS) else "sum"
+
+
+# -------------------------------
+# COMPACT TABLES
+# -------------------------------
+def _number(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    value = float(value)
+    if abs(value) >= 1000:
+        return f"{value:.0f}"
+    if abs(value) >= 1:
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    return f"{value:.3g}"
+
+
+def compact_table(frame, max_rows=MAX_ROWS):
+    """CSV with rounded numbers, truncated to max_rows: the cheapest table format in tokens"""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(frame.columns)
+    numeric = [pd.api.types.is_numeric_dtype(frame[col].dtype) for col in frame.columns]
+    for row in frame.head(max_rows).itertuples(index=False):
+        writer.writerow([_number(v) if is_num else v for v, is_num in zip(row, numeric)])
+    if len(frame) > max_rows:
+        out.write(f"(+{len(frame) - max_rows} more rows)\n")
+    return out.getvalue().rstrip("\n")
+
+
+# -------------------------------
+# AGGREGATE QUERIES
+# -------------------------------
+class DataTools:
+    """Whitelisted aggregate queries over the campaign frame, exposed as LLM tools
+
+    The model never sees rows: it picks dimensions / metrics / filters from
+    enums built from the frame's columns, and gets back a compact table.
+    Queries over cube dimensions are answered from the aggregate cube.
+    Bad arguments come back as an error string the model can correct.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.dimensions = [c for c in DIMENSION_COLUMNS + DERIVED_DIMENSIONS if c in df.columns]
+        self.metrics = [
+            c for c in df.columns
+            if c not in NON_METRICS and c not in RADIO_COLUMNS and c not in self.dimensions
+            and pd.api.types.is_numeric_dtype(df[c].dtype)
+        ]
+        self.weeks = (int(df["Week"].min()), int(df["Week"].max())) if len(df) else (1, 52)
+        self.schemas = self._schemas()
+        self._handlers = {"group_by_metric": self.group_by_metric, "top_n": self.top_n, "weekly_trend": self.weekly_trend}
+
+    # -- tool definitions --
+    def _schemas(self):
+        dimension = {"type": "string", "enum": self.dimensions}
+        metric = {"type": "string", "enum": self.metrics}
+        scope = {
+            "filters": {
+                "type": "object",
+                "description": "Keep only rows whose dimension is one of the listed values, e.g. {\"Publisher\": [\"Meta\", \"TikTok\"]}",
+                "additionalProperties": {"type": "array", "items": {"type": "string"}}
+            },
+            "week_from": {"type": "integer", "minimum": self.weeks[0], "maximum": self.weeks[1]},
+            "week_to": {"type": "integer", "minimum": self.weeks[0], "maximum": self.weeks[1]}
+        }
+        agg = {"type": "string", "enum": ["auto", "mean", "sum"],
+               "description": "auto: mean for rates / ROAS / unit costs, sum for counts and dollars"}
+
+        def tool(name, description, properties, required):
+            return {"type": "function", "function": {
+                "name": name, "description": description,
+                "parameters": {"type": "object", "properties": {**properties, **scope}, "required": required}
+            }}
+
+        return [
+            tool("group_by_metric", "Aggregate up to 4 metrics by up to 2 dimensions (FY weeks 1-52, week 1 = early April)", {
+                "by": {"type": "array", "items": dimension, "minItems": 1, "maxItems": MAX_GROUP_BY},
+                "metrics": {"type": "array", "items": metric, "minItems": 1, "maxItems": MAX_METRICS},
+                "agg": agg,
+                "sort_by": metric
+            }, ["by", "metrics"]),
+            tool("top_n", "Highest or lowest N values of a dimension ranked by one metric", {
+                "by": dimension,
+                "metric": metric,
+                "n": {"type": "integer", "minimum": 1, "maximum": MAX_TOP_N},
+                "order": {"type": "string", "enum": ["highest", "lowest"]},
+                "agg": agg
+            }, ["by", "metric"]),
+            tool("weekly_trend", "One metric per week or month, optionally split by one dimension", {
+                "metric": metric,
+                "period": {"type": "string", "enum": ["week", "month"]},
+                "by": dimension,
+                "agg": agg
+            }, ["metric"])
+        ]
+
+    # -- validation --
+    def _dimension(self, name):
+        if name not in self.dimensions:
+            raise ValueError(f"unknown dimension '{name}'; use one of {self.dimensions}")
+        return name
+
+    def _metric(self, name):
+        if name not in self.metrics:
+            raise ValueError(f"unknown metric '{name}'; use one of {self.metrics}")
+        return name
+
+    def _dimensions(self, names):
+        names = [names] if isinstance(names, str) else list(names)
+        if not names:
+            raise ValueError("by must name at least one dimension")
+        for name in names:
+            self._dimension(name)
+            if names.count(name) > 1:
+                raise ValueError(f"by lists '{name}' more than once")
+        return names[:MAX_GROUP_BY]
+
+    def _metrics(self, names):
+        names = [names] if isinstance(names, str) else list(names)
+        if not names:
+            raise ValueError("metrics must name at least one metric")
+        return list(dict.fromkeys(self._metric(name) for name in names))[:MAX_METRICS]
+
+    def _agg(self, metric, agg):
+        agg = agg or "auto"
+        if agg not in ("auto", "mean", "sum"):
+            raise ValueError("agg must be auto, mean or sum")
+        return default_agg(metric) if agg == "auto" else agg
+
+    def _filters(self, filters, week_from, week_to):
+        where = {}
+        if not isinstance(filters or {}, dict):
+            raise ValueError('filters must be an object of dimension → list of values, e.g. {"Publisher": ["Meta"]}')
+        for col, values in (filters or {}).items():
+            self._dimension(col)
+            if not isinstance(values, list) or not values:
+                raise ValueError(f"filters[{col!r}] must be a non-empty list of values")
+            series = self.df[col]
+            known = list(series.cat.categories) if isinstance(series.dtype, pd.CategoricalDtype) else list(series.unique())
+            lookup = {str(v).lower(): v for v in known}
+            missing = [v for v in values if str(v).lower() not in lookup]
+            if missing:
+                raise ValueError(f"unknown {col} values {missing}; use one of {[str(v) for v in known][:30]}")
+            where[col] = [lookup[str(v).lower()] for v in values]
+        if week_from is not None or week_to is not None:
+            lo = int(week_from if week_from is not None else self.weeks[0])
+            hi = int(week_to if week_to is not None else self.weeks[1])
+            if lo > hi:
+                raise ValueError("week_from must not be after week_to")
+            where["Week"] = list(range(lo, hi + 1))
+        return where
+
+    # -- evaluation --
+    def _aggregate(self, by, agg, where):
+        """Grouped aggregates, from the cube when every column involved is in it"""
+        cube = get_cube(self.df)
+        columns = set(by) | set(where)
+        if columns <= set(cube.dimensions) and set(agg) <= set(cube.measures):
+            return cube.rollup(by, agg, where=where)
+        mask = np.ones(len(self.df), dtype=bool)
+        for col, values in where.items():
+            mask &= self.df[col].isin(values).to_numpy()
+        frame = self.df.loc[mask, list(by) + list(agg)]
+        return frame.groupby(by, observed=True).agg(agg).reset_index()
+
+    def group_by_metric(self, by, metrics, agg="auto", sort_by=None, filters=None, week_from=None, week_to=None):
+        by, metrics = self._dimensions(by), self._metrics(metrics)
+        data = self._aggregate(by, {m: self._agg(m, agg) for m in metrics}, self._filters(filters, week_from, week_to))
+        sort_by = self._metric(sort_by) if sort_by else metrics[0]
+        if sort_by in data.columns:
+            data = data.sort_values(sort_by, ascending=False)
+        return data
+
+    def top_n(self, by, metric, n=5, order="highest", agg="auto", filters=None, week_from=None, week_to=None):
+        by, metric = self._dimension(by), self._metric(metric)
+        n = max(1, min(int(n), MAX_TOP_N))
+        data = self._aggregate([by], {metric: self._agg(metric, agg)}, self._filters(filters, week_from, week_to))
+        return data.sort_values(metric, ascending=order == "lowest").head(n)
+
+    def weekly_trend(self, metric, period="week", by=None, agg="auto", filters=None, week_from=None, week_to=None):
+        metric = self._metric(metric)
+        key = "Month" if period == "month" and "Month" in self.dimensions else "Week"
+        if by in ("Week", "Month"):
+            raise ValueError(f"by must be a dimension other than Week / Month; use period for the {key} axis")
+        keys = [key] + ([self._dimension(by)] if by else [])
+        data = self._aggregate(keys, {metric: self._agg(metric, agg)}, self._filters(filters, week_from, week_to))
+        data = data.sort_values(keys)
+        if by:
+            # One row per period, one column per group: far fewer tokens than long format
+            data = data.pivot(index=key, columns=keys[1], values=metric).reset_index()
+            data.columns = [str(c) for c in data.columns]
+        return data
+
+    # -- dispatch --
+    def call(self, name, arguments):
+        """Run a tool call from the model; always returns text for the tool message"""
+        try:
+            handler = self._handlers[name]
+        except KeyError:
+            return f"error: unknown tool '{name}'"
+        try:
+            kwargs = json.loads(arguments or "{}") if isinstance(arguments, str) else dict(arguments or {})
+            return compact_table(handler(**kwargs))
+        except (AttributeError, TypeError, ValueError, KeyError) as e:
+            return f"error: {e}"
@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+LOG_ENV = "TRACE_LOG"  # JSON lines file; "-" is stderr, empty disables
+METRICS_FILE_ENV = "TRACE_METRICS_FILE"  # Prometheus text file rewritten as traces finish; empty disables
+
+DEFAULT_LOG = "-"
+METRICS_FILE_INTERVAL = 1.0  # seconds between rewrites of TRACE_METRICS_FILE
+
+# Histogram buckets in seconds: proxy hops sit at the low end, LLM calls at the high end
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# -------------------------------
+# METRICS REGISTRY
+# -------------------------------
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """Process-wide counters and histograms, exported in the Prometheus text format
+
+    Names and labels follow Prometheus conventions (`_total` counters,
+    `_seconds` histograms); no client library or server is needed, the
+    text is served by app.py or written to TRACE_METRICS_FILE.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            counts, total, n = self._histograms.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._histograms[key] = (counts, total + value, n + 1)
+
+    def render(self):
+        """Prometheus text exposition of every series"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._histograms.items())
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name in typed:
+                return
+            typed.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), (counts, total, n) in histograms:
+            header(name, "histogram")
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {n}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {n}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Atomically replace `path` with the current exposition (node_exporter textfile style)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+# -------------------------------
+# TRACES
+# -------------------------------
+class Trace:
+    """Timed spans of one unit of work (a chat turn, a proxied request)
+
+    Each span feeds the `<name>_span_seconds` histogram as it closes; on
+    finish() the whole trace is logged as one JSON line and its total feeds
+    `<name>_seconds`. Attributes set on the trace label neither metric, so
+    high-cardinality values (questions, cache keys) only reach the log.
+    """
+
+    def __init__(self, name, tracer, **attrs):
+        self.name = name
+        self.tracer = tracer
+        self.id = uuid.uuid4().hex[:16]
+        self.attrs = dict(attrs)
+        self.spans = []
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.finished = False
+
+    @contextmanager
+    def span(self, name, **attrs):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, error=error, **attrs)
+
+    def record(self, name, seconds, error=None, **attrs):
+        """Add a span that ends now and was timed elsewhere"""
+        span = {"span": name, "start_ms": round((time.perf_counter() - self.start - seconds) * 1000, 2),
+                "ms": round(seconds * 1000, 2), **attrs}
+        if error:
+            span["error"] = error
+        self.spans.append(span)
+        self.tracer.metrics.observe(f"{self.name}_span_seconds", seconds, span=name)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def finish(self, log=True, **attrs):
+        """Close the trace; `outcome` (default "ok") is the only attribute used as a metric label"""
+        if self.finished:
+            return
+        self.finished = True
+        self.attrs.update(attrs)
+        elapsed = self.elapsed()
+        outcome = self.attrs.get("outcome", "ok")
+        self.tracer.metrics.observe(f"{self.name}_seconds", elapsed, outcome=outcome)
+        self.tracer.metrics.inc(f"{self.name}s_total", outcome=outcome)
+        record = {"trace": self.name, "id": self.id, "ts": round(self.started_at, 3), "ms": round(elapsed * 1000, 2),
+                  **self.attrs, "spans": self.spans}
+        self.tracer.emit(record if log else None)
+
+
+class Tracer:
+    """Traces plus the metrics registry they feed, configured from TRACE_* env vars"""
+
+    def __init__(self, log_path=DEFAULT_LOG, metrics_file=None):
+        self.metrics = Metrics()
+        self.metrics_file = metrics_file or None
+        self._written = 0.0
+        # One logger per destination, so two configurations never share handlers
+        self.logger = logging.getLogger(f"demo_chat.trace.{log_path or 'off'}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        if log_path and not self.logger.handlers:
+            handler = logging.StreamHandler(sys.stderr) if log_path == "-" else logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+        self.enabled = bool(log_path)
+
+    def trace(self, name, **attrs):
+        return Trace(name, self, **attrs)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """A single-span trace, for work timed outside any larger unit (e.g. a data load)"""
+        trace = self.trace(name, **attrs)
+        try:
+            with trace.span(name):
+                yield trace
+        except BaseException:
+            trace.finish(outcome="error")
+            raise
+        trace.finish()
+
+    def emit(self, record):
+        if record is not None and self.enabled:
+            self.logger.info(json.dumps(record, default=str))
+        now = time.monotonic()
+        if self.metrics_file and now - self._written >= METRICS_FILE_INTERVAL:
+            self._written = now
+            self.metrics.write(self.metrics_file)
+
+
+_TRACERS = {}
+
+
+def get_tracer(environ=None):
+    """Process-wide tracer for the configured log / metrics destinations"""
+    environ = os.environ if environ is None else environ
+    config = (environ.get(LOG_ENV, DEFAULT_LOG), environ.get(METRICS_FILE_ENV, ""))
+    if config not in _TRACERS:
+        _TRACERS[config] = Tracer(*config)
+    return _TRACERS[config]